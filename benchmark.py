@@ -0,0 +1,94 @@
+import sys
+import time
+import random
+
+# Insert directory paths
+sys.path.insert(0, 'menu')
+sys.path.insert(0, 'menu/functions')
+sys.path.insert(0, 'sprites')
+
+from main import *
+
+
+# Time how long it takes to run a function, returning the average
+# time in milliseconds over a number of runs
+def timeIt(function, runs=20):
+    start = time.perf_counter()
+    for i in range(runs):
+        function()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+# Draw a 20 segment route (17 across the top of the map and 3 down the right)
+# on the road layer, either as a single batched change or as one change per
+# part of the route
+def drawRoute(game, batched):
+    mapEditor = game.mapEditor
+    layer = mapEditor.getGridLayer("layer 2")
+    grid = layer.getGrid()
+    route = [(0, 0), (17, 0), (17, 3)]
+
+    if batched:
+        mapEditor.beginChange()
+
+    for (x1, y1), (x2, y2) in zip(route, route[1:]):
+        mapEditor.createConnection(
+            "layer 2", layer.getNode(grid.getNodeNumber(x1, y1)),
+            layer.getNode(grid.getNodeNumber(x2, y2)))
+
+    if batched:
+        mapEditor.commitChange()
+
+    # Put the map back to how it was for the next run
+    while mapEditor.getHistory().canUndo():
+        mapEditor.undoChange()
+
+
+def benchmarkRoute(game):
+    game.mapEditor.createLevel(clearChanges=True)
+    game.mapEditor.setRendering(True)
+
+    print("Drawing a 20 segment route:")
+    print("    unbatched: %.2fms" % timeIt(lambda: drawRoute(game, False)))
+    print("    batched: %.2fms" % timeIt(lambda: drawRoute(game, True)))
+
+    game.mapEditor.setRendering(False)
+
+
+# Run a level for a number of 60fps frames at a fast forward speed,
+# returning how many seconds of the level were run per second
+def runLevel(game, speed, frames=600):
+    spriteRenderer = game.spriteRenderer
+    spriteRenderer.setFastForward(speed)
+    game.dt = 1 / 60
+    startTime = spriteRenderer.getTime()
+
+    start = time.perf_counter()
+    for i in range(frames):
+        spriteRenderer.update()
+        spriteRenderer.render()
+        game.renderer.render()
+
+    return ((spriteRenderer.getTime() - startTime)
+            / (time.perf_counter() - start))
+
+
+def benchmarkFastForward(game):
+    random.seed(0)
+    game.spriteRenderer.createLevel(game.mapLoader.getMap("London"))
+    game.spriteRenderer.setRendering(True)
+    game.mainMenu.levelSelectOpen = False
+    game.mainMenu.close()
+
+    print("Running London (level seconds per second):")
+    for speed in config["fastForward"]["speeds"]:
+        print("    %dx: %.1f" % (speed, runLevel(game, speed)))
+
+    game.spriteRenderer.setRendering(False)
+
+
+if __name__ == "__main__":
+    g = Game()
+    benchmarkRoute(g)
+    benchmarkFastForward(g)
+    pygame.quit()
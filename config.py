@@ -1,7 +1,12 @@
 # import pygame
 import json
+import copy
 import os
 import sys
+import threading
+import atexit
+import logging
+from dataclasses import dataclass, replace
 
 
 """
@@ -17,11 +22,53 @@ def getFilePath():
     return os.path.dirname(__file__)
 
 
-with open('config.json') as f:
-    config = json.load(f)
-
 # constants
 GAMEFOLDER = getFilePath()
+CONFIGPATH = os.path.join(GAMEFOLDER, 'config.json')
+DEFAULTCONFIGPATH = os.path.join(GAMEFOLDER, 'config-example.json')
+
+# Parts of the config the player adds to and removes from, these are never
+# filled in from the default config or removed entries would come back
+USERKEYS = [("maps", "custom")]
+
+
+# Add any settings missing from the config (i.e from an older version of the
+# game) from the default config, keeping everything that is already set
+def addDefaults(data, defaults, path=()):
+    for key, value in defaults.items():
+        if key not in data:
+            data[key] = copy.deepcopy(value)
+        elif (isinstance(value, dict) and isinstance(data[key], dict)
+                and path + (key,) not in USERKEYS):
+            addDefaults(data[key], value, path + (key,))
+
+
+def loadConfig():
+    with open(CONFIGPATH) as f:
+        data = json.load(f)
+
+    with open(DEFAULTCONFIGPATH) as f:
+        defaults = json.load(f)
+
+    # Scanlines used to be a single on / off setting
+    graphics = data.get("graphics", {})
+    if isinstance(graphics.get("scanlines"), bool):
+        graphics["scanlines"] = {"enabled": graphics["scanlines"]}
+
+    # Music (i.e the boot track) used to be loaded as sounds, it is moved so
+    # it is streamed instead of being loaded into memory
+    audio = data.get("audio", {})
+    for key in defaults["audio"]["music"]:
+        if key in audio.get("sounds", {}):
+            sound = audio["sounds"].pop(key)
+            audio.setdefault("music", {}).setdefault(key, sound)
+
+    addDefaults(data, defaults)
+    return data
+
+
+config = loadConfig()
+
 FONTFOLDER = os.path.join(GAMEFOLDER, "fonts")
 ASSETSFOLDER = os.path.join(GAMEFOLDER, 'assets')
 MAPSFOLDER = os.path.join(GAMEFOLDER, 'maps')
@@ -50,9 +97,245 @@ SCANLINES = SCANLINESGREEN
 DEFAULTLIVES = 3
 # DEFAULTLIVES = 1
 
-# dump config file to json for saving
+logger = logging.getLogger(__name__)
+
+# Saves files on a background thread so the game never waits for the disk.
+#
+# Writing a file turns its data into json straight away (so it can keep being
+# changed) and queues it. If the same file is written again before the queue
+# is saved only the newest is kept. Each file is written to a temporary file
+# first which then replaces the old file, so the game closing part way
+# through a save can't leave a broken file behind. Reading a file that is
+# waiting to be saved returns what is waiting instead of the old file. A save
+# that fails is logged and kept, and is tried again with the next save or
+# when the writer is flushed.
+class SaveWriter:
+    def __init__(self):
+        # The text waiting to be saved to each path (None to delete the
+        # file), the text being saved right now and the text that failed
+        # to save along with why
+        self.pending = {}
+        self.saving = {}
+        self.unsaved = {}
+        self.errors = {}
+        self.condition = threading.Condition()
+
+        self.thread = threading.Thread(target=self.__run, daemon=True)
+        self.thread.start()
+
+    def getPending(self):
+        return self.pending
+
+    # Return why each file that couldn't be saved failed
+    def getErrors(self):
+        with self.condition:
+            return {path: self.errors[path] for path in self.unsaved}
+
+    # Queue data to be saved to a path as json
+    def write(self, path, data):
+        text = json.dumps(data)
+        with self.condition:
+            self.__retry()
+            self.pending[path] = text
+            self.condition.notify_all()
+
+    # Queue a file to be deleted, replacing any save waiting for it
+    def remove(self, path):
+        with self.condition:
+            self.__retry()
+            self.pending[path] = None
+            self.condition.notify_all()
+
+    # Return the newest text for a path that hasn't been saved yet, raises
+    # KeyError if there isn't any
+    def __getQueued(self, path):
+        for queue in (self.pending, self.saving, self.unsaved):
+            if path in queue:
+                return queue[path]
+        raise KeyError(path)
+
+    # Return the text in a file, or what is waiting to be saved to it
+    def readText(self, path):
+        with self.condition:
+            try:
+                text = self.__getQueued(path)
+            except KeyError:
+                pass
+            else:
+                if text is None:
+                    raise FileNotFoundError(path)
+                return text
+
+        with open(path) as f:
+            return f.read()
+
+    def read(self, path):
+        return json.loads(self.readText(path))
+
+    # Return the size of a file, or of what is waiting to be saved to it
+    def getSize(self, path):
+        with self.condition:
+            try:
+                text = self.__getQueued(path)
+            except KeyError:
+                pass
+            else:
+                if text is None:
+                    raise FileNotFoundError(path)
+                return len(text)
+
+        return os.path.getsize(path)
+
+    # Return true if the file exists or is waiting to be saved
+    def exists(self, path):
+        with self.condition:
+            try:
+                return self.__getQueued(path) is not None
+            except KeyError:
+                pass
+
+        return os.path.exists(path)
+
+    # Wait until everything queued has been saved, i.e when the game quits.
+    # The saves that failed before are tried again, returns why each file
+    # that still couldn't be saved failed
+    def flush(self):
+        with self.condition:
+            self.__retry()
+            self.condition.notify_all()
 
+            while len(self.pending) > 0 or len(self.saving) > 0:
+                self.condition.wait()
 
+        return self.getErrors()
+
+    # Queue the saves that failed again, unless there is a newer save
+    def __retry(self):
+        for path, text in self.unsaved.items():
+            self.pending.setdefault(path, text)
+        self.unsaved = {}
+
+    def __run(self):
+        while True:
+            with self.condition:
+                while len(self.pending) <= 0:
+                    self.condition.wait()
+
+                self.saving = self.pending
+                self.pending = {}
+
+            failed = {}
+            for path, text in self.saving.items():
+                try:
+                    if text is None:
+                        if os.path.exists(path):
+                            os.remove(path)
+                    else:
+                        self.__save(path, text)
+                except OSError as e:
+                    logger.error("Could not save %s: %s", path, e)
+                    failed[path] = e
+
+            with self.condition:
+                for path, text in self.saving.items():
+                    if path in failed:
+                        self.errors[path] = failed[path]
+
+                        # Keep the text unless a newer save has been queued
+                        if path not in self.pending:
+                            self.unsaved[path] = text
+                    else:
+                        self.errors.pop(path, None)
+
+                self.saving = {}
+                self.condition.notify_all()
+
+    @staticmethod
+    def __save(path, text):
+        temp = path + ".tmp"
+        with open(temp, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+
+
+saveWriter = SaveWriter()
+atexit.register(saveWriter.flush)
+
+
+# dump config file to json for saving
 def dump(data):
-    with open('config.json', 'w') as f:
-        json.dump(data, f)
+    saveWriter.write(CONFIGPATH, data)
+
+
+# The graphics settings used when drawing, read from the config once so
+# drawing every frame doesn't have to look through the config. The sizes of
+# the screen at the current scale are worked out when the scale changes
+# instead of every time they are used
+@dataclass(frozen=True)
+class GraphicsSettings:
+    displayWidth: int
+    displayHeight: int
+    antiAliasing: bool
+    smoothscale: bool
+    smoothCorners: bool
+    scanlines: bool
+    scanlinesOpacity: int
+    scale: float = 1
+    scaledWidth: float = 0
+    scaledHeight: float = 0
+    scaledSize: tuple = (0, 0)  # the scaled width and height in pixels
+
+    @staticmethod
+    def load(graphics, scale=1):
+        return GraphicsSettings(
+            graphics["displayWidth"], graphics["displayHeight"],
+            graphics["antiAliasing"], graphics["smoothscale"],
+            graphics["smoothCorners"], graphics["scanlines"]["enabled"],
+            graphics["scanlines"]["opacity"]).setScale(scale)
+
+    # Return the settings at a new scale
+    def setScale(self, scale):
+        width = self.displayWidth * scale
+        height = self.displayHeight * scale
+        return replace(
+            self, scale=scale, scaledWidth=width, scaledHeight=height,
+            scaledSize=(int(width), int(height)))
+
+
+# Keeps the current settings and tells anything listening when the config
+# has been changed, so they can update before it is saved
+class Settings:
+    def __init__(self):
+        self.listeners = []
+        self.graphics = GraphicsSettings.load(config["graphics"])
+
+    def getGraphics(self):
+        return self.graphics
+
+    # Call a function with the settings whenever the config is changed
+    def addListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeListener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    # The screen has been resized
+    def setScale(self, scale):
+        self.graphics = self.graphics.setScale(scale)
+
+    # Call after changing the config, the settings are read from it again,
+    # everything listening is told and the config is saved
+    def changed(self):
+        self.graphics = GraphicsSettings.load(
+            config["graphics"], self.graphics.scale)
+
+        for listener in list(self.listeners):
+            listener(self)
+
+        dump(config)
+
+
+settings = Settings()
@@ -0,0 +1,183 @@
+import copy
+import json
+from config import *
+
+
+# Stores the changes made in the map editor as small operations on the level
+# data rather than copying the whole level for every change.
+#
+# Each change is a list of operations, an operation being one of:
+#     ("insert", key, layer, index, value, prune)
+#     ("delete", key, layer, index, value, prune)
+#     ("set", key, old, new)
+#
+# The operations can be applied forwards (redo) or backwards (undo), so
+# undoing a change only costs as much as the change itself. Prune is set when
+# the layer list was created by the insert or left empty by the delete, so
+# the layer can be removed from the level data again.
+class EditorHistory:
+    def __init__(self, levelData=None):
+        self.maxEntries = config["editor"]["history"]["maxEntries"]
+        self.maxBytes = config["editor"]["history"]["maxBytes"]
+        self.snapshotInterval = config["editor"]["history"]["snapshotInterval"]
+
+        self.clear(levelData if levelData is not None else {})
+
+    # Start a new history from the given level
+    def clear(self, levelData):
+        # The level before the oldest change, used for seeking
+        self.base = copy.deepcopy(levelData)
+        self.entries = []
+        self.pending = []
+        self.position = 0  # Number of changes currently applied
+        self.totalBytes = 0
+
+    def getEntries(self):
+        return self.entries
+
+    def getPosition(self):
+        return self.position
+
+    def getTotalBytes(self):
+        return self.totalBytes
+
+    def canUndo(self):
+        return self.position > 0
+
+    def canRedo(self):
+        return self.position < len(self.entries)
+
+    # Append a value to one of the layer lists in the level data
+    def insert(self, levelData, key, layer, value):
+        prune = layer not in levelData[key]
+        values = levelData[key].setdefault(layer, [])
+        values.append(value)
+        self.pending.append(
+            ("insert", key, layer, len(values) - 1, copy.deepcopy(value),
+                prune))
+
+    # Remove a value from one of the layer lists in the level data,
+    # prune removes the layer from the level data when it is left empty
+    def delete(self, levelData, key, layer, value, prune=False):
+        values = levelData[key][layer]
+        index = values.index(value)
+        del values[index]
+
+        prune = prune and len(values) <= 0
+        if prune:
+            del levelData[key][layer]
+
+        self.pending.append(
+            ("delete", key, layer, index, copy.deepcopy(value), prune))
+
+    # Replace a whole value in the level data (i.e when resizing the map)
+    def set(self, levelData, key, value):
+        old = copy.deepcopy(levelData[key])
+        levelData[key] = value
+        self.pending.append(("set", key, old, copy.deepcopy(value)))
+
+    # Add all the pending operations to the history as a single change
+    def commit(self, levelData):
+        if len(self.pending) <= 0:
+            return False
+
+        ops = self.pending
+        self.pending = []
+
+        # Adding a new change removes any changes that could be redone
+        for entry in self.entries[self.position:]:
+            self.totalBytes -= entry["size"]
+        del self.entries[self.position:]
+
+        entry = {"ops": ops, "snapshot": None, "size": len(json.dumps(ops))}
+
+        # Periodically store the whole level so seeking doesnt
+        # have to replay every change from the start
+        if (self.snapshotInterval > 0
+                and (len(self.entries) + 1) % self.snapshotInterval == 0):
+            entry["snapshot"] = copy.deepcopy(levelData)
+            entry["size"] += len(json.dumps(levelData))
+
+        self.entries.append(entry)
+        self.totalBytes += entry["size"]
+        self.position = len(self.entries)
+
+        self.trim()
+        return True
+
+    # Remove the oldest changes until the history is within its limits
+    def trim(self):
+        while len(self.entries) > 1 and (
+                len(self.entries) > self.maxEntries
+                or self.totalBytes > self.maxBytes):
+            entry = self.entries.pop(0)
+            self.totalBytes -= entry["size"]
+            self.position -= 1
+
+            # Move the base forward so it is the level before the new oldest
+            if entry["snapshot"] is not None:
+                self.base = copy.deepcopy(entry["snapshot"])
+            else:
+                EditorHistory.applyOps(self.base, entry["ops"])
+
+    # Undo the last change, returning its operations so the
+    # editor can update what has changed
+    def undo(self, levelData):
+        if not self.canUndo():
+            return []
+
+        self.position -= 1
+        ops = self.entries[self.position]["ops"]
+        EditorHistory.applyOps(levelData, ops, True)
+        return ops
+
+    def redo(self, levelData):
+        if not self.canRedo():
+            return []
+
+        ops = self.entries[self.position]["ops"]
+        EditorHistory.applyOps(levelData, ops)
+        self.position += 1
+        return ops
+
+    # Return a copy of the level after the given number of changes,
+    # starting from the closest snapshot before it
+    def getLevelAt(self, position):
+        position = max(0, min(position, len(self.entries)))
+        start, levelData = 0, self.base
+
+        for i in range(position - 1, -1, -1):
+            if self.entries[i]["snapshot"] is not None:
+                start, levelData = i + 1, self.entries[i]["snapshot"]
+                break
+
+        levelData = copy.deepcopy(levelData)
+        for entry in self.entries[start:position]:
+            EditorHistory.applyOps(levelData, entry["ops"])
+
+        return levelData
+
+    @staticmethod
+    def applyOps(levelData, ops, reverse=False):
+        for op in (reversed(ops) if reverse else ops):
+            EditorHistory.applyOp(levelData, op, reverse)
+
+    @staticmethod
+    def applyOp(levelData, op, reverse=False):
+        if op[0] == "set":
+            key, old, new = op[1:]
+            levelData[key] = copy.deepcopy(old if reverse else new)
+            return
+
+        action, key, layer, index, value, prune = op
+
+        # Undoing an insert is a delete and undoing a delete is an insert
+        if (action == "insert") == (not reverse):
+            levelData[key].setdefault(layer, []).insert(
+                index, copy.deepcopy(value))
+
+        else:
+            del levelData[key][layer][index]
+
+            if prune:
+                del levelData[key][layer]
@@ -3,9 +3,145 @@ import pygame._sdl2
 from pygame.locals import *
 from config import *
 import os
+import weakref
+import logging
+import json
+import time
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor, Future
 
 vec = pygame.math.Vector2
 
+logger = logging.getLogger(__name__)
+
+
+class SurfacePool:
+    def __init__(self):
+        # budget is in megabytes, 0 means there is no limit
+        self.budget = config["graphics"]["surfacePool"]["budget"] * 1024 * 1024
+        self.debug = config["graphics"]["surfacePool"]["debug"]
+
+        # released surfaces waiting to be reused, keyed by (size, alpha)
+        self.free = {}
+        self.freeBytes = 0
+
+        # surfaces currently in use, who is using them and their size, the
+        # surface is only weakly referenced so a surface that is never
+        # released doesnt stay alive forever
+        self.live = {}
+        self.liveBytes = 0
+
+    @staticmethod
+    def getSurfaceBytes(surface):
+        return surface.get_pitch() * surface.get_height()
+
+    def getLiveBytes(self):
+        return self.liveBytes
+
+    def getFreeBytes(self):
+        return self.freeBytes
+
+    def getTotalBytes(self):
+        return self.liveBytes + self.freeBytes
+
+    # Return the bytes live and free and the bytes of live surfaces used by
+    # each owner
+    def getReport(self):
+        owners = {}
+        for ref, owner, size in list(self.live.values()):
+            owners[owner] = owners.get(owner, 0) + size
+
+        return {
+            "live": self.liveBytes, "free": self.freeBytes,
+            "owners": owners}
+
+    # Log the report, largest owners first
+    def logReport(self):
+        report = self.getReport()
+        logger.info("Surface pool: %.2fMB live, %.2fMB free", (
+            report["live"] / 1048576), report["free"] / 1048576)
+
+        for owner, size in sorted(
+                report["owners"].items(), key=lambda x: -x[1]):
+            logger.info("    %s: %.2fMB", owner, size / 1048576)
+
+    # A live surface was never released and has been deleted
+    def __forget(self, key):
+        if key in self.live:
+            self.liveBytes -= self.live.pop(key)[2]
+
+    # Remove free surfaces until the new surface fits in the budget
+    def makeSpace(self, amount):
+        if self.budget <= 0:
+            return
+
+        for key in list(self.free.keys()):
+            while self.free[key] and (
+                    self.getTotalBytes() + amount > self.budget):
+                self.freeBytes -= self.getSurfaceBytes(self.free[key].pop())
+
+            if not self.free[key]:
+                del self.free[key]
+
+        if self.getTotalBytes() + amount > self.budget:
+            logger.warning("Surface pool budget of %.2fMB exceeded", (
+                self.budget / 1048576))
+            if self.debug:
+                self.logReport()
+
+    # Get a surface of the given size, reusing a released one if possible
+    def acquire(self, owner, size, alpha=False):
+        size = (int(size[0]), int(size[1]))
+        key = (size, alpha)
+
+        if self.free.get(key):
+            surface = self.free[key].pop()
+            self.freeBytes -= self.getSurfaceBytes(surface)
+            surface.set_clip(None)
+            surface.set_alpha(None)
+            surface.set_colorkey(None)
+
+        else:
+            self.makeSpace(size[0] * size[1] * 4)
+            if alpha:
+                surface = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+            else:
+                surface = pygame.Surface(size).convert()
+
+        key = id(surface)
+        surfaceBytes = self.getSurfaceBytes(surface)
+        self.live[key] = (weakref.ref(
+            surface, lambda ref, key=key: self.__forget(key)),
+            owner, surfaceBytes)
+        self.liveBytes += surfaceBytes
+        return surface
+
+    # Give a surface back to the pool so it can be reused
+    def release(self, surface):
+        if surface is None or id(surface) not in self.live or (
+                self.live[id(surface)][0]() is not surface):
+            return
+
+        ref, owner, surfaceBytes = self.live.pop(id(surface))
+        self.liveBytes -= surfaceBytes
+        key = (
+            surface.get_size(), (surface.get_flags() & pygame.SRCALPHA) != 0)
+
+        # If keeping the surface would go over the budget just drop it
+        if self.budget > 0 and (
+                self.getTotalBytes() + surfaceBytes > self.budget):
+            return
+
+        self.free.setdefault(key, []).append(surface)
+        self.freeBytes += surfaceBytes
+
+    # Drop all the released surfaces, i.e when the
+    # screen has been resized and they are the wrong size
+    def clearFree(self):
+        self.free = {}
+        self.freeBytes = 0
+
 
 class Renderer:
     def __init__(self, game):
@@ -23,7 +159,8 @@ class Renderer:
             (self.windowWidth, self.windowHeight),
             pygame.RESIZABLE | pygame.DOUBLEBUF, vsync=int(self.game.vsync))
         # self.screen.set_alpha(None)
-        self.gameDisplay = pygame.Surface((self.width, self.height))
+        self.gameDisplay = self.game.surfacePool.acquire(
+            "game display", (self.width, self.height))
 
         # control the scale of whats on screen
         self.scale = 1
@@ -40,6 +177,27 @@ class Renderer:
             str(int(self.game.clock.get_fps())), False, RED)
         self.createScanlines()
 
+        # What the screen was last set up with, to tell what has changed
+        self.graphics = settings.graphics
+        self.vsync = self.game.vsync
+        settings.addListener(self.settingsChanged)
+
+    # Set the screen up again if a setting it was made with has changed,
+    # or just make the scanlines again if only they have
+    def settingsChanged(self, settings):
+        previous = self.graphics
+        self.graphics = settings.graphics
+
+        if (previous.smoothscale != self.graphics.smoothscale
+                or previous.antiAliasing != self.graphics.antiAliasing
+                or previous.smoothCorners != self.graphics.smoothCorners
+                or self.vsync != self.game.vsync):
+            self.setScale(
+                (self.windowWidth, self.windowHeight), self.game.fullscreen)
+
+        elif previous.scanlinesOpacity != self.graphics.scanlinesOpacity:
+            self.createScanlines()
+
     # Prepare the gamedisplay for blitting to,
     # this means overriding it with a new color
     def prepareSurface(self, color):
@@ -50,25 +208,55 @@ class Renderer:
 
         # self.dirtySurfaces.append(self.gameDisplay.get_rect())
 
+    # Set every 5th row of the surface to black in one go rather than
+    # drawing each line seperately
     def drawScanlines(self, surface):
         # step = int(2 * self.scale) if int(2 * self.scale) >= 2 else 2
         step = 5
-        for i in range(0, int(self.height), step):
-            pos1 = (0, i)
-            pos2 = (int(self.width), i)
-            pygame.draw.line(surface, BLACK, pos1, pos2, 1)
+        pixels = pygame.surfarray.pixels3d(surface)
+        pixels[:, ::step] = BLACK[:3]
+        del pixels  # unlock the surface
 
+    # Create the scanlines and the border around the screen as a single
+    # overlay, this is only done when the screen size changes so rendering
+    # just needs to blit the overlay
     def createScanlines(self):
-        self.scanlines = pygame.Surface((self.width, self.height)).convert()
-        self.scanlines.fill(SCANLINES)
+        if hasattr(self, 'scanlines'):
+            self.game.surfacePool.release(self.scanlines)
+
+        self.scanlines = self.game.surfacePool.acquire(
+            "scanlines", (self.width, self.height), True)
+        self.scanlines.fill(
+            (*SCANLINES[:3], settings.graphics.scanlinesOpacity))
         self.drawScanlines(self.scanlines)
-        self.scanlines.set_alpha(
-            config["graphics"]["scanlines"]["opacity"], pygame.RLEACCEL)
+
+        pygame.draw.rect(
+            self.scanlines, TRUEBLACK, (
+                -30 * self.scale, -30 * self.scale,
+                settings.graphics.scaledWidth + 60 * self.scale,
+                settings.graphics.scaledHeight + 60 * self.scale),
+            int(30 * self.scale),
+            border_radius=int(80 * self.scale))
 
     # Add a surface to the gameDisplay
     def addSurface(self, surface, rect, method=None):
         self.surfaces.append((surface, rect, method))
 
+    # Return how many surfaces have been added this frame
+    def getSurfaceCount(self):
+        return len(self.surfaces)
+
+    # Draw the surfaces added this frame, from the start index onwards,
+    # to the given surface and remove them so they aren't drawn again
+    def drawSurfaces(self, surface, start=0):
+        for s in self.surfaces[start:]:
+            if s[2]:
+                s[2](surface)
+            else:
+                surface.blit(s[0], s[1])
+
+        del self.surfaces[start:]
+
     def addDirtySurface(self, surface):
         self.dirtySurfaces.append(surface)
 
@@ -119,8 +307,11 @@ class Renderer:
             size[1] / config["graphics"]["displayHeight"],
             size[0] / config["graphics"]["displayWidth"]) * self.fixedScale
 
-        self.width = (config["graphics"]["displayWidth"] * self.scale)
-        self.height = (config["graphics"]["displayHeight"] * self.scale)
+        settings.setScale(self.scale)
+        self.graphics = settings.graphics
+        self.vsync = self.game.vsync
+        self.width = settings.graphics.scaledWidth
+        self.height = settings.graphics.scaledHeight
         self.windowWidth = size[0]
         self.windowHeight = size[1]
         self.diff.x = (self.windowWidth - self.width) / 2
@@ -138,8 +329,9 @@ class Renderer:
                 pygame.RESIZABLE | pygame.DOUBLEBUF,
                 vsync=int(self.game.vsync))
 
-        # .convert()
-        self.gameDisplay = pygame.Surface((self.width, self.height))
+        self.game.surfacePool.release(self.gameDisplay)
+        self.gameDisplay = self.game.surfacePool.acquire(
+            "game display", (self.width, self.height))
 
         self.game.spriteRenderer.resize()
         self.game.mapEditor.resize()
@@ -147,26 +339,21 @@ class Renderer:
         self.game.mainMenu.resize()
         self.createScanlines()
 
+        # Anything left in the pool is the old screen size so wont be reused
+        self.game.surfacePool.clearFree()
+
+        if self.game.surfacePool.debug:
+            self.game.surfacePool.logReport()
+
     # on tick function
     def render(self):
-        for surface in self.surfaces:
-            if surface[2]:
-                surface[2](self.gameDisplay)
-            else:
-                self.gameDisplay.blit(surface[0], surface[1])
+        self.drawSurfaces(self.gameDisplay)
 
         self.gameDisplay.blit(self.fontImage, (950, 10))
 
         if not self.game.mainMenu.levelSelectOpen:
-            if config["graphics"]["scanlines"]["enabled"]:
+            if settings.graphics.scanlines:
                 self.gameDisplay.blit(self.scanlines, (0, 0))
-                pygame.draw.rect(
-                    self.gameDisplay, TRUEBLACK, (
-                        -30 * self.scale, -30 * self.scale,
-                        (config["graphics"]["displayWidth"] + 60) * self.scale,
-                        (config["graphics"]["displayHeight"] + 60)
-                        * self.scale), int(30 * self.scale),
-                    border_radius=int(80 * self.scale))
 
         self.screen.blit(
             self.gameDisplay,
@@ -202,15 +389,14 @@ class ImageLoader:
         data = self.images[key]["data"]
 
         if scale:  # if there is a scale
-            if config["graphics"]["smoothscale"]:
-                image = pygame.transform.smoothscale(
-                    image, (
-                        int(scale[0] * self.game.renderer.getScale()),
-                        int(scale[1] * self.game.renderer.getScale())))
+            size = (
+                int(scale[0] * settings.graphics.scale),
+                int(scale[1] * settings.graphics.scale))
+
+            if settings.graphics.smoothscale:
+                image = pygame.transform.smoothscale(image, size)
             else:
-                image = pygame.transform.scale(image, (
-                    int(scale[0] * self.game.renderer.getScale()),
-                    int(scale[1] * self.game.renderer.getScale())))
+                image = pygame.transform.scale(image, size)
             image = image.convert_alpha() if data["alpha"] else image.convert()
 
         return image
@@ -225,42 +411,198 @@ class ImageLoader:
                     image.set_at((x, y), newColor)
 
 
+# Plays the sounds and music.
+#
+# Sounds are played on a fixed number of voices (mixer channels), and each
+# sound belongs to a category (i.e ui or game) which can only use so many of
+# them at once. When a category has no voices left the voice playing the
+# lowest priority sound (the oldest if there are a few) is taken over, as long
+# as the new sound isn't less important, else the new sound isn't played. The
+# same sound started again within the dedupe window is ignored, so lots of
+# people completing at once (or a sound asked for every frame) doesn't stack
+# up copies of it. Music is streamed from its file instead of being loaded
+# into memory.
 class AudioLoader:
     def __init__(self):
-        self.numChannels = 8
+        self.numChannels = config["audio"]["voices"]
+        self.categories = config["audio"]["categories"]
+        self.dedupeWindow = config["audio"]["dedupeWindow"] * 1000
         pygame.mixer.set_num_channels(self.numChannels)
 
         self.sounds = {}
         self.music = {}
+        self.lastPlayed = {}  # when each sound was last started, in ms
 
         self.setChannels()
         self.loadAllSounds()
+        self.loadAllMusic()
 
     def getSound(self, key):
         return self.sounds[key]
 
-    def playSound(self, key, chan=0):
-        self.channels[chan].play(self.sounds[key])
-
-    def stopSound(self, chan=0):
-        self.channels[chan].stop()
-
-    def fadeOutSound(self, duration, chan=0):
-        self.channels[chan].fadeout(duration)
+    def getVoices(self):
+        return self.voices
+
+    # Play a sound on a voice in its category, returning the channel it is
+    # played on or None if it wasn't played
+    def playSound(self, key):
+        now = pygame.time.get_ticks()
+        if now - self.lastPlayed.get(key, -self.dedupeWindow) < (
+                self.dedupeWindow):
+            return None
+
+        data = config["audio"]["sounds"][key]
+        index = self.getVoice(data["category"], data["priority"])
+        if index is None:
+            return None
+
+        self.lastPlayed[key] = now
+        self.voices[index] = (key, data["category"], data["priority"], now)
+        self.channels[index].play(self.sounds[key])
+        return self.channels[index]
+
+    # Return a free voice for a category, or the voice to take over if there
+    # isn't one (None if every voice is playing something more important)
+    def getVoice(self, category, priority):
+        playing = []
+        free = None
+
+        for index, channel in enumerate(self.channels):
+            if self.voices[index] is not None and not channel.get_busy():
+                self.voices[index] = None
+
+            if self.voices[index] is None:
+                free = index if free is None else free
+            elif self.voices[index][1] == category:
+                playing.append(index)
+
+        # Only take over a voice from the same category when it is full,
+        # otherwise from any category if every voice is playing
+        if len(playing) < self.categories[category]:
+            if free is not None:
+                return free
+            playing = range(self.numChannels)
+
+        if len(playing) <= 0:
+            return None
+
+        index = min(playing, key=lambda i: (
+            self.voices[i][2], self.voices[i][3]))
+        if self.voices[index][2] > priority:
+            return None
+        return index
+
+    # Stop every voice playing a sound
+    def stopSound(self, key):
+        for index, voice in enumerate(self.voices):
+            if voice is not None and voice[0] == key:
+                self.channels[index].stop()
+                self.voices[index] = None
+
+    def fadeOutSound(self, duration, key):
+        for index, voice in enumerate(self.voices):
+            if voice is not None and voice[0] == key:
+                self.channels[index].fadeout(duration)
+
+    # Stream a piece of music from its file, looping forever by default
+    def playMusic(self, key, loops=-1, fade=0):
+        pygame.mixer.music.load(self.music[key]["file"])
+        pygame.mixer.music.set_volume(self.music[key]["volume"])
+        pygame.mixer.music.play(loops, fade_ms=fade)
+
+    def stopMusic(self):
+        pygame.mixer.music.stop()
+
+    def fadeOutMusic(self, duration):
+        pygame.mixer.music.fadeout(duration)
 
     def setChannels(self):
-        # Channel 0 reserved for hud sounds
-        # Channel 1 reserved for game sounds
-        # Channel 2 reserved for extra game sounds
         self.channels = [
             pygame.mixer.Channel(i) for i in range(self.numChannels)]
 
+        # The sound playing on each voice, its category, priority and
+        # when it started
+        self.voices = [None] * self.numChannels
+
     def loadAllSounds(self):
         for key, audio in config["audio"]["sounds"].items():
             a = pygame.mixer.Sound(os.path.join(AUDIOFOLDER, audio["file"]))
             a.set_volume(audio["volume"])
             self.sounds[key] = a
 
+    # Only the path is kept, the music is read from the file as it plays
+    def loadAllMusic(self):
+        for key, audio in config["audio"]["music"].items():
+            self.music[key] = {
+                "file": os.path.join(AUDIOFOLDER, audio["file"]),
+                "volume": audio["volume"]}
+
+
+# Samples the mouse and keyboard once a frame, so everything reads the same
+# input for the frame instead of asking pygame for it themselves, and turns
+# key presses into the actions bound to them in the controls
+class InputHandler:
+    def __init__(self, game):
+        self.game = game
+        self.frame = 0  # Counts the updates so others can tell when it changes
+
+        self.setControls(config["controls"])
+        settings.addListener(self.controlsChanged)
+        self.update()
+
+    # Make the keycode -> actions table from the key names in the controls,
+    # so key presses don't have to be compared by name. More than one
+    # action can be bound to the same key
+    def setControls(self, controls):
+        self.actions = {}
+        self.bindings = {}
+
+        for action, name in controls.items():
+            try:
+                key = pygame.key.key_code(name)
+            except ValueError:
+                continue
+
+            self.actions.setdefault(key, []).append(action)
+            self.bindings[action] = key
+
+    # Make the table again when the config has changed, in case the
+    # controls have
+    def controlsChanged(self, settings):
+        self.setControls(config["controls"])
+
+    # Sample the mouse and keyboard for this frame, with the
+    # mouse position on the game surface instead of the window
+    def update(self):
+        mx, my = pygame.mouse.get_pos()
+        difference = self.game.renderer.getDifference()
+        self.mousePos = (mx - difference[0], my - difference[1])
+        self.keys = pygame.key.get_pressed()
+        self.mods = pygame.key.get_mods()
+        self.frame += 1
+
+    def getFrame(self):
+        return self.frame
+
+    def getMousePos(self):
+        return self.mousePos
+
+    def getMods(self):
+        return self.mods
+
+    # Return the actions bound to a key, which is empty if it isn't bound
+    def getActions(self, key):
+        return self.actions.get(key, [])
+
+    def getPressed(self, key):
+        return bool(self.keys[key])
+
+    # Return true if the key bound to an action is held down
+    def getActionPressed(self, action):
+        return (
+            action in self.bindings
+            and self.getPressed(self.bindings[action]))
+
 
 class MapLoader:
     def __init__(self):
@@ -283,9 +625,7 @@ class MapLoader:
         return self.maps[key]
 
     def getMapData(self, key):
-        level = self.maps[key]
-        with open(level) as f:
-            return json.load(f)
+        return saveWriter.read(self.maps[key])
 
     def getLongestMapLength(self):
         longest = 0
@@ -320,5 +660,125 @@ class MapLoader:
         return False
 
     def saveMap(self, mapName, mapData):
-        with open(self.getMap(mapName), "w") as f:
-            json.dump(mapData, f)
+        saveWriter.write(self.getMap(mapName), mapData)
+
+
+# Loads things in the background whilst the game keeps running, i.e the maps
+# and thumbnails for the level select, so the loading screen keeps animating
+# and the window keeps responding instead of freezing until it is done.
+#
+# Reading and parsing files is done by worker threads. Anything that uses
+# pygame or the sprite renderer (i.e drawing a thumbnail) has to be done on
+# the main thread, so these jobs are run a few at a time each frame until the
+# frame budget is used up. A job can be given the file it needs and waits
+# until it has been read. How many jobs are done and how many bytes have been
+# read is kept so the loading screen can show real progress.
+class BackgroundLoader:
+    def __init__(self, game):
+        self.game = game
+        self.workers = ThreadPoolExecutor(
+            max_workers=config["loading"]["workers"])
+        self.frameBudget = config["loading"]["frameBudget"]
+        self.lock = threading.Lock()
+        self.clear()
+
+    # Forget every job, any files still being read are ignored
+    def clear(self):
+        self.jobs = collections.deque()  # main thread jobs, in order
+        self.reads = []  # files being read by the workers
+        self.total = 0
+        self.done = 0
+        self.bytesTotal = 0
+        self.bytesRead = 0
+        self.onProgress = None
+        self.onFinish = None
+
+    def getLoading(self):
+        return self.onFinish is not None or self.total > self.done
+
+    def getTotal(self):
+        return self.total
+
+    def getDone(self):
+        return self.done
+
+    # Return how much has been loaded (0 - 1)
+    def getProgress(self):
+        if self.total <= 0:
+            return 1
+        return self.done / self.total
+
+    def getBytesTotal(self):
+        return self.bytesTotal
+
+    def getBytesRead(self):
+        return self.bytesRead
+
+    # Read and parse a json file on a worker thread, returning a future
+    # which can be given to a job that needs the file
+    def readFile(self, path):
+        self.total += 1
+        # The file may only be waiting to be saved (i.e a map saved as a new
+        # file) so its size is from the save writer
+        self.bytesTotal += saveWriter.getSize(path)
+
+        future = self.workers.submit(self.__read, path)
+        self.reads.append(future)
+        return future
+
+    def __read(self, path):
+        text = saveWriter.readText(path)
+
+        with self.lock:
+            self.bytesRead += len(text)
+        return json.loads(text)
+
+    # Run a function on the main thread, any futures it is given are
+    # waited for and replaced with what they loaded
+    def addJob(self, function, *args):
+        self.total += 1
+        self.jobs.append((function, args))
+
+    # Start loading the jobs added, progress is called every frame whilst
+    # loading and finish is called once everything has loaded
+    def start(self, onFinish=None, onProgress=None):
+        self.onFinish = onFinish
+        self.onProgress = onProgress
+
+    def __ready(self, args):
+        return all(
+            arg.done() for arg in args if isinstance(arg, Future))
+
+    # Run the jobs that are ready until the frame budget is used up, always
+    # running at least one so loading never stalls on a slow frame
+    def update(self):
+        if not self.getLoading():
+            return
+
+        for future in [read for read in self.reads if read.done()]:
+            self.reads.remove(future)
+            future.result()  # raise any error from reading the file
+            self.done += 1
+
+        start = time.perf_counter()
+        while len(self.jobs) > 0:
+            function, args = self.jobs[0]
+            if not self.__ready(args):
+                break
+
+            self.jobs.popleft()
+            function(*[
+                arg.result() if isinstance(arg, Future) else arg
+                for arg in args])
+            self.done += 1
+
+            if time.perf_counter() - start >= self.frameBudget:
+                break
+
+        if self.onProgress is not None:
+            self.onProgress(self)
+
+        if self.done >= self.total and self.onFinish is not None:
+            onFinish = self.onFinish
+            self.clear()
+            onFinish()
@@ -9,8 +9,10 @@ from menu import *
 from sprites import *
 from menuComponents import *
 from mapEditor import *
+from tweenEngine import *
 import pygame
 import sys
+import logging
 
 
 # Insert directory paths
@@ -38,15 +40,19 @@ class Game:
         self.vsync = config["graphics"]["vsync"]
 
         # Engine
+        self.surfacePool = SurfacePool()
         self.renderer = Renderer(self)
+        self.inputHandler = InputHandler(self)
         self.spriteRenderer = SpriteRenderer(self)
         self.clickManager = ClickManager(self)
         self.textHandler = TextHandler()
+        self.tweenEngine = TweenEngine(self)
 
         # Loaders
         self.imageLoader = ImageLoader(self)
         self.mapLoader = MapLoader()
         self.audioLoader = AudioLoader()
+        self.backgroundLoader = BackgroundLoader(self)
 
         # Map editor
         self.mapEditor = MapEditor(self)
@@ -62,8 +68,8 @@ class Game:
         self.setIcon()
         self.setCursor()
 
-        # self.audioLoader.playSound("boot", 2)
-        # self.audioLoader.fadeOutSound(10000, 2)
+        # self.audioLoader.playMusic("boot", 0)
+        # self.audioLoader.fadeOutMusic(10000)
 
         # print(pygame.font.get_fonts())
 
@@ -87,7 +93,13 @@ class Game:
         self.playing = False
 
     def __events(self):
-        for e in pygame.event.get():
+        events = pygame.event.get()
+
+        # Sample the mouse and keys after the events have been pumped, so
+        # they are from the same frame as the events
+        self.inputHandler.update()
+
+        for e in events:
             if e.type == pygame.QUIT:
                 self.__quit()
 
@@ -95,7 +107,8 @@ class Game:
                 self.renderer.setScale(e.size, self.fullscreen)
 
             if e.type == pygame.KEYDOWN:
-                self.textHandler.events(e)
+                actions = self.inputHandler.getActions(e.key)
+                self.textHandler.events(e, actions)
                 self.textHandler.setPressed(True)
 
                 # Only open the option manu if the game isn't paused
@@ -122,58 +135,62 @@ class Game:
                 # isnt open and no text inputs are open
                 if (not self.paused and not self.mainMenu.open
                         and not self.textHandler.getActive()):
-                    # Show / Hide the different layers depending on key press
-                    if pygame.key.name(e.key) == config["controls"]["layer1"]:
-                        self.spriteRenderer.showLayer(1)
-                        self.mapEditor.showLayer(1)
-
-                    elif (pygame.key.name(e.key)
-                            == config["controls"]["layer2"]):
-                        self.spriteRenderer.showLayer(2)
-                        self.mapEditor.showLayer(2)
-
-                    elif (pygame.key.name(e.key)
-                            == config["controls"]["layer3"]):
-                        self.spriteRenderer.showLayer(3)
-                        self.mapEditor.showLayer(3)
-
-                    elif (pygame.key.name(e.key)
-                            == config["controls"]["layer4"]):
-                        self.spriteRenderer.showLayer(4)
-                        self.mapEditor.showLayer(4)
+                    # Show / Hide the different layers depending on the
+                    # key press
+                    for action in actions:
+                        if action == "layer1":
+                            self.spriteRenderer.showLayer(1)
+                            self.mapEditor.showLayer(1)
+
+                        elif action == "layer2":
+                            self.spriteRenderer.showLayer(2)
+                            self.mapEditor.showLayer(2)
+
+                        elif action == "layer3":
+                            self.spriteRenderer.showLayer(3)
+                            self.mapEditor.showLayer(3)
+
+                        elif action == "layer4":
+                            self.spriteRenderer.showLayer(4)
+                            self.mapEditor.showLayer(4)
+
+                        # Fast forward the level, going back to normal
+                        # speed after the fastest speed
+                        elif action == "dtUp":
+                            self.spriteRenderer.toggleFastForward()
 
                 if (e.key == pygame.K_z
-                    and pygame.key.get_mods() & pygame.KMOD_CTRL
+                    and self.inputHandler.getMods() & pygame.KMOD_CTRL
                         and not self.paused and not self.mainMenu.open):
                     self.mapEditor.undoChange()
-                    level = self.mapEditor.getLevelData()
-                    layer = self.mapEditor.getLayer()
-                    # Reload the level
-                    self.mapEditor.createLevel(level, layer=layer)
 
                 elif (e.key == pygame.K_y
-                        and pygame.key.get_mods() & pygame.KMOD_CTRL
+                        and self.inputHandler.getMods() & pygame.KMOD_CTRL
                         and not self.paused and not self.mainMenu.open):
                     self.mapEditor.redoChange()
-                    level = self.mapEditor.getLevelData()
-                    layer = self.mapEditor.getLayer()
-                    # Reload the level
-                    self.mapEditor.createLevel(level, layer=layer)
 
             elif e.type == pygame.KEYUP:
                 self.textHandler.setPressed(False)
 
-            # Just for fun :) - And refactoring ( ͡° ͜ʖ ͡°)
-            if e.type == pygame.MOUSEBUTTONDOWN:
-                if e.button == 4:
-                    self.spriteRenderer.setFixedScale(
-                        self.spriteRenderer.getFixedScale() + 0.1)
-                    self.spriteRenderer.resize()
-
-                elif e.button == 5:
-                    self.spriteRenderer.setFixedScale(
-                        self.spriteRenderer.getFixedScale() - 0.1)
-                    self.spriteRenderer.resize()
+            # Zoom the camera around the mouse with the mouse wheel and pan
+            # it by dragging with the middle mouse button, the level is only
+            # redrawn once the camera has stopped moving
+            if not self.paused and not self.mainMenu.open:
+                for renderer in (self.spriteRenderer, self.mapEditor):
+                    if not renderer.getRendering():
+                        continue
+
+                    camera = renderer.getCamera()
+                    # Zoom around where the mouse was when the wheel moved
+                    if e.type == pygame.MOUSEBUTTONDOWN and e.button in (4, 5):
+                        difference = self.renderer.getDifference()
+                        camera.zoomAt(
+                            1 if e.button == 4 else -1,
+                            (e.pos[0] - difference[0],
+                             e.pos[1] - difference[1]))
+
+                    elif e.type == pygame.MOUSEMOTION and e.buttons[1]:
+                        camera.pan(e.rel)
 
             # Make left click set the destination on the click manager instead
             if e.type == pygame.MOUSEBUTTONDOWN:
@@ -198,6 +215,8 @@ class Game:
             if self.dt >= 0.05:
                 continue
 
+            self.backgroundLoader.update()
+            self.tweenEngine.update(self.dt)
             self.__update()
             self.__draw()
 
@@ -229,7 +248,15 @@ class Game:
 
 
 if __name__ == "__main__":
+    # Show the surface pool reports when debugging it
+    logging.basicConfig(level=(
+        logging.INFO if config["graphics"]["surfacePool"]["debug"]
+        else logging.WARNING))
+
     g = Game()
     g.run()
     # cProfile.run('g.run()')
+
+    # Make sure everything has been saved before closing
+    saveWriter.flush()
     pygame.quit()
@@ -1,11 +1,13 @@
 # import pygame
 import copy
+import math
 import os
 from gridManager import *
 from node import *
 from menu import *
 from spriteRenderer import *
 from clickManager import *
+from editorHistory import *
 
 
 class MapEditor(SpriteRenderer):
@@ -15,15 +17,22 @@ class MapEditor(SpriteRenderer):
         # Hud for when the game is running
         self.hud = EditorHud(self.game)
         self.clickManager = EditorClickManager(self.game)
-        # Array to hold all the changes made to the map. TODO:
-        #   should this have a limit on the size
-        #   (otherwise it could get huge and be slow??)
-        self.levelChanges = []
-        self.poppedLevelChanges = []
+        # Holds all the changes made to the map, limited in size by the
+        # editor history settings in config
+        self.history = EditorHistory()
+
+        # How many edits have been started but not committed, whilst there
+        # are any all the changes are added to the history as one change
+        self.changeDepth = 0
         self.allowEdits = True
 
         self.connectionTypes = ["layer 1", "layer 2", "layer 3", "layer 4"]
 
+        # The node added to the empty position the mouse is over
+        self.hoveredNode = None
+        # The hovered and selected nodes when unused nodes were last removed
+        self.keptNodes = None
+
     def getSaved(self):
         return self.levelData["saved"]
 
@@ -36,87 +45,219 @@ class MapEditor(SpriteRenderer):
     def getClickManager(self):
         return self.clickManager
 
-    def getLevelChanges(self):
-        return self.levelChanges
-
-    def getPoppedLevelChanges(self):
-        return self.poppedLevelChanges
+    def getHistory(self):
+        return self.history
 
     def setAllowEdits(self, allowEdits):
         self.allowEdits = allowEdits
 
     def undoChange(self):
         if self.rendering:
-            if len(self.levelChanges) > 1:
-                popped = self.levelChanges.pop()
-                self.poppedLevelChanges.append(popped)
-                self.levelData = copy.deepcopy(self.levelChanges[-1])
+            ops = self.history.undo(self.levelData)
+            if ops:
+                self.applyChange(ops, True)
 
     def redoChange(self):
         if self.rendering:
-            if len(self.poppedLevelChanges) > 0:
-                popped = self.poppedLevelChanges.pop()
-                self.levelChanges.append(popped)
-                self.levelData = copy.deepcopy(popped)
+            ops = self.history.redo(self.levelData)
+            if ops:
+                self.applyChange(ops)
+
+    # Update the grid in place to match the level data after a change has
+    # been undone or redone, so the whole level doesn't have to be remade
+    def applyChange(self, ops, reverse=False):
+        # Resizing moves every node so the level has to be remade
+        if any(op[0] == "set" for op in ops):
+            self.createLevel(self.levelData, layer=self.currentLayer)
+            return
+
+        for layer in self.getGridLayers():
+            layer.beginBatch()
+
+        changedTransports = []
+        for op in (reversed(ops) if reverse else ops):
+            action, key, connectionType, index, value, prune = op
+            add = (action == "insert") != reverse
+            layer = self.getGridLayer(connectionType)
+
+            if key == "connections":
+                fromNode = layer.getNode(value[0])
+                toNode = layer.getNode(value[1])
+
+                if add:
+                    self.addGridConnection(
+                        layer, connectionType, fromNode, toNode)
+                else:
+                    for connection in layer.getGrid().getConnections():
+                        if (connection.getFrom() == fromNode
+                                and connection.getTo() == toNode):
+                            self.removeGridConnection(layer, connection)
+                            break
+
+            elif key == "stops" or key == "destinations":
+                if key == "stops":
+                    mappings = layer.getGrid().getEditorStopMappings()
+                else:
+                    mappings = layer.getGrid().getEditorDestinationMappings()
+
+                newNode = layer.getGrid().replaceNode(
+                    connectionType, layer.getNode(value["location"]),
+                    mappings[value["type"]] if add else EditorNode)
+                layer.addTempNode(newNode)
+
+            if connectionType not in changedTransports:
+                changedTransports.append(connectionType)
+
+        # Transports depend on the connections so are updated last
+        for connectionType in changedTransports:
+            self.updateTransports(connectionType)
+
+        for layer in self.getGridLayers():
+            layer.endBatch()
+
+        self.removeDuplicates()
+
+    # Add or remove transports so the layer matches the level data
+    def updateTransports(self, connectionType):
+        grid = self.getGridLayer(connectionType).getGrid()
+        mappings = grid.getTransportMappings()
+        transports = list(self.levelData["transport"].get(connectionType, []))
+
+        for transport in list(grid.getTransports()):
+            data = {
+                "location": transport.getCurrentNode().getNumber(),
+                "type": str(grid.reverseMappingsSearch(mappings, transport))}
+
+            if data in transports:
+                transports.remove(data)
+            else:
+                transport.getCurrentNode().removeTransport(transport)
+                grid.removeTransport(transport)
+
+        for transport in transports:
+            for connection in grid.getConnections():
+                if connection.getFrom().getNumber() == transport["location"]:
+                    grid.addTransport(
+                        connectionType, connection,
+                        mappings[transport["type"]], False)
+                    break
+
+    # Add a connection (both directions) between two nodes on a layer
+    def addGridConnection(self, layer, connectionType, fromNode, toNode):
+        newConnections = layer.getGrid().addConnections(
+            connectionType, fromNode, toNode)
+
+        # Only add the new connections to the nodes
+        layer.addConnections(newConnections)
+
+        # Only draw the new connection rather than every connection
+        for connection in newConnections:
+            layer.addConnectionLines(connection)
+            self.gridLayer4.addConnectionLines(connection)
+
+    # Remove a connection and its opposite connection from a layer, returns
+    # false if there is no opposite connection
+    def removeGridConnection(self, layer, connection):
+        connections = layer.getGrid().getOppositeConnection(connection)
 
+        if not connections:
+            return False
+
+        layer.getGrid().removeConnections(connections)
+        layer.removeConnections(connections)
+
+        for oppositeConnection in connections:
+            layer.removeConnectionLines(oppositeConnection)
+            self.gridLayer4.removeConnectionLines(oppositeConnection)
+
+        # The nodes of the connection may not be used anymore
+        self.keptNodes = None
+        return True
+
+    # Add all the changes made to the level data since the last change
+    # to the history, so they can be undone together
     def addChange(self):
-        change = copy.deepcopy(self.levelData)
-        self.levelChanges.append(change)
+        if self.changeDepth <= 0:
+            self.history.commit(self.levelData)
+
+    # Start a batch of edits, everything until the matching commitChange is
+    # added to the history as a single change and the lines are only
+    # redrawn once at the end
+    def beginChange(self):
+        self.changeDepth += 1
+
+        if self.changeDepth == 1:
+            for layer in self.getGridLayers():
+                layer.beginBatch()
 
-    def translateConnections(self, layer, oldMapPos, newMapPos):
-        if layer not in self.levelData["connections"]:
+    def commitChange(self):
+        if self.changeDepth <= 0:
             return
 
-        newConnections = []
-        for connection in self.levelData["connections"][layer]:
-            c1 = oldMapPos[connection[0]]
-            c2 = oldMapPos[connection[1]]
+        self.changeDepth -= 1
 
-            if c1 in newMapPos and c2 in newMapPos:
-                n1 = newMapPos[c1]
-                n2 = newMapPos[c2]
-                newConnections.append([n1, n2])
+        if self.changeDepth == 0:
+            for layer in self.getGridLayers():
+                layer.endBatch()
 
-        self.levelData["connections"][layer] = newConnections
+            self.history.commit(self.levelData)
 
-    def translateNodes(self, nodeType, layer, oldMapPos, newMapPos):
-        if layer not in self.levelData[nodeType]:
+    def getGridLayers(self):
+        return [
+            self.gridLayer1, self.gridLayer2, self.gridLayer3, self.gridLayer4]
+
+    # Return true if the node number is on a map of the given size
+    def isOnMap(self, number, size):
+        x, y = divmod(number, GridManager.keyStride)
+        return x < size[0] and y < size[1]
+
+    # Remove the connections of a layer which are no longer on the map
+    def translateConnections(self, levelData, layer, size):
+        if layer not in levelData["connections"]:
             return
 
-        for key, node in list(enumerate(self.levelData[nodeType][layer])):
-            n1 = oldMapPos[node["location"]]
-            if n1 in newMapPos:
-                n2 = newMapPos[n1]
-                node["location"] = n2
-            else:
-                del self.levelData[nodeType][layer][key]
+        levelData["connections"][layer] = [
+            connection for connection in levelData["connections"][layer]
+            if self.isOnMap(connection[0], size)
+            and self.isOnMap(connection[1], size)]
+
+    # Remove the nodes of a layer which are no longer on the map
+    def translateNodes(self, levelData, nodeType, layer, size):
+        if layer not in levelData[nodeType]:
+            return
+
+        levelData[nodeType][layer] = [
+            node for node in levelData[nodeType][layer]
+            if self.isOnMap(node["location"], size)]
 
     def setMapSize(self, size=(18, 10)):
         if not hasattr(self, 'levelData'):
             return
 
-        oldMapPos = GridManager.getMapValues(
-            self.levelData["width"], self.levelData["height"])
-        newMapPos = GridManager.getMapValues(size[0], size[1], True)
+        # Node numbers are based on their position on the grid rather
+        # than the size of the map, so resizing only has to remove the
+        # nodes which are now off the grid
+        size = (
+            min(size[0], GridManager.keyStride),
+            min(size[1], GridManager.keyStride))
 
-        self.translateConnections("layer 1", oldMapPos, newMapPos)
-        self.translateConnections("layer 2", oldMapPos, newMapPos)
-        self.translateConnections("layer 3", oldMapPos, newMapPos)
+        # Translate copies of the level so the resize can be undone
+        levelData = {
+            key: copy.deepcopy(self.levelData[key])
+            for key in ["connections", "transport", "stops", "destinations"]}
 
-        self.translateNodes("transport", "layer 1", oldMapPos, newMapPos)
-        self.translateNodes("transport", "layer 2", oldMapPos, newMapPos)
-        self.translateNodes("transport", "layer 3", oldMapPos, newMapPos)
+        for layer in ["layer 1", "layer 2", "layer 3"]:
+            self.translateConnections(levelData, layer, size)
 
-        self.translateNodes("stops", "layer 1", oldMapPos, newMapPos)
-        self.translateNodes("stops", "layer 2", oldMapPos, newMapPos)
-        self.translateNodes("stops", "layer 3", oldMapPos, newMapPos)
+            self.translateNodes(levelData, "transport", layer, size)
+            self.translateNodes(levelData, "stops", layer, size)
+            self.translateNodes(levelData, "destinations", layer, size)
 
-        self.translateNodes("destinations", "layer 1", oldMapPos, newMapPos)
-        self.translateNodes("destinations", "layer 2", oldMapPos, newMapPos)
-        self.translateNodes("destinations", "layer 3", oldMapPos, newMapPos)
+        levelData["width"] = size[0]
+        levelData["height"] = size[1]
 
-        self.levelData["width"] = size[0]
-        self.levelData["height"] = size[1]
+        for key, value in levelData.items():
+            self.history.set(self.levelData, key, value)
 
         self.addChange()
 
@@ -157,8 +298,7 @@ class MapEditor(SpriteRenderer):
 
         # Creating a new level
         if clearChanges:
-            self.levelChanges = [copy.deepcopy(self.levelData)]
-            self.poppedLevelChanges = []
+            self.history.clear(self.levelData)
 
         # load the level on a specific layer (for undoing / redoing changes)
         if layer is not None:
@@ -197,11 +337,10 @@ class MapEditor(SpriteRenderer):
             self.game.textHandler.getString().replace(" ", "_") + '.json')
         path = os.path.join(MAPSFOLDER, saveName)
 
-        with open(path, "w") as f:
-            json.dump(self.levelData, f)
+        saveWriter.write(path, self.levelData)
 
         config["maps"]["custom"][self.game.textHandler.getString()] = saveName
-        dump(config)
+        settings.changed()
 
         self.game.mapLoader.addMap(
             self.game.textHandler.getString(),
@@ -216,64 +355,65 @@ class MapEditor(SpriteRenderer):
 
     def deleteLevel(self):
         path = self.game.mapLoader.getMap(self.levelData["mapName"])
-        if os.path.exists(path):
+        if saveWriter.exists(path):
             # Delete the level
-            os.remove(path)
+            saveWriter.remove(path)
             self.game.mapLoader.removeMap(self.levelData["mapName"])
             self.game.mainMenu.updateMaps()
             del config["maps"]["custom"][self.levelData["mapName"]]
-            dump(config)
+            settings.changed()
 
     # given two nodes A & B, work out all intersecting child
     # connecting nodes along the parent connection between A & B
+    # by walking along the grid from A to B in the smallest whole step
     def getIntersetingConnections(self, layer, startNode, endNode):
-        distance = ((startNode.pos) - (endNode.pos)).length()
-        connections = []
-
-        for node in layer.getGrid().getNodes():
-            buffer = 0.1  # Radius around the line to include nodes within
-            d1 = (node.pos - startNode.pos).length()
-            d2 = (node.pos - endNode.pos).length()
+        grid = layer.getGrid()
+        startX, startY = grid.getNodeCoordinates(startNode.getNumber())
+        endX, endY = grid.getNodeCoordinates(endNode.getNumber())
+
+        # The number of grid points on the line (minus one) is the greatest
+        # common divisor of the change in x and y
+        steps = math.gcd(endX - startX, endY - startY)
+        if steps == 0:
+            return
 
-            if d1 + d2 >= distance - buffer and d1 + d2 <= distance + buffer:
-                connections.append(node)
+        stepX = (endX - startX) // steps
+        stepY = (endY - startY) // steps
 
-        return connections
+        for i in range(steps + 1):
+            # Empty positions on the editor grid are given a node here
+            yield layer.getNode(
+                grid.getNodeNumber(startX + stepX * i, startY + stepY * i))
 
+    # Preview the connection from the grid positions, nodes are only added
+    # to the empty positions it crosses once the connection is made
     def createTempConnection(self, connectionType, startNode, endNode):
         layer = self.getGridLayer(connectionType)
-        connections = self.getIntersetingConnections(layer, startNode, endNode)
-
-        for x in range(len(connections) - 1):
-            newConnections = layer.getGrid().addConnections(
-                connectionType, connections[x], connections[x + 1], True)
-
-            # Only add the new connections to the nodes
-            layer.addTempConnections(newConnections)
-            layer.createConnections()
+        layer.setPreview(startNode.getNumber(), endNode.getNumber())
 
     def createConnection(self, connectionType, startNode, endNode):
         layer = self.getGridLayer(connectionType)
-        connections = self.getIntersetingConnections(layer, startNode, endNode)
+        previousNode = None
+        self.beginChange()
 
-        for x in range(len(connections) - 1):
-            newConnections = layer.getGrid().addConnections(
-                connectionType, connections[x], connections[x + 1])
+        for node in self.getIntersetingConnections(layer, startNode, endNode):
+            if previousNode is None:
+                previousNode = node
+                continue
 
-            # Only add the new connections to the nodes
-            layer.addConnections(newConnections)
-            layer.createConnections()
+            self.addGridConnection(layer, connectionType, previousNode, node)
 
             # Add the new connection to the level data
-            connection = [
-                connections[x].getNumber(), connections[x + 1].getNumber()]
+            connection = [previousNode.getNumber(), node.getNumber()]
+            previousNode = node
 
-            if connection not in self.levelData["connections"].setdefault(
-                    connectionType, []):
-                self.levelData["connections"][connectionType].append(
-                    connection)
+            connections = self.levelData["connections"].get(connectionType, [])
+            if (connection not in connections
+                    and connection[::-1] not in connections):
+                self.history.insert(
+                    self.levelData, "connections", connectionType, connection)
 
-        self.addChange()
+        self.commitChange()
 
     def addTransport(self, connectionType, connection):
         layer = self.getGridLayer(connectionType)
@@ -284,7 +424,7 @@ class MapEditor(SpriteRenderer):
         if key in mappings:
             layer.getGrid().addTransport(  # False so the transports dont move
                 connectionType, connection, mappings[key], False)
-            self.levelData["transport"].setdefault(connectionType, []).append({
+            self.history.insert(self.levelData, "transport", connectionType, {
                 "location": connection.getFrom().getNumber(),
                 "type": str(key)
             })
@@ -303,7 +443,7 @@ class MapEditor(SpriteRenderer):
             newNode = layer.getGrid().replaceNode(
                 connectionType, node, mappings[key])
 
-            self.levelData["stops"].setdefault(connectionType, []).append({
+            self.history.insert(self.levelData, "stops", connectionType, {
                 "location": newNode.getNumber(), "type": str(key)})
 
         self.addChange()
@@ -318,8 +458,8 @@ class MapEditor(SpriteRenderer):
             newNode = layer.getGrid().replaceNode(
                 connectionType, node, mappings[key])
 
-            self.levelData["destinations"].setdefault(
-                connectionType, []).append({
+            self.history.insert(
+                self.levelData, "destinations", connectionType, {
                     "location": newNode.getNumber(), "type": str(key)})
 
         self.addChange()
@@ -333,9 +473,11 @@ class MapEditor(SpriteRenderer):
         if key:
             newNode = layer.getGrid().replaceNode(
                 connectionType, node, EditorNode)
+            layer.addTempNode(newNode)
 
-            self.levelData["destinations"][connectionType].remove({
-                "location": newNode.getNumber(), "type": str(key)})
+            self.history.delete(
+                self.levelData, "destinations", connectionType, {
+                    "location": newNode.getNumber(), "type": str(key)})
 
         self.addChange()
 
@@ -352,8 +494,9 @@ class MapEditor(SpriteRenderer):
             node.removeTransport(transport)
             layer.getGrid().removeTransport(transport)
 
-            self.levelData["transport"][connectionType].remove({
-                "location": node.getNumber(), "type": str(key)})
+            self.history.delete(
+                self.levelData, "transport", connectionType, {
+                    "location": node.getNumber(), "type": str(key)})
 
         self.addChange()
 
@@ -366,8 +509,9 @@ class MapEditor(SpriteRenderer):
         if key:
             newNode = layer.getGrid().replaceNode(
                 connectionType, node, EditorNode)
+            layer.addTempNode(newNode)
 
-            self.levelData["stops"][connectionType].remove({
+            self.history.delete(self.levelData, "stops", connectionType, {
                 "location": newNode.getNumber(),
                 "type": str(key)
             })
@@ -377,38 +521,63 @@ class MapEditor(SpriteRenderer):
     def deleteConnection(self, connectionType, connection):
         layer = self.getGridLayer(connectionType)
 
-        connections = layer.getGrid().getOppositeConnection(connection)
-
-        if connections:
-            layer.getGrid().removeConnections(connections)
-            layer.removeConnections(connections)
-
-            self.levelData["connections"][connectionType].remove(
-                [
+        if self.removeGridConnection(layer, connection):
+            # Prune the layer from the level if it has no connections left
+            self.history.delete(
+                self.levelData, "connections", connectionType, [
                     connection.getFrom().getNumber(),
-                    connection.getTo().getNumber()])
-
-            if len(self.levelData["connections"][connectionType]) <= 0:
-                del self.levelData["connections"][connectionType]
+                    connection.getTo().getNumber()], True)
             self.addChange()
         else:
             return
 
     def removeAllTempConnections(self, connectionType):
-        layer = self.getGridLayer(connectionType)
-
-        layer.removeTempConnections()
-        layer.getGrid().removeTempConnections()
-        layer.createConnections()
+        self.getGridLayer(connectionType).removePreview()
 
     def updateConnection(self, layer, group):
         if self.currentLayer == layer:
             for connection in group.getGrid().getConnections():
                 connection.update()
 
+    # Add a node to the empty position the mouse is over, so it can
+    # be hovered over and clicked on like any other node
+    def addHoveredNode(self):
+        self.hoveredNode = None
+
+        if self.currentLayer == 4 or not self.allowEdits:
+            return
+
+        layer = self.getGridLayer("layer " + str(self.currentLayer))
+        number = layer.getNumberAt(self.getMousePos())
+
+        if number is not None:
+            self.hoveredNode = layer.getNode(number)
+
+    # Remove the nodes that were only added whilst they were being used
+    def removeUnusedNodes(self):
+        if self.currentLayer == 4:
+            return
+
+        keepNodes = (
+            self.hoveredNode, self.clickManager.getStartNode(),
+            self.clickManager.getEndNode(), self.clickManager.getTempEndNode())
+
+        # Only check for unused nodes when the hovered or selected nodes
+        # have changed, since that is when a node stops being used
+        if keepNodes == self.keptNodes:
+            return
+        self.keptNodes = keepNodes
+
+        for layer in [self.gridLayer1, self.gridLayer2, self.gridLayer3]:
+            # Check again next frame if the mouse was still over a node
+            if not layer.removeUnusedNodes(keepNodes):
+                self.keptNodes = None
+
     def update(self):
         if self.rendering:
+            self.addHoveredNode()
             self.allSprites.update()
+            self.removeUnusedNodes()
 
             # if there is a click and a connection is not set,
             # then remove the start node
@@ -11,18 +11,15 @@ def hoverColor(obj, menu, event, color = None):
         obj.setColor(color)
 
 
-# hover over the object and add a hover animation
+# hover over the object and slide it across, the speed is in 100s of pixels a second
 def hoverOver(obj, menu, event, speed = 1, x = 110, color = Color("white")):
-    if hoverOverAnimation not in obj.getAnimations():
-        obj.addAnimation(hoverOverAnimation, 'onMouseOver', speed = speed, x = x)
+    menu.game.tweenEngine.tween(obj, "x", x, abs(x - obj.x) / (speed * 100), "easeOut")
     obj.setColor(color)
 
 
-# remove the hover over animation on mouse out
+# slide the object back on mouse out, replacing the hover over slide
 def hoverOut(obj, menu, event, speed = 1, x = 100, color = BLACK):
-    if hoverOverAnimation in obj.getAnimations():
-        obj.removeAnimation(hoverOverAnimation)
-    obj.addAnimation(hoverOutAnimation, 'onMouseOut', speed = speed, x = x)
+    menu.game.tweenEngine.tween(obj, "x", x, abs(x - obj.x) / (speed * 100), "easeOut")
     obj.setColor(color)
 
 
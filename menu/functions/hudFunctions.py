@@ -37,6 +37,11 @@ def pauseGame(obj, menu, event):
     menu.togglePauseGame(True)
 
 
+# Move the camera to the part of the level clicked on the minimap
+def panToMinimap(obj, menu, event):
+    menu.game.spriteRenderer.getCamera().centreOn(obj.getDrawnPoint(menu.game.inputHandler.getMousePos()))
+
+
 #### Editor Hud Function ####
 
 def closeMapEditor(obj, menu, event):
@@ -187,10 +192,12 @@ def saveMap(obj, menu, event):
 
 def toggleEditSizeDropdown(obj, menu, event):
     if not menu.editSizeDropdownOpen:
+        menu.game.textHandler.setActive(True)
         generalFunctions.clearMenu(obj, menu)
         menu.editDropdown()
         menu.editSizeDropdown()
     else:
+        menu.game.textHandler.setActive(False)
         generalFunctions.clearMenu(obj, menu)
         menu.editDropdown()
 
@@ -228,47 +235,31 @@ def toggleAddDestinationDropdown(obj, menu, event):
         menu.addDropdown()
 
 
-# Setting the different map sizes
-def setSize0(obj, menu, event):
-    menu.game.mapEditor.setMapSize((16, 9))
-
-    level = menu.game.mapEditor.getLevelData()
-    menu.game.mapEditor.createLevel(level) #reload the level
-    generalFunctions.clearMenu(obj, menu)
-    
-
-def setSize1(obj, menu, event):
-    menu.game.mapEditor.setMapSize((18, 10))
+# Set the map to a size and reload the level
+def setSize(obj, menu, event, size):
+    menu.game.textHandler.setActive(False)
+    menu.game.mapEditor.setMapSize(size)
 
     level = menu.game.mapEditor.getLevelData()
     menu.game.mapEditor.createLevel(level) #reload the level
     generalFunctions.clearMenu(obj, menu)
 
 
-def setSize2(obj, menu, event):
-    menu.game.mapEditor.setMapSize((20, 11))
-
-    level = menu.game.mapEditor.getLevelData()
-    menu.game.mapEditor.createLevel(level) #reload the level
-    generalFunctions.clearMenu(obj, menu)
-
-    
+# Set the map to the size typed into the size input, as a width and height (i.e 30 x 15)
+def setCustomSize(obj, menu, event):
+    width, _, height = menu.game.textHandler.getString().replace(" ", "").lower().partition("x")
 
-def setSize3(obj, menu, event):
-    menu.game.mapEditor.setMapSize((22, 12))
+    if not width.isdigit() or not height.isdigit() or int(width) <= 0 or int(height) <= 0:
+        menu.sizeInputBox.setColor(RED)
+        menu.sizeInputBox.dirty = True
+        menu.game.mapEditor.getMessageSystem().addMessage("Map size must be a width and height, i.e 30 x 15!")
+    else:
+        setSize(obj, menu, event, (int(width), int(height)))
 
-    level = menu.game.mapEditor.getLevelData()
-    menu.game.mapEditor.createLevel(level) #reload the level
-    generalFunctions.clearMenu(obj, menu)
-    
 
 def undoChange(obj, menu, event):
     menu.game.mapEditor.undoChange()
 
-    level = menu.game.mapEditor.getLevelData()
-    layer = menu.game.mapEditor.getLayer()
-    menu.game.mapEditor.createLevel(level, layer = layer) #reload the level
-
     # change the color of the undo / redo buttons
     generalFunctions.clearMenu(obj, menu)
     menu.editDropdown()
@@ -277,10 +268,6 @@ def undoChange(obj, menu, event):
 def redoChange(obj, menu, next):
     menu.game.mapEditor.redoChange()
 
-    level = menu.game.mapEditor.getLevelData()
-    layer = menu.game.mapEditor.getLayer()
-    menu.game.mapEditor.createLevel(level, layer = layer) #reload the level
-
     # change the color of the undo / redo buttons
     generalFunctions.clearMenu(obj, menu)
     menu.editDropdown()
@@ -24,13 +24,9 @@ def continueGame(obj, menu, event):
 
 
 def openLevelSelect(obj, menu, event):
-    def callback(obj, menu, animation):
-        obj.y = 0
-
-        if obj.rect.y == 0:
-            obj.removeAnimation(animation)
-            menu.close()
-            menu.levelSelect(True)
+    def callback(obj, menu):
+        menu.close()
+        menu.levelSelect(True)
 
     # menu.slideTransitionY((0, config["graphics"]["displayHeight"]), 'first', callback = callback)
     menu.slideTransitionY((0, -config["graphics"]["displayHeight"]), 'first', speed = 40, callback = callback, direction = 'down')
@@ -39,30 +35,22 @@ def openLevelSelect(obj, menu, event):
 
 # Navigate back to the main page of the main menu (from within the main menu itself)
 def openMainMenu(obj, menu, event):
-    def callback(obj, menu, animation):
-        obj.y = 0
-
-        if obj.rect.y == 0:
-            obj.removeAnimation(animation)
-            menu.close()
-            menu.main(True)
+    def callback(obj, menu):
+        menu.close()
+        menu.main(True)
 
     menu.slideTransitionY((0, -config["graphics"]["displayHeight"]), 'first', speed = 40, callback = callback, direction = 'down')
 
 
 # load the map editor and show transition
 def openMapEditor(obj, menu, event):
-    def callback(obj, menu, animation):
-        obj.y = 0
-
-        if obj.rect.y == 0:
-            obj.removeAnimation(animation)
-            menu.game.paused = False
-            menu.game.mapEditor.createLevel(clearChanges = True)
-            menu.game.mapEditor.setRendering(True, True) #Load the hud
-            hudFunctions.addConnection(obj, menu, event) # default option to add connection
-            menu.levelSelectOpen = False
-            menu.close()
+    def callback(obj, menu):
+        menu.game.paused = False
+        menu.game.mapEditor.createLevel(clearChanges = True)
+        menu.game.mapEditor.setRendering(True, True) #Load the hud
+        hudFunctions.addConnection(obj, menu, event) # default option to add connection
+        menu.levelSelectOpen = False
+        menu.close()
 
     menu.slideTransitionY((0, config["graphics"]["displayHeight"]), 'first', callback = callback)
 
@@ -75,15 +63,11 @@ def loadLevel(obj, menu, event, level):
     global levelName
     levelName = level
 
-    def callback(obj, menu, animation):
-        obj.y = 0
-
-        if obj.rect.y == 0:
-            obj.removeAnimation(animation)
-            menu.game.spriteRenderer.createLevel(levelName)
-            menu.game.spriteRenderer.setRendering(True, True) #Load the hud
-            menu.levelSelectOpen = False
-            menu.close()
+    def callback(obj, menu):
+        menu.game.spriteRenderer.createLevel(levelName)
+        menu.game.spriteRenderer.setRendering(True, True) #Load the hud
+        menu.levelSelectOpen = False
+        menu.close()
 
     menu.slideTransitionY((0, config["graphics"]["displayHeight"]), 'first', callback = callback)
 
@@ -95,11 +79,11 @@ def unlockLevel(obj, menu, event, level):
         return 
     
     if config["player"]["keys"] >= level.getLevelData()["locked"]["unlock"]:
-        menu.game.audioLoader.playSound("uiSuccess", 0)
+        menu.game.audioLoader.playSound("uiSuccess")
         config["player"]["keys"] -= level.getLevelData()["locked"]["unlock"]
         level.getLevelData()["locked"]["isLocked"] = False
         menu.game.mapLoader.saveMap(level.getLevelData()["mapName"], level.getLevelData())
-        dump(config)
+        settings.changed()
 
         # if successful update menu
         menu.keyText.setText(str(config["player"]["keys"]))
@@ -109,7 +93,7 @@ def unlockLevel(obj, menu, event, level):
         menu.keyText.dirty = True
 
     else:
-        menu.game.audioLoader.playSound("uiError", 0)
+        menu.game.audioLoader.playSound("uiError")
 
 
 # Move the level scroller foward by one level
@@ -117,12 +101,11 @@ def levelForward(obj, menu, event):
     if not menu.getTransitioning() and menu.increaseCurrentLevel():
         menu.setLevelsClickable()
 
-        def callback(obj, menu, x):
-            obj.x = x
+        def callback(obj, menu):
             menu.setTransitioning(False)
 
         for index, level in menu.getLevels().items():
-            level.addAnimation(transitionX, 'onLoad', speed = -30, transitionDirection = "right", x = level.x - (menu.levelWidth + menu.spacing), callback = callback)
+            menu.game.tweenEngine.tween(level, "x", level.x - (menu.levelWidth + menu.spacing), menu.levelSlideTime, "easeOut", callback)
         menu.setTransitioning(True)
 
 
@@ -131,12 +114,11 @@ def levelBackward(obj, menu, event):
     if not menu.getTransitioning() and menu.decreaseCurrentLevel():
         menu.setLevelsClickable()
 
-        def callback(obj, menu, x):
-            obj.x = x
+        def callback(obj, menu):
             menu.setTransitioning(False)
 
         for index, level in menu.getLevels().items():
-            level.addAnimation(transitionX, 'onLoad', speed = 30, transitionDirection = "left", x = level.x + (menu.levelWidth + menu.spacing), callback = callback)
+            menu.game.tweenEngine.tween(level, "x", level.x + (menu.levelWidth + menu.spacing), menu.levelSlideTime, "easeOut", callback)
         menu.setTransitioning(True)
 
 
@@ -150,34 +132,26 @@ def closeGame(obj, menu, event):
 
 # Exit the game and return to the main menu with transition
 def showMainMenu(obj, menu, event):
-    def callback(obj, menu, animation):
-        obj.y = 0
-
-        if obj.rect.y == 0:
-            obj.removeAnimation(animation)
-            menu.game.paused = True
-            menu.game.spriteRenderer.setRendering(False) # Always close the Game
-            menu.game.mapEditor.setRendering(False) # Always close the Editor
-            menu.game.textHandler.setActive(False) # Always close any open inputs
-            menu.game.mainMenu.main(True)
-            menu.close()
+    def callback(obj, menu):
+        menu.game.paused = True
+        menu.game.spriteRenderer.setRendering(False) # Always close the Game
+        menu.game.mapEditor.setRendering(False) # Always close the Editor
+        menu.game.textHandler.setActive(False) # Always close any open inputs
+        menu.game.mainMenu.main(True)
+        menu.close()
 
     menu.slideTransitionY((0, -config["graphics"]["displayHeight"]), 'first', speed = 40, callback = callback, direction = 'down')
 
 
 # Exit the game and return to the level selection screen with transition
 def showLevelSelect(obj, menu, event):
-    def callback(obj, menu, animation):
-        obj.y = 0
-
-        if obj.rect.y == 0:
-            obj.removeAnimation(animation)
-            menu.game.paused = True
-            menu.game.spriteRenderer.setRendering(False) # Always close the Game
-            menu.game.mapEditor.setRendering(False) # Always close the Editor
-            menu.game.textHandler.setActive(False) # Always close any open inputs
-            menu.game.mainMenu.levelSelect(True)
-            menu.close()
+    def callback(obj, menu):
+        menu.game.paused = True
+        menu.game.spriteRenderer.setRendering(False) # Always close the Game
+        menu.game.mapEditor.setRendering(False) # Always close the Editor
+        menu.game.textHandler.setActive(False) # Always close any open inputs
+        menu.game.mainMenu.levelSelect(True)
+        menu.close()
 
     menu.slideTransitionY((0, -config["graphics"]["displayHeight"]), 'first', speed = 40, callback = callback, direction = 'down')
     menu.loadingScreen()
@@ -215,7 +189,7 @@ def toggleAlias(obj, menu, event):
 
     obj.setText("AntiAliasing: " + text)
 
-    dump(config)
+    settings.changed()
 
 
 # Toggle fullscreen in the graphics menu
@@ -230,7 +204,7 @@ def toggleFullscreen(obj, menu, event):
     obj.setText("Fullscreen: " + text)
 
     config["graphics"]["fullscreen"] = menu.game.fullscreen
-    dump(config)
+    settings.changed()
 
 
 # Toggle scanlines effect on and off in the graphics menu
@@ -242,7 +216,7 @@ def toggleScanlines(obj, menu, event):
 
     obj.setText("Scanlines: " + text)
 
-    dump(config)
+    settings.changed()
 
 
 # Toggle between smooth and harsh scaling
@@ -254,8 +228,7 @@ def toggleScalingMode(obj, menu, event):
 
     obj.setText("Scaling: " + text)
 
-    dump(config)
-    menu.renderer.setScale((menu.renderer.getWindowWidth(), menu.renderer.getWindowHeight()), menu.game.fullscreen)
+    settings.changed()
 
 
 # Toggle vsync between on and off
@@ -267,6 +240,4 @@ def toggleVsync(obj, menu, event):
     obj.setText("Vsync: " + text)
 
     config["graphics"]["vsync"] = menu.game.vsync
-    dump(config)
-
-    menu.renderer.setScale((menu.renderer.getWindowWidth(), menu.renderer.getWindowHeight()), menu.game.fullscreen)
\ No newline at end of file
+    settings.changed()
\ No newline at end of file
@@ -20,6 +20,7 @@ class Menu:
         self.game = game
         self.renderer = game.renderer
         self.components = [] # Components to render to the screen
+        self.interactive = None # Components with events or animations, None when they need to be found again
 
         self.clicked = False
 
@@ -40,14 +41,29 @@ class Menu:
 
     def add(self, component):
         self.components.append(component)
+        self.resetInteractive()
 
 
     def remove(self, obj):
         if obj in self.components:
+            self.game.tweenEngine.cancel(obj)
             self.components.remove(obj)
+            self.resetInteractive()
             del obj
 
 
+    # The components, or their events or animations, have changed so the components with them are found again before they are next used
+    def resetInteractive(self):
+        self.interactive = None
+
+
+    # Return the components on the menu which have events or animations, in the order they were added
+    def getInteractive(self):
+        if self.interactive is None:
+            self.interactive = [component for component in self.components if len(component.events) > 0 or len(component.animations) > 0]
+        return self.interactive
+
+
     def clickButton(self):  
         click = random.randint(1, 2)
         self.game.audioLoader.playSound("click%i" % click)    
@@ -61,14 +77,33 @@ class Menu:
                 component.resizeIndicator()
                 
 
+    # Return the components under a position which have events or animations, as only they need to know what the mouse is over
+    def getComponentsAt(self, pos):
+        hits = set()
+        for component in self.getInteractive():
+            component.hitTest(pos, hits)
+        return hits
+
+
     def display(self):  
-        for component in list(self.components): # we use list so we can delete from the array whilst looping through it (without causing flicking with double blits)
+        components = list(self.components) # we use list so we can delete from the array whilst looping through it (without causing flicking with double blits)
+        for component in components:
             component.draw()
 
-            # only if the menu is open do we want to allow for interactions
-            if self.open:
-                self.events(component)
-                self.animate(component)
+        # only if the menu is open do we want to allow for interactions
+        if not self.open:
+            return
+
+        # Find what the mouse is over once for the whole tree, instead of every event checking it
+        hits = self.getComponentsAt(self.game.inputHandler.getMousePos())
+
+        # Only the components added to the menu have their events and animations run, not the components drawn on them
+        for component in self.getInteractive():
+            if not self.open:
+                return
+
+            self.events(component, hits)
+            self.animate(component)
 
 
     def animate(self, component):
@@ -88,30 +123,26 @@ class Menu:
                         # component.dirty = True
 
 
-    def events(self, component):
-        mx, my = pygame.mouse.get_pos()
-        difference = self.renderer.getDifference()
-        mx -= difference[0]
-        my -= difference[1]
-
+    # Hits are the components the mouse is over
+    def events(self, component, hits):
         if hasattr(component, 'rect'): # check the component has been drawn (if called before next tick)
             if len(component.events) > 0:
                 for e in list(component.events):
                     if e['event'] == 'onMouseClick':
-                        if component.rect.collidepoint((mx, my)) and self.game.clickManager.getClicked():
+                        if component in hits and self.game.clickManager.getClicked():
                             self.clickButton()
                             self.game.clickManager.setClicked(False)
                             e['function'](component, self, e, **e['kwargs'])
                             # component.dirty = True
 
                     if e['event'] == 'onMouseOver':
-                        if component.rect.collidepoint((mx, my)) and not component.mouseOver:
+                        if component in hits and not component.mouseOver:
                             component.mouseOver = True
                             e['function'](component, self, e, **e['kwargs'])
                             component.dirty = True
 
                     if e['event'] == 'onMouseOut':
-                        if not component.rect.collidepoint((mx, my)) and component.mouseOver:
+                        if component not in hits and component.mouseOver:
                             component.mouseOver = False
                             e['function'](component, self, e, **e['kwargs'])
                             component.dirty = True
@@ -134,9 +165,11 @@ class Menu:
 
 
     def close(self):
+        self.game.tweenEngine.cancelMenu(self)
         for component in self.components:
             del component
         self.components = []
+        self.resetInteractive()
         self.open = False
 
 
@@ -148,33 +181,63 @@ class Menu:
         self.add(test)
 
 
+    # Slide a black screen over the menu (the first half) or off the menu (the second half), the speed is in 100s of pixels a second
     def slideTransitionY(self, pos, half, speed = -40, callback = None, direction = 'up'):
         transition = Rectangle(self, TRUEBLACK, (config["graphics"]["displayWidth"], config["graphics"]["displayHeight"]), pos)
-        transition.addAnimation(slideTransitionY, 'onLoad', speed = speed, half = half, callback = callback, transitionDirection = direction)
+
+        if half == 'first':
+            y = 0
+        else:
+            y = -transition.height if direction == 'up' else config["graphics"]["displayHeight"]
+
+        self.game.tweenEngine.tween(transition, "y", y, abs(y - transition.y) / abs(speed * 100), callback = callback)
         self.add(transition)
 
 
     def slideTransitionX(self, pos, half, speed = -70, callback = None):
         transition = Rectangle(self, TRUEBLACK, (config["graphics"]["displayWidth"], config["graphics"]["displayHeight"]), pos)
-        transition.addAnimation(slideTransitionX, 'onLoad', speed = speed, half = half, callback = callback)
+        x = 0 if half == 'first' else config["graphics"]["displayWidth"]
+
+        self.game.tweenEngine.tween(transition, "x", x, abs(x - transition.x) / abs(speed * 100), callback = callback)
         self.add(transition)
 
 
     def loadingScreen(self):
         self.loadingImage.setImageName("loading1")
         self.loadingImage.dirty = True
+        self.loadingTimer = 0
         loadingText = Label(self, "Loading", 30, Color("white"), (config["graphics"]["displayWidth"] / 2 - 58, config["graphics"]["displayHeight"] / 2 + 45))
 
+        # Progress bar and how many items and bytes have loaded
+        self.loadingBarWidth = 200
+        loadingBarBackground = Rectangle(self, Color("white"), (self.loadingBarWidth + 4, 12), (config["graphics"]["displayWidth"] / 2 - (self.loadingBarWidth / 2) - 2, config["graphics"]["displayHeight"] / 2 + 85), shapeOutline = 1)
+        self.loadingBar = Rectangle(self, Color("white"), (0, 8), (config["graphics"]["displayWidth"] / 2 - (self.loadingBarWidth / 2), config["graphics"]["displayHeight"] / 2 + 87))
+        self.loadingProgress = Label(self, "", 15, Color("white"), (config["graphics"]["displayWidth"] / 2 - (self.loadingBarWidth / 2), config["graphics"]["displayHeight"] / 2 + 105))
+
         self.add(self.loadingImage)
         self.add(loadingText)
+        self.add(loadingBarBackground)
+        self.add(self.loadingBar)
+        self.add(self.loadingProgress)
 
 
-    def updateLoadingScreen(self):
-        if self.loadingImage.getImageName() == "loading1":
-            self.loadingImage.setImageName("loading2")
-        else:
-            self.loadingImage.setImageName("loading1")
-        self.loadingImage.dirty = True  
+    # Show how much the background loader has loaded, called every frame whilst it is loading
+    def updateLoadingScreen(self, loader):
+        self.loadingTimer += self.game.dt
+        if self.loadingTimer >= 0.25:
+            self.loadingTimer = 0
+            self.loadingImage.setImageName("loading2" if self.loadingImage.getImageName() == "loading1" else "loading1")
+            self.loadingImage.dirty = True
+
+        width = int(self.loadingBarWidth * loader.getProgress())
+        if width != self.loadingBar.width:
+            self.loadingBar.setSize((width, self.loadingBar.height))
+            self.loadingBar.dirty = True
+
+        text = str(loader.getDone()) + " / " + str(loader.getTotal()) + "  (" + str(loader.getBytesRead() // 1024) + " / " + str(loader.getBytesTotal() // 1024) + " KB)"
+        if text != self.loadingProgress.getText():
+            self.loadingProgress.setText(text)
+            self.loadingProgress.dirty = True
 
 
 class MainMenu(Menu):
@@ -189,6 +252,7 @@ class MainMenu(Menu):
         self.levelWidth = config["graphics"]["displayWidth"] - (config["graphics"]["displayWidth"] / scaler)
         self.levelHeight = config["graphics"]["displayHeight"] - (config["graphics"]["displayHeight"] / scaler)
         self.spacing = 20
+        self.levelSlideTime = 0.28 # how long it takes to slide to the next level, in seconds
 
         self.transitioning = False
 
@@ -287,8 +351,7 @@ class MainMenu(Menu):
 
         if transition:
             # set the up transition
-            def callback(obj, menu, animation):
-                obj.removeAnimation(animation)
+            def callback(obj, menu):
                 menu.remove(obj)
         
             self.slideTransitionY((0, 0), 'second', speed = 40, callback = callback, direction = 'down')
@@ -308,26 +371,23 @@ class MainMenu(Menu):
         return False
 
 
-    def createLevel(self, levelInt, offset):
+    # Create the level and draw its thumbnail, it is added to the menu once every level has loaded
+    def createLevel(self, levelInt, offset, levelData = None):
         if levelInt >= 0 and levelInt < len(self.maps):
-            level = Map(self, self.maps[levelInt], levelInt, (self.levelWidth, self.levelHeight), ((config["graphics"]["displayWidth"] - self.levelWidth) / 2 + offset, (config["graphics"]["displayHeight"] - self.levelHeight) / 2))
-            self.add(level)
-            self.levels[levelInt] = level        
-
-            # Update the loading screen when the level has loaded
-            self.updateLoadingScreen()
+            level = Map(self, self.maps[levelInt], levelInt, (self.levelWidth, self.levelHeight), ((config["graphics"]["displayWidth"] - self.levelWidth) / 2 + offset, (config["graphics"]["displayHeight"] - self.levelHeight) / 2), levelData)
+            level.makeSurface()
+            self.levels[levelInt] = level
 
 
     def levelForward(self):
         if not self.getTransitioning() and self.increaseCurrentLevel():
             self.setLevelsClickable()
 
-            def callback(obj, menu, x):
-                obj.x = x
+            def callback(obj, menu):
                 menu.setTransitioning(False)
 
             for index, level in self.getLevels().items():
-                level.addAnimation(transitionX, 'onLoad', speed = -30, transitionDirection = "right", x = level.x - (self.levelWidth + self.spacing), callback = callback)
+                self.game.tweenEngine.tween(level, "x", level.x - (self.levelWidth + self.spacing), self.levelSlideTime, "easeOut", callback)
             self.setTransitioning(True)
 
 
@@ -335,12 +395,11 @@ class MainMenu(Menu):
         if not self.getTransitioning() and self.decreaseCurrentLevel():
             self.setLevelsClickable()
 
-            def callback(obj, menu, x):
-                obj.x = x
+            def callback(obj, menu):
                 menu.setTransitioning(False)
 
             for index, level in self.getLevels().items():
-                level.addAnimation(transitionX, 'onLoad', speed = 30, transitionDirection = "left", x = level.x + (self.levelWidth + self.spacing), callback = callback)
+                self.game.tweenEngine.tween(level, "x", level.x + (self.levelWidth + self.spacing), self.levelSlideTime, "easeOut", callback)
             self.setTransitioning(True)
 
 
@@ -416,44 +475,52 @@ class MainMenu(Menu):
         levelNext.addEvent(levelForward, 'onMouseClick')
         levelBack.addEvent(levelBackward, 'onMouseClick')
 
-        self.add(self.levelComplete)
-        self.add(self.levelCompleteText)
-        self.add(mainMenu)
-        self.add(mainMenuText)
-        self.add(custom)
-        self.add(customText)
-        self.add(key)
-        self.add(keyTextBackground)
-        self.add(self.keyText)
-        self.add(levelNext)
-        self.add(levelBack)
+        components = [self.levelComplete, self.levelCompleteText, mainMenu, mainMenuText, custom, customText, key, keyTextBackground, self.keyText, levelNext, levelBack]
 
+        # Load the menu in the background behind the loading screen: the map files are read by the loader's workers,
+        # then the components are drawn and the level thumbnails are created a few each frame
+        self.loadingScreen()
+        loader = self.game.backgroundLoader
 
-        #### Adds the maps after eveything else in the menu has been loaded
+        for component in components:
+            loader.addJob(component.makeSurface)
 
         # Load levels before current level
         for i, level in enumerate(reversed(self.maps[:self.currentLevel])):
-            self.createLevel(self.currentLevel - (i + 1), -((self.levelWidth + self.spacing) * (i +1)))
+            loader.addJob(self.createLevel, self.currentLevel - (i + 1), -((self.levelWidth + self.spacing) * (i +1)), loader.readFile(self.game.mapLoader.getMap(level)))
         
         # Load current level and levels after current level
         for i, level in enumerate(self.maps[self.currentLevel:]):
-            self.createLevel(self.currentLevel + i, (self.levelWidth + self.spacing) * i)
+            loader.addJob(self.createLevel, self.currentLevel + i, (self.levelWidth + self.spacing) * i, loader.readFile(self.game.mapLoader.getMap(level)))
 
-        self.setLevelsClickable()
+        def finish():
+            # Swap the loading screen for the level select
+            for component in list(self.components):
+                self.remove(component)
 
+            for component in components:
+                self.add(component)
 
-        if transition:
-            # set the up transition
-            def callback(obj, menu, animation):
-                obj.removeAnimation(animation)
-                menu.remove(obj)
-        
-            self.slideTransitionY((0, 0), 'second', callback = callback)
+            #### Adds the maps after eveything else in the menu has been loaded
+            for index in sorted(self.levels):
+                self.add(self.levels[index])
+
+            self.setLevelsClickable()
+
+            if transition:
+                # set the up transition
+                def callback(obj, menu):
+                    menu.remove(obj)
+            
+                self.slideTransitionY((0, 0), 'second', callback = callback)
+
+        loader.start(finish, self.updateLoadingScreen)
 
 
 class OptionMenu(Menu):
     def __init__(self, renderer):
         super().__init__(renderer)
+        self.slideTime = 0.18 # how long the menu takes to slide on and off the screen, in seconds
 
 
     def closeTransition(self):
@@ -461,13 +528,13 @@ class OptionMenu(Menu):
         # self.game.mapEditor.getMessageSystem().setOpen(True)
         self.game.mapEditor.getHud().setOpen(True)
 
-        def callback(obj, menu, y):
+        def callback(obj, menu):
             menu.game.paused = False
             menu.close()
 
         for component in self.components:
-            if transitionY not in component.getAnimations():
-                component.addAnimation(transitionY, 'onLoad', speed = -40, transitionDirection = "up", y = -config["graphics"]["displayHeight"], callback = callback)
+            if not self.game.tweenEngine.isTweening(component, "y"):
+                self.game.tweenEngine.tween(component, "y", -config["graphics"]["displayHeight"], self.slideTime, "easeIn", callback)
 
 
     def main(self, pausedSurface = True, transition = False):
@@ -518,13 +585,10 @@ class OptionMenu(Menu):
         self.add(close)
 
         if transition:
-            def callback(obj, menu, y):
-                obj.y = y
-
             for component in self.components:
                 y = component.y
                 component.setPos((component.x, component.y - config["graphics"]["displayHeight"]))
-                component.addAnimation(transitionY, 'onLoad', speed = 40, transitionDirection = 'down', y = y, callback = callback)
+                self.game.tweenEngine.tween(component, "y", y, self.slideTime, "easeOut")
 
 
     def options(self):
@@ -609,6 +673,7 @@ class OptionMenu(Menu):
 class GameMenu(Menu):
     def __init__(self, renderer):
         super().__init__(renderer)
+        self.slideTime = 0.18 # how long the end screens take to slide onto the screen, in seconds
         self.startScreenOpen = False
         self.endScreenOpen = False
 
@@ -617,14 +682,14 @@ class GameMenu(Menu):
         self.game.audioLoader.playSound("swoopOut")
         self.game.spriteRenderer.getHud().setOpen(True)
 
-        def callback(obj, menu, x):
+        def callback(obj, menu):
             menu.game.paused = False
             menu.game.spriteRenderer.getHud().slideHudIn()
             menu.game.spriteRenderer.gridLayer2.createPerson(menu.game.spriteRenderer.getAllDestination()) # add the first player
             menu.close()
 
         for component in self.components:
-            component.addAnimation(transitionX, 'onLoad', speed = -40, transitionDirection = "right", x = -400, callback = callback)
+            self.game.tweenEngine.tween(component, "x", -400, abs(-400 - component.x) / 4000, "easeIn", callback)
 
 
     # Anything used by both the completed and game over end screens
@@ -684,13 +749,10 @@ class GameMenu(Menu):
 
 
         if transition:
-            def callback(obj, menu, y):
-                obj.y = y
-
             for component in self.components:
                 y = component.y
                 component.setPos((component.x, component.y - config["graphics"]["displayHeight"]))
-                component.addAnimation(transitionY, 'onLoad', speed = 40, transitionDirection = 'down', y = y, callback = callback)
+                self.game.tweenEngine.tween(component, "y", y, self.slideTime, "easeOut")
 
             self.game.audioLoader.playSound("swoopIn")    
 
@@ -741,8 +803,7 @@ class GameMenu(Menu):
         self.add(retry)
 
         if transition:
-            def callback(obj, menu, y):
-                obj.y = y
+            def callback(obj, menu):
                 if menu.keyDifference > 0:
                     menu.keyText.addAnimation(increaseKeys, 'onLoad')
                     menu.keyTextDifference.addAnimation(decreaseKeys, 'onLoad')
@@ -754,7 +815,7 @@ class GameMenu(Menu):
             for component in self.components:
                 y = component.y
                 component.setPos((component.x, component.y - config["graphics"]["displayHeight"]))
-                component.addAnimation(transitionY, 'onLoad', speed = 40, transitionDirection = 'down', y = y, callback = callback)
+                self.game.tweenEngine.tween(component, "y", y, self.slideTime, "easeOut", callback)
     
             self.game.audioLoader.playSound("swoopIn")    
 
@@ -781,12 +842,9 @@ class GameMenu(Menu):
         play = Label(self, "Got it!", 25, Color("white"), (((config["graphics"]["displayWidth"] / 2) - 40) - 400, (config["graphics"]["displayHeight"] / 2) + 20))
 
 
-        def callback(obj, menu, x):
-            obj.x = x
-
-        background.addAnimation(transitionX, 'onLoad', speed = 40, transitionDirection = "left", x = x, callback = callback)
-        total.addAnimation(transitionX, 'onLoad', speed = 40, transitionDirection = "left", x = ((x + width) / 2 - 110), callback = callback)
-        play.addAnimation(transitionX, 'onLoad', speed = 40, transitionDirection = "left", x = ((config["graphics"]["displayWidth"] / 2) - 40), callback = callback)
+        # Slide in from the left
+        for component in (background, total, play):
+            self.game.tweenEngine.tween(component, "x", component.x + 400, 0.1, "easeOut")
 
         play.addEvent(hoverColor, 'onMouseOver', color = BLACK)
         play.addEvent(hoverColor, 'onMouseOut', color = Color("white"))
@@ -820,6 +878,11 @@ class GameHudLayout(Menu):
         return
 
 
+    @abc.abstractmethod
+    def updateFastForward(self, speed):
+        return
+
+
     @abc.abstractmethod
     def setLifeAmount(self):
         return
@@ -833,6 +896,7 @@ class GameHud(GameHudLayout):
 
         self.hudX = 15
         self.hudY = 15
+        self.slideTime = 0.2 # how long the hud takes to slide onto the screen, in seconds
 
 
     def updateSlowDownMeter(self, amount):
@@ -841,41 +905,42 @@ class GameHud(GameHudLayout):
             self.slowDownMeter.dirty = True
 
 
+    # Show how many times faster than normal the level is running, only when fast forwarding
+    def updateFastForward(self, speed):
+        if hasattr(self, 'fastForward'):
+            self.fastForward.setText(str(speed) + "x" if speed != 1 else "")
+            self.fastForward.dirty = True
+
+
     def slideHudIn(self):
-        def callbackX(obj, menu, x):
-            obj.x = x
+        tweenEngine = self.game.tweenEngine
 
-        def callbackY(obj, menu, y):
-            obj.y = y
+        tweenEngine.tween(self.pause, "x", self.hudX, self.slideTime, "easeOut")
+        tweenEngine.tween(self.layers, "x", self.hudX, self.slideTime, "easeOut")
+        tweenEngine.tween(self.home, "x", self.hudX, self.slideTime, "easeOut")
 
-        speed = 5
-        
-        self.pause.addAnimation(transitionX, 'onLoad', speed = speed, transitionDirection = "left", x = self.hudX, callback = callbackX)
-        self.layers.addAnimation(transitionX, 'onLoad', speed = speed, transitionDirection = "left", x = self.hudX, callback = callbackX)
-        self.home.addAnimation(transitionX, 'onLoad', speed = speed, transitionDirection = "left", x = self.hudX, callback = callbackX)
+        tweenEngine.tween(self.completed, "y", self.hudY, self.slideTime, "easeOut")
+        tweenEngine.tween(self.completedAmount, "y", self.hudY + 13, self.slideTime, "easeOut")
+        tweenEngine.tween(self.lives, "y", self.hudY - 4, self.slideTime, "easeOut")
+        tweenEngine.tween(self.slowDownMeter, "y", self.hudY + 10, self.slideTime, "easeOut")
+        tweenEngine.tween(self.fastForward, "y", self.hudY + 11, self.slideTime, "easeOut")
 
-        self.completed.addAnimation(transitionY, 'onLoad', speed = speed, transitionDirection = "down", y = self.hudY, callback = callbackY)
-        self.completedAmount.addAnimation(transitionY, 'onLoad', speed = speed, transitionDirection = "down", y = self.hudY + 13, callback = callbackY)
-        self.lives.addAnimation(transitionY, 'onLoad', speed = speed, transitionDirection = "down", y = self.hudY - 4, callback = callbackY)
-        self.slowDownMeter.addAnimation(transitionY, 'onLoad', speed = speed, transitionDirection = "down", y = self.hudY + 10, callback = callbackY)
+        if self.minimap is not None:
+            tweenEngine.tween(self.minimap, "y", self.minimapY, self.slideTime * 2, "easeOut")
 
 
     def slideRestartIn(self):
         self.restart.dirty = True # Make sure its resized
         self.add(self.restart)
 
-        def callback(obj, menu, x):
-            obj.x = x
-
-        self.restart.addAnimation(transitionX, 'onLoad', speed = 5, transitionDirection = "left", x = self.hudX, callback = callback)
+        self.game.tweenEngine.tween(self.restart, "x", self.hudX, self.slideTime, "easeOut")
 
 
     def slideRestartOut(self):
-        def callback(obj, menu, x):
-            obj.x = x
+        def callback(obj, menu):
             menu.remove(obj)
 
-        self.restart.addAnimation(transitionX, 'onLoad', speed = -5, transitionDirection = "right", x = self.hudX - 100, callback = callback)
+        self.game.tweenEngine.tween(self.restart, "x", self.hudX - 100, self.slideTime, "easeIn", callback)
 
 
     def togglePauseGame(self, selected = False):
@@ -920,11 +985,22 @@ class GameHud(GameHudLayout):
         self.restart = Image(self, restartImage, (50, 50), (self.hudX - 100, 320))
 
         self.slowDownMeter = Meter(self, Color("white"), self.textColor, GREEN, (meterWidth, 20), (meterWidth, 20), (config["graphics"]["displayWidth"] - (100 + meterWidth), self.hudY + 10 - 100), 2)
+        fastForward = self.game.spriteRenderer.getFastForward()
+        self.fastForward = Label(self, str(fastForward) + "x" if fastForward != 1 else "", 20, self.textColor, (self.slowDownMeter.x - 40, self.hudY + 11 - 100))
 
         self.completed = Timer(self, self.textColor, YELLOW, 0, self.game.spriteRenderer.getTotalToComplete(), (40, 40), (config["graphics"]["displayWidth"] - 85, self.hudY - 100), 5)
         self.lives = Timer(self, self.textColor, GREEN, 100, self.game.spriteRenderer.getLives(), (48, 48), (config["graphics"]["displayWidth"] - 89, self.hudY - 4 - 100), 5)
         self.completedAmount = Label(self, str(self.game.spriteRenderer.getCompleted()), 20, self.textColor, (self.completed.x + 14.5, self.completed.y + 13)) 
 
+        # Only show the minimap when the level doesn't fit on the screen
+        self.minimap = None
+        levelRect = self.game.spriteRenderer.getGridLayer("layer 4").getLinesRect()
+        if config["minimap"]["enabled"] and levelRect is not None and not self.renderer.gameDisplay.get_rect().contains(levelRect):
+            width, height = config["minimap"]["width"], config["minimap"]["height"]
+            self.minimapY = config["graphics"]["displayHeight"] - height - self.hudY
+            self.minimap = Minimap(self, Color("white"), self.textColor, (width, height), (config["graphics"]["displayWidth"] - width - self.hudX, self.minimapY + 200))
+            self.minimap.addEvent(panToMinimap, 'onMouseClick')
+
         self.restart.addEvent(hoverImage, 'onMouseOver', image = restartSelectedImage)
         self.restart.addEvent(hoverImage, 'onMouseOut', image = restartImage)
         self.restart.addEvent(loadLevel, 'onMouseClick', level = self.game.mapLoader.getMap(self.game.spriteRenderer.getLevel()))
@@ -949,14 +1025,15 @@ class GameHud(GameHudLayout):
         self.add(self.pause)
 
         self.add(self.slowDownMeter)
+        self.add(self.fastForward)
         self.add(self.lives)
         self.add(self.completed)
         self.add(self.completedAmount)
+        if self.minimap is not None: self.add(self.minimap)
 
         if transition:
             # set the up transition
-            def callback(obj, menu, animation):
-                obj.removeAnimation(animation)
+            def callback(obj, menu):
                 menu.game.spriteRenderer.runStartScreen()
                 menu.remove(obj)
         
@@ -969,7 +1046,8 @@ class GameHud(GameHudLayout):
                 if menu.game.spriteRenderer.getLives() <= 0:
                     menu.game.spriteRenderer.runEndScreen() # run end screen game over :(
 
-            self.lives.addAnimation(increaseTimer, 'onLoad', speed = -0.2, finish = self.game.spriteRenderer.getLives() * self.lives.getStep(), direction = "backwards", callback = callback)
+            finish = self.game.spriteRenderer.getLives() * self.lives.getStep()
+            self.game.tweenEngine.tween(self.lives, "timer", finish, abs(finish - self.lives.getTimer()) / 20, callback = callback)
 
 
     def setCompletedAmount(self):
@@ -978,7 +1056,8 @@ class GameHud(GameHudLayout):
                 if menu.game.spriteRenderer.getCompleted() >= menu.game.spriteRenderer.getTotalToComplete():
                     menu.game.spriteRenderer.runEndScreen(True) # run end screen game complete!
 
-            self.completed.addAnimation(increaseTimer, 'onLoad', speed = 0.2, finish = self.game.spriteRenderer.getCompleted() * self.completed.getStep(), callback = callback)
+            finish = self.game.spriteRenderer.getCompleted() * self.completed.getStep()
+            self.game.tweenEngine.tween(self.completed, "timer", finish, abs(finish - self.completed.getTimer()) / 20, callback = callback)
             self.completedAmount.setText(str(self.game.spriteRenderer.getCompleted()))
             width, height = self.completedAmount.getFontSizeScaled()[0] / self.renderer.getScale(), self.completedAmount.getFontSizeScaled()[1] / self.renderer.getScale()
             self.completedAmount.setPos(((self.completed.x + (self.completed.width / 2)) - width / 2, ((self.completed.y + (self.completed.height / 2)) - height / 2) + 1))
@@ -1052,8 +1131,7 @@ class EditorHud(GameHudLayout):
 
         if transition:
             # Show the up transition
-            def callback(obj, menu, animation):
-                obj.removeAnimation(animation)
+            def callback(obj, menu):
                 menu.remove(obj)
         
             self.slideTransitionY((0, 0), 'second', callback = callback)
@@ -1071,19 +1149,19 @@ class EditorHud(GameHudLayout):
         textX = self.editLocation + 10
 
         size = Label(self, "Map Size", 25, Color("white"), (textX, 50), BLACK)
-        undo = Label(self, "Undo", 25, Color("white") if len(self.game.mapEditor.getLevelChanges()) > 1 else GREY, (textX, 85), BLACK)
-        redo = Label(self, "Redo", 25, Color("white") if len(self.game.mapEditor.getPoppedLevelChanges()) >= 1 else GREY, (textX, 120), BLACK)
+        undo = Label(self, "Undo", 25, Color("white") if self.game.mapEditor.getHistory().canUndo() else GREY, (textX, 85), BLACK)
+        redo = Label(self, "Redo", 25, Color("white") if self.game.mapEditor.getHistory().canRedo() else GREY, (textX, 120), BLACK)
         
         self.add(box)
 
         size.addEvent(toggleEditSizeDropdown, 'onMouseClick')
 
-        if len(self.game.mapEditor.getLevelChanges()) > 1:
+        if self.game.mapEditor.getHistory().canUndo():
             undo.addEvent(undoChange, 'onMouseClick')
             undo.addEvent(hoverColor, 'onMouseOver', color = GREEN)
             undo.addEvent(hoverColor, 'onMouseOut', color = Color("white"))
 
-        if len(self.game.mapEditor.getPoppedLevelChanges()) >= 1:
+        if self.game.mapEditor.getHistory().canRedo():
             redo.addEvent(redoChange, 'onMouseClick')
             redo.addEvent(hoverColor, 'onMouseOver', color = GREEN)
             redo.addEvent(hoverColor, 'onMouseOut', color = Color("white"))
@@ -1107,44 +1185,39 @@ class EditorHud(GameHudLayout):
         currentWidth = self.game.mapEditor.getLevelData()["width"]
         currentHeight = self.game.mapEditor.getLevelData()["height"]
 
-        size0Selected = True if currentWidth == 16 and currentHeight == 9 else False
-        size1Selected = True if currentWidth == 18 and currentHeight == 10 else False
-        size2Selected = True if currentWidth == 20 and currentHeight == 11 else False
-        size3Selected = True if currentWidth == 22 and currentHeight == 12 else False
-
         boxX = self.editLocation + 200
         textX = boxX + 10
 
-        box = Rectangle(self, BLACK, (110, 150), (boxX, 85))
-        size0Box = Rectangle(self, GREEN, (110, 33), (boxX, 90))
-        size1Box = Rectangle(self, GREEN, (110, 33), (boxX, 126))
-        size2Box = Rectangle(self, GREEN, (110, 33), (boxX, 161))
-        size3Box = Rectangle(self, GREEN, (110, 33), (boxX, 195))
+        box = Rectangle(self, BLACK, (130, 225), (boxX, 85))
+        self.add(box)
 
-        size0 = Label(self, "16 x 9", 25, Color("white"), (textX, 95), GREEN if size0Selected else BLACK)
-        size1 = Label(self, "18 x 10", 25, Color("white"), (textX, 130), GREEN if size1Selected else BLACK)
-        size2 = Label(self, "20 x 11", 25, Color("white"), (textX, 165), GREEN if size2Selected else BLACK)
-        size3 = Label(self, "22 x 12", 25, Color("white"), (textX, 200), GREEN if size3Selected else BLACK)
+        # The preset sizes, with the current size selected if it is one of them
+        for size, boxY, textY in zip([(16, 9), (18, 10), (20, 11), (22, 12)], [90, 126, 161, 195], [95, 130, 165, 200]):
+            selected = size == (currentWidth, currentHeight)
+            label = Label(self, "%i x %i" % size, 25, Color("white"), (textX, textY), GREEN if selected else BLACK)
+            label.addEvent(setSize, 'onMouseClick', size = size)
+            label.addEvent(hoverColor, 'onMouseOver', color = BLACK if selected else GREEN)
+            label.addEvent(hoverColor, 'onMouseOut', color = Color("white"))
 
-        size0.addEvent(setSize0, 'onMouseClick')
-        size1.addEvent(setSize1, 'onMouseClick')
-        size2.addEvent(setSize2, 'onMouseClick')
-        size3.addEvent(setSize3, 'onMouseClick')
+            if selected: self.add(Rectangle(self, GREEN, (130, 33), (boxX, boxY)))
+            self.add(label)
 
-        self.add(box)
-        if size0Selected: self.add(size0Box)
-        elif size1Selected: self.add(size1Box)
-        elif size2Selected: self.add(size2Box)
-        elif size3Selected: self.add(size3Box)
+        # Any other size can be typed in, starting from the current size
+        self.sizeInputBox = Rectangle(self, Color("white"), (110, 33), (textX, 233))
+        sizeInput = InputBox(self, 25, BLACK, self.sizeInputBox, 100, (textX + 5, 238))
+        self.game.textHandler.setString(list("%ix%i" % (currentWidth, currentHeight)))
+        self.game.textHandler.setPointer(len(self.game.textHandler.getString()))
 
-        labels = [(size0, size0Selected), (size1, size1Selected), (size2, size2Selected), (size3, size3Selected)]
-        for label in labels:
-            if label[1]:
-                label[0].addEvent(hoverColor, 'onMouseOver', color = BLACK)
-            else:
-                label[0].addEvent(hoverColor, 'onMouseOver', color = GREEN)
-            label[0].addEvent(hoverColor, 'onMouseOut', color = Color("white"))
-            self.add(label[0])
+        setCustom = Label(self, "Set", 25, Color("white"), (textX, 275), BLACK)
+        setCustom.addEvent(setCustomSize, 'onMouseClick')
+        setCustom.addEvent(hoverColor, 'onMouseOver', color = GREEN)
+        setCustom.addEvent(hoverColor, 'onMouseOut', color = Color("white"))
+
+        self.sizeInputBox.addEvent(hoverColor, 'onKeyPress', color = Color("white"))
+
+        self.add(self.sizeInputBox)
+        self.add(sizeInput)
+        self.add(setCustom)
 
 
     def addDropdown(self):
@@ -1630,16 +1703,16 @@ class MessageHud(Menu):
             return
 
         messageBox = MessageBox(self, message, (25, 25))
-        messageBox.addAnimation(transitionMessageDown, 'onLoad', speed = 4, transitionDirection = "down", y = messageBox.marginY)
+        self.game.tweenEngine.tween(messageBox, "y", messageBox.marginY, abs(messageBox.marginY - messageBox.y) / 400, "easeOut")
         self.add(messageBox)
         messageBox.addMessages()
         self.messages.append(message)
 
-        if sum(isinstance(component, MessageBox) for component in self.components) > 0:
-            for component in self.components:
-                if isinstance(component, MessageBox):
-                    if transitionMessageDown not in component.getAnimations():
-                        component.addAnimation(transitionMessageDown, 'onLoad', speed = 4, transitionDirection = "down", y = (component.y + messageBox.height) + component.marginY)
+        # Move the messages already showing down to make space for the new message
+        for component in self.components:
+            if isinstance(component, MessageBox) and component is not messageBox and not self.game.tweenEngine.isTweening(component, "y"):
+                y = (component.y + messageBox.height) + component.marginY
+                self.game.tweenEngine.tween(component, "y", y, abs(y - component.y) / 400, "easeOut")
 
      
     def main(self):
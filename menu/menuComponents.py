@@ -1,11 +1,11 @@
 import pygame 
 from pygame.locals import *
 from config import *
-from transitionFunctions import transitionMessageRight
 import string
 import abc
 import math
 import copy
+import numpy
 
 vec = pygame.math.Vector2
 
@@ -74,7 +74,8 @@ class TextHandler:
             self.string = []
 
 
-    def events(self, event):
+    # Actions are the controls the key is bound to, if any
+    def events(self, event, actions = []):
         if self.active:
             if event.key == pygame.K_BACKSPACE:
                 self.removeLast()
@@ -90,9 +91,9 @@ class TextHandler:
 
                     self.pointer += 1
 
-                if pygame.key.name(event.key) == config["controls"]["left"]:
+                if "left" in actions:
                     self.setPointer(self.pointer - 1)
-                elif pygame.key.name(event.key) == config["controls"]["right"]:
+                elif "right" in actions:
                     self.setPointer(self.pointer + 1)
 
 
@@ -113,7 +114,8 @@ class MenuComponent:
 
         self.events = []
         self.animations = {}
-        self.components = []
+        self.parent = None # component this component is drawn on, if it isn't drawn straight to the screen
+        self.components = [] # components drawn on this components image
 
         self.dirty = True
         self.responsive = True
@@ -139,6 +141,23 @@ class MenuComponent:
         return self.timer
 
 
+    def getParent(self):
+        return self.parent
+
+
+    # The image of a component has the components drawn on it in it, so setting a component dirty sets every component it is drawn on dirty as well
+    @property
+    def dirty(self):
+        return self.redraw
+
+
+    @dirty.setter
+    def dirty(self, dirty):
+        self.redraw = dirty
+        if dirty and self.parent is not None and not self.parent.dirty:
+            self.parent.dirty = True
+
+
     def setSize(self, size = tuple()):
         self.width = size[0]
         self.height = size[1]
@@ -157,38 +176,53 @@ class MenuComponent:
         self.offset = offset
 
 
+    # Move the drawn component to its position without rendering it again
+    def setRectPos(self):
+        self.rect.x = self.x * self.menu.renderer.getScale()
+        self.rect.y = self.y * self.menu.renderer.getScale()
+
+
     def setTimer(self, timer):
         self.timer = timer
 
 
+    # Add a component to be drawn on this components image, its position is then from the top left of this component
     def add(self, obj):
+        obj.parent = self
         self.components.append(obj)
+        self.dirty = True
 
 
     def addEvent(self, function, event, **kwargs):
         self.events.append({'function': function, 'event': event, 'kwargs': kwargs})
+        self.menu.resetInteractive()
 
 
     def addAnimation(self, function, event, **kwargs):
         self.animations[function] = (event, kwargs)
+        self.menu.resetInteractive()
 
 
     def removeAnimation(self, function):
         del self.animations[function]
+        self.menu.resetInteractive()
 
 
     def removeEvent(self, function, event, **kwargs):
         event = {'function': function, 'event': event,'kwargs': kwargs}
         if event in self.events:
             self.events.remove(event)
+            self.menu.resetInteractive()
 
 
     def clearAnimations(self):
         self.animations = {}
+        self.menu.resetInteractive()
 
 
     def clearEvents(self):
         self.events = []
+        self.menu.resetInteractive()
 
 
     def resize(self):
@@ -215,6 +249,7 @@ class MenuComponent:
         return
 
 
+    # Draw the components on this components image, each component only renders again if it is dirty
     def addComponents(self):
         if self.image is None: return
 
@@ -226,6 +261,12 @@ class MenuComponent:
             #     self.image.blit(component.image, (component.rect))
 
 
+    # Add this component to hits if it is under a position, the components drawn on it are not checked as their events are never run
+    def hitTest(self, pos, hits):
+        if getattr(self, 'rect', None) is not None and self.rect.collidepoint(pos):
+            hits.add(self)
+
+
     def draw(self):
         self.makeSurface()
         self.menu.renderer.addSurface(self.image, self.rect)
@@ -316,7 +357,7 @@ class Label(MenuComponent):
         self.font.set_italic(self.italic)
         self.font.set_underline(self.underline)
 
-        self.image = self.font.render(self.text, config["graphics"]["antiAliasing"], self.color, self.backgroundColor)
+        self.image = self.font.render(self.text, settings.graphics.antiAliasing, self.color, self.backgroundColor)
         if self.backgroundColor is None:
             self.image.convert_alpha()
         else:
@@ -399,10 +440,7 @@ class InputBox(Label):
             self.setText()      
 
 
-        mx, my = pygame.mouse.get_pos()
-        difference = self.menu.renderer.getDifference()
-        mx -= difference[0]
-        my -= difference[1]
+        mx, my = self.menu.game.inputHandler.getMousePos()
         
         if self.rect.collidepoint((mx, my)) and self.menu.game.clickManager.getClicked():
             self.menu.game.clickManager.setClicked(False)
@@ -432,7 +470,7 @@ class Shape(MenuComponent):
         self.alpha = alpha
         self.fill = fill
 
-        if not config["graphics"]["smoothCorners"]:
+        if not settings.graphics.smoothCorners:
             self.shapeBorderRadius = [0, 0, 0, 0]
 
 
@@ -832,6 +870,7 @@ class MessageBox(Rectangle):
         self.menu.removeMessage(self.message)
         for message in self.messages:
             self.menu.components.remove(message)
+        self.menu.resetInteractive()
 
         del self
 
@@ -849,20 +888,20 @@ class MessageBox(Rectangle):
 
         self.timer += self.menu.game.dt
 
-        if self.timer > 4:
-            self.addAnimation(transitionMessageRight, 'onLoad', speed = 18, x = config["graphics"]["displayWidth"])
-            # self.menu.components.remove(self)
-            # for message in self.messages:
-            #     self.menu.components.remove(message)
+        # Slide the message off the screen, removing it once its gone
+        if self.timer > 4 and not self.menu.game.tweenEngine.isTweening(self, "x"):
+            x = config["graphics"]["displayWidth"]
+            self.menu.game.tweenEngine.tween(self, "x", x, abs(x - self.x) / 1800, "easeIn", lambda obj, menu: obj.remove())
 
 
 class Map(MenuComponent):
-    def __init__(self, menu, level, levelInt, size = tuple(), pos = tuple()):  
+    # The level data can be given if it has already been loaded, else it is read from the map file
+    def __init__(self, menu, level, levelInt, size = tuple(), pos = tuple(), levelData = None):  
         super().__init__(menu, TRUEBLACK, size, pos)
         self.levelName = level
         self.level = menu.game.mapLoader.getMap(self.levelName)
         self.levelInt = levelInt
-        self.levelData = menu.game.mapLoader.getMapData(self.levelName)
+        self.levelData = levelData if levelData is not None else menu.game.mapLoader.getMapData(self.levelName)
 
 
     def getLevel(self):
@@ -879,17 +918,18 @@ class Map(MenuComponent):
 
     # draw scanlines if enabled
     def drawScanlines(self):    
-        if config["graphics"]["scanlines"]["enabled"]:
-            scanlines = pygame.Surface((int(self.width * self.menu.renderer.getScale()), int(self.height * self.menu.renderer.getScale())))
+        if settings.graphics.scanlines:
+            scanlines = self.menu.game.surfacePool.acquire("map scanlines", (self.width * self.menu.renderer.getScale(), self.height * self.menu.renderer.getScale()))
             
             fillColor = TRUEBLACK if self.levelData["locked"]["isLocked"] else SCANLINES
             scanlines.fill(fillColor)
 
             self.menu.renderer.drawScanlines(scanlines)
-            alpha = 65 if self.levelData["locked"]["isLocked"] else config["graphics"]["scanlines"]["opacity"]
+            alpha = 65 if self.levelData["locked"]["isLocked"] else settings.graphics.scanlinesOpacity
             scanlines.set_alpha(alpha, pygame.RLEACCEL)
 
             self.image.blit(scanlines, (0, 0))
+            self.menu.game.surfacePool.release(scanlines)
 
 
     # show that the level is locked
@@ -910,7 +950,7 @@ class Map(MenuComponent):
             self.image.blit(keyText.image, (keyText.rect))
 
             # draw the overlay when the scanlines aren't enabled
-            if not config["graphics"]["scanlines"]["enabled"]:
+            if not settings.graphics.scanlines:
                 overlay = pygame.Surface((int(self.width * self.menu.renderer.getScale()), int(self.height * self.menu.renderer.getScale())))
                 overlay.fill(BLACK)
                 overlay.set_alpha(95)
@@ -991,6 +1031,108 @@ class Map(MenuComponent):
         self.menu.renderer.addSurface(self.finalImage, self.rect)
 
 
+# Small map of the whole level with the people and transports on it.
+# The lines are only drawn when the minimap is dirty (the level has been resized or changed),
+# every frame only the dots and the area the camera can see are drawn on top of them
+class Minimap(MenuComponent):
+    def __init__(self, menu, color, outlineColor, size = tuple(), pos = tuple()):
+        super().__init__(menu, color, size, pos)
+        self.outlineColor = outlineColor
+        self.spriteRenderer = self.menu.game.spriteRenderer
+        self.dotSize = config["minimap"]["dotSize"]
+        self.bounds = None # area of the level shown on the minimap, without the camera origin
+
+
+    def getBounds(self):
+        return self.bounds
+
+
+    # Return the position on the drawn level of a position on the minimap
+    def getDrawnPoint(self, pos):
+        if self.bounds is None:
+            return vec(pos)
+        return (vec(pos) - self.rect.topleft - self.mapOffset) / self.mapScale + self.bounds.topleft + self.spriteRenderer.getCamera().getOrigin()
+
+
+    # Return the position on the minimap of a position in the level's lines, which don't have the camera origin added
+    def getMapPoint(self, pos):
+        return (vec(pos) - self.bounds.topleft) * self.mapScale + self.mapOffset
+
+
+    def createDot(self, color):
+        size = max(1, int(self.dotSize * self.menu.renderer.getScale()))
+        dot = pygame.Surface((size, size)).convert()
+        dot.fill(color)
+        return dot
+
+
+    def __render(self):
+        self.dirty = False
+
+        pos = vec(self.x, self.y) * self.menu.renderer.getScale()
+        size = vec(self.width, self.height) * self.menu.renderer.getScale()
+        self.rect = pygame.Rect(pos, size)
+        self.outline = max(1, int(2 * self.menu.renderer.getScale()))
+
+        gridLayer4 = self.spriteRenderer.getGridLayer("layer 4")
+        self.image = pygame.Surface(size).convert()
+        self.image.fill(gridLayer4.getBackgroundColor())
+
+        self.personDot = self.createDot(RED)
+        self.transportDot = self.createDot(YELLOW)
+
+        # Fit the whole level inside the minimap, keeping its shape
+        self.bounds = gridLayer4.getLinesRect()
+        if self.bounds is not None:
+            self.mapScale = min(self.rect.width / max(1, self.bounds.width), self.rect.height / max(1, self.bounds.height))
+            self.mapOffset = (size - vec(self.bounds.size) * self.mapScale) / 2
+
+            for lines in gridLayer4.getLines().values():
+                for line in lines:
+                    pygame.draw.line(self.image, line["color"], self.getMapPoint(line["posx"]), self.getMapPoint(line["posy"]), max(1, int(line["thickness"] * self.mapScale)))
+
+        pygame.draw.rect(self.image, self.outlineColor, Rect(0, 0, *size), self.outline)
+
+
+    def makeSurface(self):
+        if self.dirty or self.image is None: self.__render()
+
+
+    # Return where to draw the dots for a list of sprites, from an array of their positions in the level
+    def getDotPositions(self, sprites):
+        positions = numpy.array([(sprite.pos.x + sprite.width / 2, sprite.pos.y + sprite.height / 2) for sprite in sprites], dtype = float).reshape(-1, 2)
+
+        # Go from the level to the drawn level to the minimap in one step for every sprite
+        scale = self.menu.renderer.getScale() * self.spriteRenderer.getFixedScale() * self.mapScale
+        offset = self.getMapPoint((0, 0)) + self.rect.topleft - vec(self.personDot.get_size()) / 2
+        return (positions * scale + offset).astype(int)
+
+
+    # Draw the people, transports and the area the camera can see on top of the lines
+    def drawDots(self, surface):
+        if self.bounds is None:
+            return
+
+        surface.set_clip(self.rect)
+
+        dots = []
+        for dot, sprites in ((self.transportDot, self.spriteRenderer.getAllTransports()), (self.personDot, self.spriteRenderer.getAllPeople())):
+            dots += [(dot, tuple(pos)) for pos in self.getDotPositions(sprites)]
+        surface.blits(dots, False)
+
+        viewport = self.spriteRenderer.getCamera().getViewport()
+        topleft = self.getMapPoint(vec(viewport.topleft) - self.spriteRenderer.getCamera().getOrigin()) + self.rect.topleft
+        pygame.draw.rect(surface, self.outlineColor, Rect(topleft, vec(viewport.size) * self.mapScale), self.outline)
+
+        surface.set_clip(None)
+
+
+    def draw(self):
+        self.makeSurface()
+        self.menu.renderer.addSurface(self.image, self.rect)
+        self.menu.renderer.addSurface(None, None, self.drawDots)
+
+
 class Image(MenuComponent):
     def __init__(self, menu, imageName, size = tuple(), pos = tuple(), alpha = None):
         super().__init__(menu, None, size, pos)
@@ -0,0 +1,168 @@
+import numpy
+
+
+# Moves menu components along over time, i.e sliding the hud in or the levels across the level select.
+#
+# A tween changes one attribute of a component (its x, y or timer) from what it
+# is now to an end value over an amount of time, following an easing curve. The
+# start, end and time of every tween are kept in arrays so all the tweens are
+# moved on in one go each frame, then the new values are given to the
+# components and the tweens which have finished call their callback. Tweens on
+# a menu which isn't open wait until it is open again, and closing a menu
+# removes its tweens.
+class TweenEngine:
+    # How far along the tween is (0 - 1) for how much of its time has passed (0 - 1)
+    easings = {
+        "linear": lambda t: t,
+        "easeIn": lambda t: t ** 3,
+        "easeOut": lambda t: 1 - (1 - t) ** 3,
+        "easeInOut": lambda t: numpy.where(t < 0.5, 4 * t ** 3, 1 - (2 - 2 * t) ** 3 / 2),
+    }
+
+    class Tween:
+        def __init__(self, component, attribute, callback):
+            self.component = component
+            self.attribute = attribute
+            self.callback = callback
+            self.active = True
+
+
+        def getComponent(self):
+            return self.component
+
+
+        def getAttribute(self):
+            return self.attribute
+
+
+        def getActive(self):
+            return self.active
+
+
+        def cancel(self):
+            self.active = False
+
+
+        # Give the component its new value, moving it on the screen without rendering it again if its position changed
+        def apply(self, value):
+            if self.attribute == "x":
+                self.component.setPos((value, self.component.y))
+            elif self.attribute == "y":
+                self.component.setPos((self.component.x, value))
+            else:
+                setattr(self.component, self.attribute, value)
+                self.component.dirty = True
+                return
+
+            if getattr(self.component, 'rect', None) is not None:
+                self.component.setRectPos()
+
+
+    def __init__(self, game):
+        self.game = game
+        self.easingNames = list(TweenEngine.easings.keys())
+        self.clear()
+
+
+    # Remove every tween
+    def clear(self):
+        self.tweens = []
+        self.starts = numpy.zeros(0)
+        self.ends = numpy.zeros(0)
+        self.elapsed = numpy.zeros(0)
+        self.durations = numpy.zeros(0)
+        self.easingIndexes = numpy.zeros(0, dtype = int)
+
+
+    def getTweens(self):
+        return self.tweens
+
+
+    # Return true if the attribute of a component is being tweened
+    def isTweening(self, component, attribute):
+        for tween in self.tweens:
+            if tween.active and tween.component is component and tween.attribute == attribute:
+                return True
+        return False
+
+
+    # Move an attribute of a component to an end value over a duration (in seconds), replacing any tween already moving it.
+    # The callback is called with the component and its menu when the tween has finished
+    def tween(self, component, attribute, end, duration, easing = "linear", callback = None):
+        self.cancel(component, attribute)
+
+        tween = TweenEngine.Tween(component, attribute, callback)
+        self.tweens.append(tween)
+        self.starts = numpy.append(self.starts, getattr(component, attribute))
+        self.ends = numpy.append(self.ends, end)
+        self.elapsed = numpy.append(self.elapsed, 0)
+        self.durations = numpy.append(self.durations, max(0, duration))
+        self.easingIndexes = numpy.append(self.easingIndexes, self.easingNames.index(easing))
+        return tween
+
+
+    # Stop tweening a component, or only one of its attributes
+    def cancel(self, component, attribute = None):
+        for tween in self.tweens:
+            if tween.component is component and (attribute is None or tween.attribute == attribute):
+                tween.cancel()
+
+
+    # Stop tweening every component in a menu, i.e when the menu is closed
+    def cancelMenu(self, menu):
+        for tween in self.tweens:
+            if tween.component.menu is menu:
+                tween.cancel()
+
+
+    # Move every tween on by an amount of time
+    def update(self, dt):
+        count = len(self.tweens)
+        if count <= 0:
+            return
+
+        tweens = self.tweens[:]
+        running = numpy.array([tween.active and tween.component.menu.open for tween in tweens], dtype = bool)
+        self.elapsed[running] += dt
+
+        with numpy.errstate(divide = 'ignore', invalid = 'ignore'):
+            progress = numpy.where(self.durations > 0, numpy.minimum(1, self.elapsed / self.durations), 1)
+
+        eased = numpy.empty(count)
+        for index, name in enumerate(self.easingNames):
+            using = self.easingIndexes == index
+            if using.any():
+                eased[using] = TweenEngine.easings[name](progress[using])
+
+        values = self.starts + (self.ends - self.starts) * eased
+        finished = running & (progress >= 1)
+
+        for tween, value, isRunning in zip(tweens, values.tolist(), running.tolist()):
+            if isRunning and tween.active:
+                tween.apply(value)
+
+        # Callbacks can start and cancel tweens, so only call them once every tween has been moved
+        for index in numpy.flatnonzero(finished).tolist():
+            tween = tweens[index]
+            if not tween.active:
+                continue
+
+            tween.cancel()
+            if tween.callback is not None:
+                tween.callback(tween.component, tween.component.menu)
+
+        self.removeInactive()
+
+
+    # Remove the tweens which have finished or been cancelled from the arrays
+    def removeInactive(self):
+        keep = numpy.array([tween.active for tween in self.tweens], dtype = bool)
+        if keep.all():
+            return
+
+        self.tweens = [tween for tween in self.tweens if tween.active]
+        self.starts = self.starts[keep]
+        self.ends = self.ends[keep]
+        self.elapsed = self.elapsed[keep]
+        self.durations = self.durations[keep]
+        self.easingIndexes = self.easingIndexes[keep]
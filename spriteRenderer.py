@@ -4,11 +4,17 @@ import pygame
 from pygame.locals import *
 from config import *
 import random
+import math
+import itertools
 from layer import *
 from clickManager import *
 from node import *
 from gridManager import *
 from meterController import *
+from camera import *
+from scheduler import *
+from kinematics import *
+from taxiDispatcher import *
 from menu import *
 
 
@@ -33,21 +39,32 @@ class SpriteRenderer():
 
         self.personClickManager = PersonClickManager(self.game)
         self.transportClickManager = TransportClickManager(self.game)
+        self.camera = Camera(self)
+        self.scheduler = Scheduler(self)
+        self.kinematics = Kinematics(self)
+        self.dispatcher = TaxiDispatcher(self)
 
         self.rendering = False
 
-        # Game timer to keep track of how long has been played
-        self.timer = 0
+        # Time in the level, which everything is moved and scheduled by
+        self.time = 0
 
         # Make this dependant on the level and make it decrease
         # as the number of people who reach their destinations increase
         self.timeStep = 25
+        self.spawnEvent = None  # when the next person is spawned
 
         self.lives = DEFAULTLIVES
         self.score, self.bestScore = 0, 0
 
         self.dt = 1  # Control the speed of whats on screen
         self.startDt = self.dt
+
+        # How many times faster than normal the level is running, when fast
+        # forwarding the level is run in steps no longer than the max step
+        self.fastForward = 1
+        self.fastForwardSpeeds = config["fastForward"]["speeds"]
+        self.maxStep = config["fastForward"]["maxStep"]
         self.fixedScale = 1  # Control the size of whats on the screen
         self.startingFixedScale = 0
         self.paused = False  # Individual pause for the levels
@@ -55,7 +72,6 @@ class SpriteRenderer():
         self.setDefaultMap()
 
         self.totalPeople, self.completed, self.totalToComplete = 0, 0, 0
-        self.totalPeopleNone = False
         self.slowDownMeterAmount = 75
 
         self.debug = False
@@ -76,6 +92,7 @@ class SpriteRenderer():
             "saved": False,  # Has the map been saved before
             "width": 18,
             "height": 10,
+            "keyStride": GridManager.keyStride,  # Node number = x * stride + y
             "difficulty": 1,  # Out of 4
             "total": 8,  # Total to complete the level
             "score": 0,
@@ -163,7 +180,7 @@ class SpriteRenderer():
         # Use this in the menu animation
         previousKeys = config["player"]["keys"]
         config["player"]["keys"] += scoreDifference
-        dump(config)
+        settings.changed()
 
         return previousKeys, scoreDifference, previousScore
 
@@ -176,6 +193,23 @@ class SpriteRenderer():
     def setDt(self, dt):
         self.dt = dt
 
+    def setFastForward(self, fastForward):
+        self.fastForward = fastForward
+        self.hud.updateFastForward(self.fastForward)
+
+    # Move onto the next fast forward speed, going back to normal
+    # speed after the fastest
+    def toggleFastForward(self):
+        if not self.rendering or self.paused:
+            return
+
+        speeds = self.fastForwardSpeeds
+        if self.fastForward in speeds:
+            index = (speeds.index(self.fastForward) + 1) % len(speeds)
+            self.setFastForward(speeds[index])
+        else:
+            self.setFastForward(speeds[0])
+
     def setFixedScale(self, fixedScale):
         self.fixedScale = fixedScale
 
@@ -197,6 +231,11 @@ class SpriteRenderer():
     def setTotalPeople(self, totalPeople):
         self.totalPeople = totalPeople
 
+        # Spawn the next person sooner when there is no people
+        # left on the map, to stop player having to wait
+        if self.totalPeople <= 0:
+            self.scheduleSpawn(2)
+
     def setLives(self, lives):
         self.lives = lives
 
@@ -209,12 +248,40 @@ class SpriteRenderer():
     def getStartDt(self):
         return self.startDt
 
+    # Return how much faster than normal the level is running, including
+    # slowing down and fast forwarding
     def getDt(self):
-        return self.dt
+        return self.dt * self.fastForward
+
+    def getFastForward(self):
+        return self.fastForward
 
     def getFixedScale(self):
         return self.fixedScale
 
+    def getRendering(self):
+        return self.rendering
+
+    def getCamera(self):
+        return self.camera
+
+    def getKinematics(self):
+        return self.kinematics
+
+    def getScheduler(self):
+        return self.scheduler
+
+    def getDispatcher(self):
+        return self.dispatcher
+
+    def getTime(self):
+        return self.time
+
+    # Return the mouse position on the drawn level, so the
+    # sprites can check if the mouse is over them
+    def getMousePos(self):
+        return self.camera.getMousePos()
+
     def getStartingFixedScale(self):
         return self.startingFixedScale
 
@@ -302,10 +369,15 @@ class SpriteRenderer():
     def clearLevel(self):
         self.paused = False  # Not to confuse the option menu
         self.startingFixedScale = 0  # reset the scale back to default
-        self.timer = 0
+        self.camera.reset()
+        self.scheduler.clear()
+        self.kinematics.clear()
+        self.dispatcher.clear()
+        self.time = 0
+        self.spawnEvent = None
+        self.fastForward = 1
         self.lives = DEFAULTLIVES
         self.totalPeople = 0
-        self.totalPeopleNone = False
         self.entities.empty()
         self.allSprites.empty()
         self.layer1.empty()
@@ -313,6 +385,11 @@ class SpriteRenderer():
         self.layer3.empty()
         self.layer4.empty()
 
+        # Give the old layer surfaces back so the new layers can reuse them
+        for layer in ('gridLayer1', 'gridLayer2', 'gridLayer3', 'gridLayer4'):
+            if hasattr(self, layer):
+                getattr(self, layer).releaseSurface()
+
         # Reset the layers to show the top layer
         self.currentLayer = 4
         self.connectionTypes = []
@@ -339,14 +416,6 @@ class SpriteRenderer():
             self.hud = PreviewHud(self.game, spacing)
         else:
             # self.startingFixedScale = -0.05
-            spacings = {
-                (16, 9): (1.5, 1),
-                (18, 10): (2, 1.5),
-                (20, 11): (1.5, 1),
-                (22, 12): (1.5, 1)}
-
-            size = (self.levelData["width"], self.levelData["height"])
-            # spacing = spacings[size]
             spacing = (1.5, 1)
             self.hud = GameHud(self.game, spacing)
 
@@ -401,30 +470,32 @@ class SpriteRenderer():
             self.showLayer(
                 self.getGridLayer(self.connectionTypes[0]).getNumber())
 
+        # The level starts with no people, so spawn the first person soon
+        self.scheduleSpawn(2)
+
     # Draw the level to a surface and return this surface for blitting
     # (i.e on the level selection screen)
     def createLevelSurface(self, level):
         self.clearLevel()
         self.startingFixedScale = -0.2
 
-        spacings = {
-            (16, 9): (3.5, 2),
-            (18, 10): (4, 2.5),
-            (20, 11): (4.5, 2.8),
-            (22, 12): (5, 3)}
-
         gridLayer4 = MenuLayer4(self, (), level)
 
-        levelData = gridLayer4.getGrid().getMap()
-        size = (levelData["width"], levelData["height"])
-        spacing = spacings[size]
+        # Place the map in the middle of the surface, whatever its size
+        spacing = gridLayer4.getGrid().getCentredSpacing()
 
         gridLayer3 = Layer3(self, (), level, spacing)
         gridLayer1 = Layer1(self, (), level, spacing)
         gridLayer2 = Layer2(self, (), level, spacing)
         gridLayer4.addLayerLines(gridLayer1, gridLayer2, gridLayer3)
 
-        return gridLayer4.getLineSurface()
+        # Copy the surface so the layer surfaces can go back to the pool
+        levelSurface = gridLayer4.getLineSurface().copy()
+
+        for layer in (gridLayer1, gridLayer2, gridLayer3, gridLayer4):
+            layer.releaseSurface()
+
+        return levelSurface
 
     # Create a new surface when the game is paused with all the sprites
     # currently in the game, so these don't have to be drawn every frame
@@ -432,12 +503,13 @@ class SpriteRenderer():
 
     def createPausedSurface(self):
         if self.rendering and self.game.paused:
-            self.pausedSurface = pygame.Surface((
-                int(config["graphics"]["displayWidth"]
-                    * self.game.renderer.getScale()),
+            if hasattr(self, 'pausedSurface'):
+                self.game.surfacePool.release(self.pausedSurface)
 
-                int(config["graphics"]["displayHeight"]
-                    * self.game.renderer.getScale()))).convert()
+            self.pausedSurface = self.game.surfacePool.acquire(
+                "paused surface", (
+                    settings.graphics.scaledWidth,
+                    settings.graphics.scaledHeight))
 
             self.pausedSurface.blit(self.gridLayer4.getLineSurface(), (0, 0))
             for sprite in self.layer4:
@@ -520,13 +592,18 @@ class SpriteRenderer():
     # if there is a node above the given node,
     # return the highest node, else return node
     def getTopNode(self, bottomNode):
-        allNodes = self.getAllNodes(True)
+        nodes = []
+        for layer in [self.gridLayer1, self.gridLayer2, self.gridLayer3]:
+            node = layer.getGrid().getNode(bottomNode.getNumber())
+            if node is not None:
+                nodes.append(node)
 
-        for node in allNodes:
-            if node.getNumber() == bottomNode.getNumber():
-                return node
+        # Sort the nodes the same as getAllNodes, so stops are at the top
+        nodes = sorted(nodes, key=lambda x: isinstance(x, Stop))
+        nodes = sorted(nodes, key=lambda x: isinstance(x, Destination))
+        nodes = nodes[::-1]
 
-        return bottomNode
+        return nodes[0] if len(nodes) > 0 else bottomNode
 
     def update(self):
         if not self.rendering:
@@ -537,70 +614,78 @@ class SpriteRenderer():
             return
 
         self.events()
-        self.timer += self.game.dt * self.dt
 
-        # Always spawn a person if there is no people
-        # left on the map, to stop player having to wait
-        if self.timer > self.timeStep:
-            self.timer = 0
-            self.gridLayer2.createPerson(self.allDestinations)
-
-        if self.totalPeople <= 0:
-            if not self.totalPeopleNone:
-                self.timer = 0
-                self.totalPeopleNone = True
-
-            # wait 2 seconds before spawing the next
-            # person when there is no people left
-            if self.timer > 2 and self.totalPeopleNone:
-                self.timer = 0
-                self.gridLayer2.createPerson(self.allDestinations)
-                self.totalPeopleNone = False
+        # Run the level in steps no longer than the max step, so when fast
+        # forwarding nothing moves too far in one step, only the level after
+        # the last step is drawn
+        time = self.game.dt * self.getDt()
+        steps = max(1, math.ceil(time / self.maxStep))
+        for i in range(steps):
+            self.step(time / steps)
+
+    # Move the level on by an amount of time, running
+    # everything that was scheduled to happen by then
+    def step(self, dt):
+        self.time += dt
+        self.kinematics.step(dt)
+        self.scheduler.run()
+
+    # Spawn the next person after an amount of time,
+    # replacing the spawn that was already scheduled
+    def scheduleSpawn(self, delay):
+        self.scheduler.cancel(self.spawnEvent)
+        self.spawnEvent = self.scheduler.scheduleIn(delay, self.spawnPerson)
+
+    def spawnPerson(self):
+        self.gridLayer2.createPerson(self.allDestinations)
+
+        # Try again soon if there is still no one on the map
+        self.scheduleSpawn(2 if self.totalPeople <= 0 else self.timeStep)
 
     def events(self):
-        keys = pygame.key.get_pressed()
-        key = [pygame.key.name(k) for k, v in enumerate(keys) if v]
-
-        #     self.dt = self.startDt
-        # keys = pygame.key.get_pressed()
-        # key = [pygame.key.name(k) for k, v in enumerate(keys) if v]
-
-        # if len(key) == 1:
-        #     if key[0] == config["controls"]["dtDown"]:
-        #         self.game.clickManager.setSpaceBar(True)
-        # else:
-        #     self.game.clickManager.setSpaceBar(False)
-
-        if pygame.key.get_pressed()[pygame.K_SPACE]:
+        # Slow the level down whilst the slow down key is held
+        if self.game.inputHandler.getActionPressed("dtDown"):
             self.game.clickManager.setSpaceBar(True)
 
             if (
                 self.dt != self.startDt - self.meter.getSlowDownAmount()
                     and not self.meter.getEmpty()):
-                self.game.audioLoader.playSound("slowIn", 1)
+                self.game.audioLoader.playSound("slowIn")
         else:
             if self.dt != self.startDt:
-                self.game.audioLoader.playSound("slowOut", 1)
+                self.game.audioLoader.playSound("slowOut")
 
             self.game.clickManager.setSpaceBar(False)
 
+    # People can be on their own layer and layer 4 at the same time,
+    # so only return each person once
+    def getAllPeople(self):
+        return list(dict.fromkeys(itertools.chain(
+            self.gridLayer1.getPeople(),
+            self.gridLayer2.getPeople(),
+            self.gridLayer3.getPeople(),
+            self.gridLayer4.getPeople())))
+
+    def getAllTransports(self):
+        return (
+            self.gridLayer1.getGrid().getTransports() +
+            self.gridLayer2.getGrid().getTransports() +
+            self.gridLayer3.getGrid().getTransports())
+
     # Make people on the current layer clickable, and the rest non-clickable
     def resetPeopleClicks(self):
-        totalPeople = (
-            self.gridLayer1.getPeople() +
-            self.gridLayer2.getPeople() +
-            self.gridLayer3.getPeople() +
-            self.gridLayer4.getPeople())
+        # Always want every person to be clickable on the top layer
+        if self.currentLayer == 4:
+            for person in self.getAllPeople():
+                person.setCanClick(True)
+            return
 
+        # The layer people are sets, so checking each person is on the
+        # current layer doesn't have to search through the whole layer
         currentLayerPeople = self.getGridLayer(
             "layer " + str(self.currentLayer)).getPeople()
-        for person in totalPeople:
-            if person in currentLayerPeople or self.currentLayer == 4:
-                # Always went every person to be clickable on the top layer
-                person.setCanClick(True)
-
-            else:
-                person.setCanClick(False)
+        for person in self.getAllPeople():
+            person.setCanClick(person in currentLayerPeople)
 
     def showLayer(self, layer):
         if not self.rendering:
@@ -615,6 +700,19 @@ class SpriteRenderer():
             self.resetPeopleClicks()
 
     def resize(self):
+        if self.rendering:
+            self.resizeLevel()
+
+            # resize huds and menus
+            self.hud.resize()
+            self.menu.resize()
+            self.messageSystem.resize()
+
+            self.createPausedSurface()
+
+    # Draw the level again at the current scale (i.e when the camera has
+    # zoomed), without touching the huds and menus
+    def resizeLevel(self):
         # If a layer has any images, they must be resized here
         if self.rendering:
             self.gridLayer1.resize()
@@ -628,24 +726,50 @@ class SpriteRenderer():
             self.gridLayer4.addLayerLines(
                 self.gridLayer1, self.gridLayer2, self.gridLayer3)
 
-            # resize huds and menus
-            self.hud.resize()
-            self.menu.resize()
-            self.messageSystem.resize()
-
             for sprite in self.allSprites:
                 sprite.dirty = True
 
-            self.createPausedSurface()
+            # The minimap is the only part of the hud drawn from the level
+            minimap = getattr(self.hud, 'minimap', None)
+            if minimap is not None:
+                minimap.resize()
 
+    # Move the drawn level after the camera has panned, the layer surfaces
+    # are scrolled and the sprites moved rather than drawn again
+    def pan(self, amount):
+        if self.rendering:
+            for gridLayer in (
+                    self.gridLayer1, self.gridLayer2, self.gridLayer3,
+                    self.gridLayer4):
+                gridLayer.pan(amount)
+
+            sprites = set(itertools.chain(
+                self.layer1, self.layer2, self.layer3, self.layer4,
+                self.entities))
+            for sprite in sprites:
+                if hasattr(sprite, 'rect'):
+                    sprite.rect.move_ip(amount)
+
+    # Draw the layer and the sprites on it which can be seen through the
+    # camera, sprites that haven't been drawn yet have no rect to check
     def renderLayer(self, layer, gridLayer, group):
         if self.currentLayer == layer:
+            self.camera.beginDraw()
             gridLayer.draw()
+
+            viewport = self.camera.getViewport()
             for sprite in group:
-                sprite.draw()
+                if (not hasattr(sprite, 'rect')
+                        or viewport.colliderect(sprite.rect)):
+                    sprite.draw()
+
+            self.camera.endDraw(gridLayer.getBackgroundColor())
 
     def render(self):
         if self.rendering:
+            self.camera.update()
+            self.kinematics.place()
+
             if not self.game.paused:
                 # Entities drawn below the other sprites
                 for entity in self.entities:
@@ -0,0 +1,175 @@
+import pygame
+from pygame.locals import *
+from config import *
+
+vec = pygame.math.Vector2
+
+# Pans and zooms the view of the level.
+#
+# The layers and sprites are drawn at the sprite renderer's fixed scale with
+# the camera's origin added to their positions. Moving the camera only
+# changes the transform that the drawn level is shown through (a zoom and an
+# offset). Once the camera has stopped moving for the settle time a pan just
+# moves what has already been drawn to the new origin, only a zoom draws the
+# level again at the new scale.
+class Camera:
+    def __init__(self, spriteRenderer):
+        self.spriteRenderer = spriteRenderer
+        self.game = self.spriteRenderer.game
+
+        self.zoomFactor = config["camera"]["zoomFactor"]
+        self.minScale = config["camera"]["minScale"]
+        self.maxScale = config["camera"]["maxScale"]
+        self.settleTime = config["camera"]["settleTime"]
+
+        self.surface = None # the level is drawn to this when it has to be transformed
+        self.reset()
+
+
+    # Move the camera back to the start, without a transform
+    def reset(self):
+        self.origin = vec(0, 0) # added to the position of everything drawn
+        self.zoom = 1 # zoom and offset of the transform from the drawn level to the screen
+        self.offset = vec(0, 0)
+        self.settleTimer = 0
+        self.mouseFrame = None # input frame the mouse position was worked out on
+
+
+    def getOrigin(self):
+        return self.origin
+
+
+    def getZoom(self):
+        return self.zoom
+
+
+    def getOffset(self):
+        return self.offset
+
+
+    # Return true if the drawn level is being shown through a transform
+    def getMoving(self):
+        return self.zoom != 1 or self.offset != vec(0, 0)
+
+
+    # Return the position on the drawn level of a position in the level
+    def getDrawPosition(self, pos):
+        return vec(pos) * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale() + self.origin
+
+
+    # Return the position on the drawn level of a position on the screen (i.e the mouse)
+    def getDrawnPoint(self, pos):
+        return (vec(pos) - self.offset) / self.zoom
+
+
+    # Return the position of the mouse on the drawn level, only working it out again when the input or the transform has changed
+    def getMousePos(self):
+        inputHandler = self.game.inputHandler
+        if self.mouseFrame != inputHandler.getFrame():
+            self.mousePos = self.getDrawnPoint(inputHandler.getMousePos())
+            self.mouseFrame = inputHandler.getFrame()
+
+        return self.mousePos
+
+
+    # Return the area of the drawn level which is shown on the screen
+    def getViewport(self):
+        topleft = self.getDrawnPoint((0, 0))
+        size = vec(self.game.renderer.gameDisplay.get_size()) / self.zoom
+        return pygame.Rect(topleft, (size.x + 1, size.y + 1))
+
+
+    # Return true if a rect on the drawn level can be seen on the screen
+    def isVisible(self, rect):
+        return self.getViewport().colliderect(rect)
+
+
+    # Move the view by an amount on the screen
+    def pan(self, amount):
+        self.offset += vec(amount)
+        self.settleTimer = self.settleTime
+        self.mouseFrame = None
+
+
+    # Move the view so a position on the drawn level is in the centre of the screen
+    def centreOn(self, pos):
+        centre = vec(self.game.renderer.gameDisplay.get_size()) / 2
+        self.pan(centre - (vec(pos) * self.zoom + self.offset))
+
+
+    # Zoom in (steps > 0) or out (steps < 0) around a point on the screen, keeping the point in the same place
+    def zoomAt(self, steps, pos):
+        scale = self.spriteRenderer.getFixedScale()
+        zoom = self.zoom * self.zoomFactor ** steps
+        zoom = max(self.minScale / scale, min(self.maxScale / scale, zoom))
+
+        pos = vec(pos)
+        self.offset = pos - (pos - self.offset) * (zoom / self.zoom)
+        self.zoom = zoom
+        self.settleTimer = self.settleTime
+        self.mouseFrame = None
+
+
+    # Move the level to the new origin, and draw it again at the new scale if it was zoomed, once the camera has stopped moving.
+    # The origin is kept to whole pixels so what has been drawn can be moved to it
+    def update(self):
+        if self.settleTimer <= 0:
+            return
+
+        self.settleTimer -= self.game.dt
+        if self.settleTimer > 0:
+            return
+
+        origin = self.origin * self.zoom + self.offset
+        origin = vec(round(origin.x), round(origin.y))
+        amount = origin - self.origin
+        zoom = self.zoom
+
+        self.origin = origin
+        self.zoom = 1
+        self.offset = vec(0, 0)
+        self.mouseFrame = None
+
+        if zoom == 1:
+            self.spriteRenderer.pan(amount)
+        else:
+            self.spriteRenderer.setFixedScale(self.spriteRenderer.getFixedScale() * zoom)
+            self.spriteRenderer.resizeLevel()
+
+
+    # Start drawing the level to the camera surface, if the level is being shown through a transform
+    def beginDraw(self):
+        if not self.getMoving():
+            return
+
+        size = self.game.renderer.gameDisplay.get_size()
+        if self.surface is None or self.surface.get_size() != size:
+            self.releaseSurface()
+            self.surface = self.game.surfacePool.acquire("camera", size)
+
+        self.display = self.game.renderer.gameDisplay
+        self.start = self.game.renderer.getSurfaceCount()
+        self.game.renderer.gameDisplay = self.surface
+
+
+    # Draw everything added since beginDraw to the camera surface, then show it on the screen through the transform
+    def endDraw(self, backgroundColor):
+        if self.game.renderer.gameDisplay is not self.surface:
+            return
+
+        self.game.renderer.drawSurfaces(self.surface, self.start)
+        self.game.renderer.gameDisplay = self.display
+
+        # Only scale the part of the surface that will be on the screen
+        self.display.fill(backgroundColor)
+        viewport = self.getViewport().clip(self.surface.get_rect())
+
+        if viewport.width > 0 and viewport.height > 0:
+            size = (int(viewport.width * self.zoom), int(viewport.height * self.zoom))
+            self.display.blit(pygame.transform.scale(self.surface.subsurface(viewport), size), vec(viewport.topleft) * self.zoom + self.offset)
+
+
+    def releaseSurface(self):
+        if self.surface is not None:
+            self.game.surfacePool.release(self.surface)
+            self.surface = None
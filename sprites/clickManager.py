@@ -1,4 +1,5 @@
 import pygame
+import heapq
 import person as PERSON
 import node as NODE
 from enum import Enum
@@ -35,13 +36,12 @@ class ClickManager:
         self.spaceBar = spaceBar
 
     
-    # for a given node, return the adjacent nodes
-    def getAdjacentNodes(self, n):
+    # for a given node, return the adjacent nodes and the distance to each of them
+    def getAdjacentNodes(self, node):
         adjNodes = []
 
-        for connection in n["node"].getConnections():
-            node = {"node": connection.getTo(), "parent": n}
-            adjNodes.append(node)
+        for connection in node.getConnections():
+            adjNodes.append((connection.getTo(), connection.getDistance()))
         return adjNodes
 
 
@@ -50,77 +50,59 @@ class ClickManager:
     #         Node B
     # Output: List path (empty if no path is found)
     def aStarPathFinding(self, A, B):
-        openList = []
-        closedList = []
+        # Nodes to visit, in a heap ordered by f (the count keeps nodes with the same f in the order they were added)
+        openList = [(0, 0, A)]
+        count = 1
 
-        # startNode.g = startNode.h = startNode.f = 0
-        # startNode.parent = None
-        # endNode.h = endNode.h = endNode.f = 0
-        # endNode.parent = None
+        # The lowest g found for each node number, and the node it was reached from
+        costs = {A.getNumber(): 0}
+        parents = {A.getNumber(): None}
+        closedList = set()
 
-        startNode = {"node": A, "g": 0, "h": 0, "f": 0, "parent": None}
-        endNode = {"node": B, "g": 0, "h": 0, "f": 0, "parent": None}
-
-        openList.append(startNode)
+        endPos = B.pos - B.offset
 
         # While the openlist is not empty
         while len(openList) > 0:
+            f, c, currentNode = heapq.heappop(openList)
+            number = currentNode.getNumber()
 
-            # Set the current node
-            currentNode = openList[0]
-            currentIndex = 0
-
-            for index, item in enumerate(openList):
-                if item["f"] < currentNode["f"]:
-                    currentNode = item
-                    currentIndex = index            
-
-            openList.pop(currentIndex)
-            closedList.append(currentNode)
+            # The node has already been visited with a lower f
+            if number in closedList:
+                continue
+            closedList.add(number)
 
             # Check if the current node is the goal
-            if currentNode["node"].getNumber() == endNode["node"].getNumber():
+            if number == B.getNumber():
                 path = []
                 current = currentNode
 
                 while current is not None:
-                    path.append(current["node"])
-                    current = current["parent"]
+                    path.append(current)
+                    current = parents[current.getNumber()]
 
                 return path[::-1]
 
-            children = self.getAdjacentNodes(currentNode)
+            for child, dis in self.getAdjacentNodes(currentNode):
+                childNumber = child.getNumber()
 
-            for child in children:
-                c = False
                 # Child is in the closed list
-                for closedNode in closedList:
-                    if child["node"].getNumber() == closedNode["node"].getNumber():
-                        c = True
-                if c: continue
-
-                # Get the distance between the child and the current node
-                for connection in child["node"].getConnections():
-                    if connection.getTo().getNumber() == currentNode["node"].getNumber():
-                        dis = connection.getDistance()
-                        break
-                
-                # Create f, g and g values
-                child["g"] = currentNode["g"] + dis                     
-                child["h"] = ((child["node"].pos - child["node"].offset) - (endNode["node"].pos - endNode["node"].offset)).length()
-                child["f"] = child["g"] + child["h"]
-
-                # Child is already in the open list
-                o = False
-                for openNode in openList:
-                    if child["node"].getNumber() == openNode["node"].getNumber() and child["g"] > openNode["g"]:
-                        o = True
-                if o: continue
-
-                # Add the child to the open list
-                openList.append(child)
-
-        self.game.audioLoader.playSound("uiError", 0)
+                if childNumber in closedList:
+                    continue
+
+                # Child has already been reached with a lower g
+                g = costs[number] + dis
+                if childNumber in costs and g >= costs[childNumber]:
+                    continue
+
+                costs[childNumber] = g
+                parents[childNumber] = currentNode
+
+                # Add the child to the open list with its f value
+                h = ((child.pos - child.offset) - endPos).length()
+                heapq.heappush(openList, (g + h, count, child))
+                count += 1
+
+        self.game.audioLoader.playSound("uiError")
         return [] # Return the empty path if route is impossible
 
 
@@ -188,20 +170,20 @@ class PersonClickManager(ClickManager):
             startingConnectionAFound, startingConnectionBFound = False, False
             # The start and end nodes are on different layers, diferent to the players layer 
             if A.getConnectionType() != B.getConnectionType() or A.getConnectionType() == B.getConnectionType():
-                layer = self.game.spriteRenderer.getGridLayer(self.person.getStartingConnectionType())
-                nodes = layer.getGrid().getNodes()
+                grid = self.game.spriteRenderer.getGridLayer(self.person.getStartingConnectionType()).getGrid()
 
                 # Set the start and end node to be the equivelant node on the players layer 
-                for node in nodes:
-                    if node.getNumber() == A.getNumber():
-                        A = node
-                        startingConnectionAFound = True
-
-                    if node.getNumber() == B.getNumber():
-                        if isinstance(B, NODE.MetroStation) or isinstance(B, NODE.TramStop): # If its a stop on a different layer, switch to that layer at the end of the path
-                            finalNode = B
-                        B = node
-                        startingConnectionBFound = True
+                node = grid.getNode(A.getNumber())
+                if node is not None:
+                    A = node
+                    startingConnectionAFound = True
+
+                node = grid.getNode(B.getNumber())
+                if node is not None:
+                    if isinstance(B, NODE.MetroStation) or isinstance(B, NODE.TramStop): # If its a stop on a different layer, switch to that layer at the end of the path
+                        finalNode = B
+                    B = node
+                    startingConnectionBFound = True
 
             # A path can only be formed if there is startingConnectionType nodes at the start and end of the player path (even if they are on a different layer), otherwise empty path
             if not startingConnectionAFound or not startingConnectionBFound:
@@ -213,13 +195,12 @@ class PersonClickManager(ClickManager):
 
             # Player is on a node in a different layer 
             if A.getConnectionType() != B.getConnectionType():
-                layer = self.game.spriteRenderer.getGridLayer(B.getConnectionType())
-                nodes = layer.getGrid().getNodes()
+                grid = self.game.spriteRenderer.getGridLayer(B.getConnectionType()).getGrid()
 
                 # Get the same node on the players layer and set that as the starting node instead
-                for node in nodes:
-                    if node.getNumber() == A.getNumber():
-                        A = node
+                node = grid.getNode(A.getNumber())
+                if node is not None:
+                    A = node
 
             path = self.aStarPathFinding(A, B)
 
@@ -301,12 +282,7 @@ class TransportClickManager(ClickManager):
         if self.node is not None and self.transport is not None:
             # only set the path if the bus is moving
             path = self.pathFinding()
-
-            self.transport.setFirstPathNode(path)
-            self.transport.clearPath(path)
-
-            for node in path:
-                self.transport.addToPath(node)
+            self.transport.setPath(path)
 
             # self.transport = None
             self.node = None
@@ -452,6 +428,8 @@ class EditorClickManager(ClickManager):
         fromNode = connection.getFrom()
         toNode = connection.getTo()
 
+        # Delete the connection and anything left on its nodes as one change
+        self.game.mapEditor.beginChange()
         self.game.mapEditor.deleteConnection(connection.getConnectionType(), connection)
 
         # Remove any stops and transports from nodes with no connections
@@ -465,6 +443,8 @@ class EditorClickManager(ClickManager):
             self.deleteStop(toNode)
             self.deleteDestination(toNode)
 
+        self.game.mapEditor.commitChange()
+
 
     def deleteTransport(self, node):
         # Check that there is a transportation to delete
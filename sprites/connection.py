@@ -104,14 +104,11 @@ class Connection:
     def updateConnections(self):
         if self.draw:
             layer = self.game.mapEditor.getGridLayer(self.connectionType)
-            layer.createConnections()
+            layer.updateConnectionLines(self)
 
 
     def update(self):
-        mx, my = pygame.mouse.get_pos()
-        difference = self.game.renderer.getDifference()
-        mx -= difference[0]
-        my -= difference[1]
+        mx, my = self.spriteRenderer.getMousePos() - self.spriteRenderer.getCamera().getOrigin()
 
         scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
         buffer = 1
@@ -0,0 +1,47 @@
+# A set of sprites that keeps the order they were added in.
+#
+# Used for the people at a node, on a layer, in a person holder or travelling
+# on a transport, and the transports at a node. Adding, removing and checking
+# if a sprite is in the set takes the same time no matter how many sprites
+# there are, unlike a list which has to search through every sprite, and
+# going through the set gives the sprites in the order they were added so
+# they are always drawn in the same order.
+class EntitySet:
+    def __init__(self, entities = ()):
+        self.entities = dict.fromkeys(entities)
+
+
+    def add(self, entity):
+        self.entities[entity] = None
+
+
+    # Remove a sprite, doing nothing if it isn't in the set
+    def remove(self, entity):
+        self.entities.pop(entity, None)
+
+
+    def clear(self):
+        self.entities.clear()
+
+
+    # Return the sprite at a position in the order they were added, the first sprite doesn't have to go through the others
+    def __getitem__(self, index):
+        if index == 0 and len(self.entities) > 0:
+            return next(iter(self.entities))
+        return list(self.entities)[index]
+
+
+    def __contains__(self, entity):
+        return entity in self.entities
+
+
+    def __iter__(self):
+        return iter(self.entities)
+
+
+    def __len__(self):
+        return len(self.entities)
+
+
+    def __repr__(self):
+        return "EntitySet(" + repr(list(self.entities)) + ")"
@@ -6,12 +6,17 @@ import os
 import random
 import math
 import json
+import copy
 
 from node import *
 from connection import *
 from transport import *
 
 class GridManager:
+    nodeSpacing = 50 # spacing between each node
+    keyStride = 1024 # node numbers are x * keyStride + y, so a node keeps its number when the map is resized (maps can be up to keyStride nodes high)
+    chunkSize = 16 # nodes are stored in square chunks of the grid, so the nodes in an area can be found without checking every node
+
     def __init__(self, layer, groups, level = None, spacing = (1.5, 1.5)):
         self.layer = layer
         self.spriteRenderer = self.layer.getSpriteRenderer()
@@ -20,7 +25,9 @@ class GridManager:
         self.level = level
         self.levelName = ""
 
-        self.nodes = []
+        self.nodeNumbers = {} # the nodes on the grid keyed by their number, in the order they were added
+        self.chunks = {} # the nodes on the grid keyed by their number, in a dictionary for each chunk of the grid
+        self.mapNodes = {} # the stops and destinations in the map keyed by their location, for looking up when creating the grid
         self.connections = []
         self.tempConnections = []
         self.transports = []
@@ -33,10 +40,12 @@ class GridManager:
             self.loadMap()
 
         scale = min(18 / self.width, 10 / self.height)
-        scale += self.spriteRenderer.getStartingFixedScale() # apply the starting fixed scale when first rendering
+        scale = max(scale + self.spriteRenderer.getStartingFixedScale(), scale / 2) # apply the starting fixed scale when first rendering, without shrinking large maps to nothing
         self.spriteRenderer.setFixedScale(scale)
 
-        self.nodePositions = self.setNodePositions(spacing[0], spacing[1], self.width, self.height)
+        # Offset of the first node position, node positions are worked out from this when needed instead of being stored for every position on the grid
+        offsetScale = self.getOffsetScale()
+        self.nodeOffset = (spacing[0] * offsetScale, spacing[1] * offsetScale)
 
         # Entry nodes
         self.entryTopPositions = self.setNodePositions(1.5, -0.5, 18, 1)
@@ -49,8 +58,10 @@ class GridManager:
         self.editorDestinationMappings = {"airport": EditorAirport, "office": EditorOffice, "house": EditorHouse}
 
 
-    def getNodePositions(self):
-        return self.nodePositions
+    # Return the x and y location of a node number on the screen (before scaling)
+    def getNodePosition(self, number):
+        x, y = self.getNodeCoordinates(number)
+        return ((x + self.nodeOffset[0]) * GridManager.nodeSpacing, (y + self.nodeOffset[1]) * GridManager.nodeSpacing)
 
 
     def getTransportMappings(self):
@@ -79,7 +90,7 @@ class GridManager:
 
     # return the nodes, in a list to be appended to each layer
     def getNodes(self):
-        return self.nodes
+        return list(self.nodeNumbers.values())
 
 
     # Return the connections, in a list for each layer
@@ -100,6 +111,94 @@ class GridManager:
         return self.destinations
 
 
+    # Return the node with the given number, or None if there is no node with that number
+    def getNode(self, number):
+        return self.nodeNumbers.get(number)
+
+
+    # Return the x and y position of a node number on the grid
+    def getNodeCoordinates(self, number):
+        return divmod(number, GridManager.keyStride)
+
+
+    # Return the node number at an x and y position on the grid
+    def getNodeNumber(self, x, y):
+        return x * GridManager.keyStride + y
+
+
+    # Maps larger than 18 * 10 have their offsets scaled up with them
+    def getOffsetScale(self):
+        return max(1, min(self.width / 18, self.height / 10))
+
+
+    # Return the spacing (in nodes) from the edge of the screen to the first node position that puts the middle of the grid
+    # in the middle of the screen at the current fixed scale, so a map of any size can be centred
+    def getCentredSpacing(self, nodeSize = 20):
+        scale = self.spriteRenderer.getFixedScale()
+        spacing = []
+
+        for size, screenSize in ((self.width, settings.graphics.displayWidth), (self.height, settings.graphics.displayHeight)):
+            # Nodes from the edge of the screen to the middle of the middle node, less the nodes in the first half of the grid
+            middle = (screenSize / 2 - nodeSize / 2 * scale) / (GridManager.nodeSpacing * scale)
+            spacing.append((middle - (size - 1) / 2) / self.getOffsetScale())
+        return tuple(spacing)
+
+
+    # Return true if the x and y position is on the grid
+    def isOnGrid(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+
+    # Return the chunk of the grid a node number is in
+    def getChunk(self, number):
+        x, y = self.getNodeCoordinates(number)
+        return (x // GridManager.chunkSize, y // GridManager.chunkSize)
+
+
+    # Return the nodes within an area of the grid (from x1, y1 to x2, y2 inclusive), only looking at the chunks the area covers
+    def getNodesInArea(self, x1, y1, x2, y2):
+        nodes = []
+
+        for chunkX in range(x1 // GridManager.chunkSize, x2 // GridManager.chunkSize + 1):
+            for chunkY in range(y1 // GridManager.chunkSize, y2 // GridManager.chunkSize + 1):
+                for number, node in self.chunks.get((chunkX, chunkY), {}).items():
+                    x, y = self.getNodeCoordinates(number)
+
+                    if x1 <= x <= x2 and y1 <= y <= y2:
+                        nodes.append(node)
+        return nodes
+
+
+    def appendNode(self, node):
+        self.nodeNumbers[node.getNumber()] = node
+        self.chunks.setdefault(self.getChunk(node.getNumber()), {})[node.getNumber()] = node
+
+
+    # Take a node off the grid, removing its chunk if the chunk is left empty
+    def popNode(self, node):
+        number = node.getNumber()
+        chunk = self.chunks[self.getChunk(number)]
+
+        del self.nodeNumbers[number]
+        del chunk[number]
+
+        if len(chunk) <= 0:
+            del self.chunks[self.getChunk(number)]
+
+
+    # Add an empty node to the grid within the map editor
+    def addEditorNode(self, connectionType, number):
+        x, y = self.getNodePosition(number)
+        n = EditorNode(self.spriteRenderer, self.groups, number, connectionType, x, y, self.spriteRenderer.getClickManager(), self.spriteRenderer.getPersonClickManager(), self.spriteRenderer.getTransportClickManager())
+        self.appendNode(n)
+        return n
+
+
+    def removeNode(self, node):
+        self.popNode(node)
+        node.remove()
+
+
     def getMap(self):
         if hasattr(self, 'map'):
             return self.map
@@ -110,10 +209,10 @@ class GridManager:
     def setNodePositions(self, offx = 1.5, offy = 1.5, width = 18, height = 10):
         # Offset on the x coordinate
         # Offset on the y coordinate
-        spacing = 50 #spacing between each node
+        spacing = GridManager.nodeSpacing
         positions = []
 
-        scale = min(self.width / 18, self.height / 10) if min(self.width / 18, self.height / 10) > 1 else 1
+        scale = self.getOffsetScale()
 
         for i in range(width):
             for x in range(height):
@@ -165,61 +264,89 @@ class GridManager:
         if isinstance(self.level, dict):
             self.map = self.level
         else:
-            with open(self.level) as f:
-                self.map = json.load(f)
+            self.map = saveWriter.read(self.level)
 
         self.levelName = self.map["mapName"] # Get the name of the map
         self.width = self.map["width"]
         self.height = self.map["height"]
 
+        # Maps saved before node numbers had a fixed stride are numbered down each column of the map
+        keyStride = self.map.get("keyStride", self.height)
+        if keyStride != GridManager.keyStride:
+            self.map = GridManager.convertMapKeys(self.map, keyStride)
+
+
+    # Return a copy of a map with its node locations renumbered from the given stride to the fixed stride, the map given isn't changed
+    @staticmethod
+    def convertMapKeys(levelData, keyStride):
+        levelData = copy.deepcopy(levelData)
+
+        def convert(number):
+            x, y = divmod(number, keyStride)
+            return x * GridManager.keyStride + y
+
+        for connectionType, connections in levelData["connections"].items():
+            levelData["connections"][connectionType] = [[convert(connection[0]), convert(connection[1])] for connection in connections]
+
+        for nodeType in ["transport", "stops", "destinations"]:
+            for nodes in levelData[nodeType].values():
+                for node in nodes:
+                    node["location"] = convert(node["location"])
+
+        levelData["keyStride"] = GridManager.keyStride
+        return levelData
+
+
+    # Index the stops and destinations of a layer by their location, keeping the first if there are more than one at a location
+    def indexMapNodes(self, connectionType):
+        self.mapNodes = {}
+
+        for nodeType in ["stops", "destinations"]:
+            for node in self.map[nodeType].get(connectionType, []):
+                self.mapNodes.setdefault((nodeType, node["location"]), node)
+
 
     # Add a node to the grid if the node is not already on the grid
-    def addNode(self, connection, connectionType, currentNodes, direction):
-        if connection[direction] not in currentNodes:
+    def addNode(self, connection, connectionType, direction):
+        if self.getNode(connection[direction]) is None:
             clickManagers = [self.spriteRenderer.getPersonClickManager(), self.spriteRenderer.getTransportClickManager()]
             n = None
             n = self.addStop(n, self.stopMappings, connectionType, connection[direction], clickManagers)
             n = self.addDestination(n, self.destinationMappings, connectionType, connection[direction], clickManagers)
 
             if n is None: #no stop was found at this node 
-                n = Node(self.spriteRenderer, self.groups, connection[direction], connectionType, self.nodePositions[connection[direction]][0], self.nodePositions[connection[direction]][1], self.spriteRenderer.getPersonClickManager(), self.spriteRenderer.getTransportClickManager())
+                x, y = self.getNodePosition(connection[direction])
+                n = Node(self.spriteRenderer, self.groups, connection[direction], connectionType, x, y, self.spriteRenderer.getPersonClickManager(), self.spriteRenderer.getTransportClickManager())
 
-            self.nodes.append(n)
-            currentNodes.append(connection[direction])
-
-        return currentNodes
+            self.appendNode(n)
 
 
     # Add a stop, instead of a node, to the grid 
     def addStop(self, n, mappings, connectionType, number, clickManagers = [], x = None, y = None):
-        if x is None: x = self.nodePositions[number][0]
-        if y is None: y = self.nodePositions[number][1]
-
-        # Change if to a for to show all stops from other layers on each layer (i.e metro stations on layer 2, etc.)
-        if connectionType in self.map["stops"]:
-            for stop in self.map["stops"][connectionType]:
-                if stop["location"] == number:
-                    if len(clickManagers) <= 2:
-                        n = mappings[stop["type"]](self.spriteRenderer, self.groups, number, connectionType, x, y, clickManagers[0], clickManagers[1])
-                    else:
-                        n = mappings[stop["type"]](self.spriteRenderer, self.groups, number, connectionType, x, y, clickManagers[0], clickManagers[1], clickManagers[2])
-                    break
+        if x is None: x = self.getNodePosition(number)[0]
+        if y is None: y = self.getNodePosition(number)[1]
+
+        # Change to look up the stops from other layers to show them on each layer (i.e metro stations on layer 2, etc.)
+        stop = self.mapNodes.get(("stops", number))
+        if stop is not None:
+            if len(clickManagers) <= 2:
+                n = mappings[stop["type"]](self.spriteRenderer, self.groups, number, connectionType, x, y, clickManagers[0], clickManagers[1])
+            else:
+                n = mappings[stop["type"]](self.spriteRenderer, self.groups, number, connectionType, x, y, clickManagers[0], clickManagers[1], clickManagers[2])
         return n
 
 
     def addDestination(self, n, mappings, connectionType, number, clickManagers = [], x = None, y = None):
-        if x is None: x = self.nodePositions[number][0]
-        if y is None: y = self.nodePositions[number][1]
-
-        if connectionType in self.map["destinations"]:
-            for destination in self.map["destinations"][connectionType]:
-                if destination["location"] == number:
-                    if len(clickManagers) <= 2:
-                        n = mappings[destination["type"]](self.spriteRenderer, self.groups, number, connectionType, x, y, clickManagers[0], clickManagers[1])
-                    else:
-                        n = mappings[destination["type"]](self.spriteRenderer, self.groups, number, connectionType, x, y, clickManagers[0], clickManagers[1], clickManagers[2])
-                    self.destinations.append(n)
-                    break
+        if x is None: x = self.getNodePosition(number)[0]
+        if y is None: y = self.getNodePosition(number)[1]
+
+        destination = self.mapNodes.get(("destinations", number))
+        if destination is not None:
+            if len(clickManagers) <= 2:
+                n = mappings[destination["type"]](self.spriteRenderer, self.groups, number, connectionType, x, y, clickManagers[0], clickManagers[1])
+            else:
+                n = mappings[destination["type"]](self.spriteRenderer, self.groups, number, connectionType, x, y, clickManagers[0], clickManagers[1], clickManagers[2])
+            self.destinations.append(n)
         return n
 
 
@@ -227,10 +354,11 @@ class GridManager:
         number = node.getNumber()
         connections = node.getConnections() #need to transfer the connections from the old node to the new node                
         transports = node.getTransports()
-        self.nodes.remove(node)
+        self.popNode(node)
         node.remove()
 
-        n = nodeType(self.spriteRenderer, self.groups, number, connectionType, self.nodePositions[number][0], self.nodePositions[number][1], self.spriteRenderer.getClickManager(), self.spriteRenderer.getPersonClickManager(), self.spriteRenderer.getTransportClickManager())
+        x, y = self.getNodePosition(number)
+        n = nodeType(self.spriteRenderer, self.groups, number, connectionType, x, y, self.spriteRenderer.getClickManager(), self.spriteRenderer.getPersonClickManager(), self.spriteRenderer.getTransportClickManager())
 
         # Need to replace the connection with the new node, otherwise it cant be deleted
         for connection in self.connections:
@@ -241,58 +369,56 @@ class GridManager:
 
         n.setConnections(connections)
         n.setTransports(transports)
-        self.nodes.append(n)
+        self.appendNode(n)
         return n    
 
 
     # Create the grid by adding all the nodes and connections to the grid
     def createGrid(self, connectionType):
-        currentNodes = []
+        self.indexMapNodes(connectionType)
 
         if connectionType in self.map["connections"]:
             for connection in self.map["connections"][connectionType]:
                 # Add the nodes in the connection
-                currentNodes = self.addNode(connection, connectionType, currentNodes, 0)
-                currentNodes = self.addNode(connection, connectionType, currentNodes, 1)
-
-                for node in self.nodes:
-                    if node.getNumber() == connection[0]:
-                        n1 = node
-                    if node.getNumber() == connection[1]:
-                        n2 = node
+                self.addNode(connection, connectionType, 0)
+                self.addNode(connection, connectionType, 1)
 
                 # Create the connection with the nodes
-                self.addConnections(connectionType, n1, n2)
+                self.addConnections(connectionType, self.getNode(connection[0]), self.getNode(connection[1]))
 
 
-    # Create a full grid with all the nodes populated and no connections (for the map editor)
+    # Create a full grid for the map editor, only the nodes that are used (have connections, stops or destinations) are added
+    # to the grid, the empty positions are drawn by the layer and nodes are only added to them when needed
     def createFullGrid(self, connectionType):
-        clickManagers = [self.spriteRenderer.getClickManager(), self.spriteRenderer.getPersonClickManager(), self.spriteRenderer.getTransportClickManager()]
-        
         if self.level is None:
-            for number, position in enumerate(self.nodePositions):
-                n = EditorNode(self.spriteRenderer, self.groups, number, connectionType, position[0], position[1], clickManagers[0], clickManagers[1], clickManagers[2])
-                self.nodes.append(n)
-        else:
-            # Loop through all the node positions
-            for number, position in enumerate(self.nodePositions):
-                n = None
-                n = self.addStop(n, self.editorStopMappings, connectionType, number, clickManagers, position[0], position[1])
-                n = self.addDestination(n, self.editorDestinationMappings, connectionType, number, clickManagers, position[0], position[1])
+            return
+
+        self.indexMapNodes(connectionType)
+        clickManagers = [self.spriteRenderer.getClickManager(), self.spriteRenderer.getPersonClickManager(), self.spriteRenderer.getTransportClickManager()]
+        usedNodes = set()
 
-                if n is None:
-                    n = EditorNode(self.spriteRenderer, self.groups, number, connectionType, position[0], position[1], clickManagers[0], clickManagers[1], clickManagers[2])
-                self.nodes.append(n)
+        if connectionType in self.map["connections"]:
+            for connection in self.map["connections"][connectionType]:
+                usedNodes.update(connection)
 
-            if connectionType in self.map["connections"]:
-                for connection in self.map["connections"][connectionType]:
-                    for node in self.nodes:
-                        if node.getNumber() == connection[0]:
-                            n1 = node
-                        if node.getNumber() == connection[1]:
-                            n2 = node
+        for nodeType in ["stops", "destinations"]:
+            if connectionType in self.map[nodeType]:
+                usedNodes.update(node["location"] for node in self.map[nodeType][connectionType])
 
-                    self.addConnections(connectionType, n1, n2)
+        # Loop through all the used node positions
+        for number in sorted(usedNodes):
+            position = self.getNodePosition(number)
+            n = None
+            n = self.addStop(n, self.editorStopMappings, connectionType, number, clickManagers, position[0], position[1])
+            n = self.addDestination(n, self.editorDestinationMappings, connectionType, number, clickManagers, position[0], position[1])
+
+            if n is None:
+                n = EditorNode(self.spriteRenderer, self.groups, number, connectionType, position[0], position[1], clickManagers[0], clickManagers[1], clickManagers[2])
+            self.appendNode(n)
+
+        if connectionType in self.map["connections"]:
+            for connection in self.map["connections"][connectionType]:
+                self.addConnections(connectionType, self.getNode(connection[0]), self.getNode(connection[1]))
 
 
     # Load the transportation to the grid on a specified connection 
@@ -302,13 +428,9 @@ class GridManager:
 
         # For each transportation in the map
         for transport in self.map["transport"][connectionType]:      
-            possibleConnections = []
-
-            # for each connection, find the connection of the transportation
-            for connection in self.connections:
-                # Ensure it is on the right connection going in the right direction
-                if connection.getFrom().getNumber() == transport["location"]:
-                    possibleConnections.append(connection)
+            # the connections going out of the node the transportation is on
+            node = self.getNode(transport["location"])
+            possibleConnections = [] if node is None else list(node.getConnections())
 
             # pick a random connection to change the direction
             if len(possibleConnections) > 0:
@@ -327,17 +449,3 @@ class GridManager:
     def removeTransport(self, transport):
         self.transports.remove(transport)
         transport.remove()
-
-           
-    @staticmethod
-    def getMapValues(width, height, reverse = False):
-        mapValues = {}
-        nodes = 0
-        for x in range(0, width):
-            for y in range(0, height):
-                if reverse:
-                    mapValues[(x, y)] = nodes
-                else:
-                    mapValues[nodes] = (x, y)
-                nodes += 1
-        return mapValues
\ No newline at end of file
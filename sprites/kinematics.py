@@ -0,0 +1,258 @@
+import pygame
+from pygame.locals import *
+from config import *
+import numpy
+
+from speedProfile import SpeedProfile
+
+vec = pygame.math.Vector2
+
+
+# Moves all the people and transports in one step each frame.
+#
+# The position, target and speed of every person and transport is kept in
+# arrays (one row each) instead of on the sprites, so the velocities, arrivals
+# and drawn positions can be worked out for all of them at once. The sprites
+# only keep the index of their row, they set where they are going when it
+# changes and are told when they have moved or arrived.
+#
+# People are moved a frame at a time. Transports are sent along a route
+# instead: a speed profile and the time they left, and their arrival is
+# scheduled, so they arrive at exactly the right time no matter how long the
+# step is. Where everything is drawn is
+# only worked out once a frame, so the steps in between (i.e when fast
+# forwarding) are never drawn.
+class Kinematics:
+    def __init__(self, spriteRenderer, capacity = 64):
+        self.spriteRenderer = spriteRenderer
+        self.game = self.spriteRenderer.game
+        self.scheduler = self.spriteRenderer.getScheduler()
+        self.capacity = capacity
+        self.clear()
+
+
+    # Remove every row, i.e when a new level is loaded
+    def clear(self):
+        self.positions = numpy.zeros((self.capacity, 2))
+        self.targets = numpy.zeros((self.capacity, 2))
+        self.speeds = numpy.zeros(self.capacity)
+        self.arriveDistances = numpy.zeros(self.capacity)
+        self.moving = numpy.zeros(self.capacity, dtype = bool)
+        self.dirty = numpy.zeros(self.capacity, dtype = bool) # moved since they were last drawn
+
+        # Routes of the transports
+        self.starts = numpy.zeros((self.capacity, 2))
+        self.directions = numpy.zeros((self.capacity, 2))
+        self.departures = numpy.zeros(self.capacity)
+        self.travelling = numpy.zeros(self.capacity, dtype = bool)
+        self.profiles = [None] * self.capacity
+        self.arrivals = [None] * self.capacity # the scheduled arrival of each route
+        SpeedProfile.clear()
+
+        self.sprites = [None] * self.capacity
+        self.motions = [None] * self.capacity # what each row was last told to do, so unchanged motions aren't written again
+        self.free = []
+        self.count = 0 # rows in use, including free rows below the last used row
+
+
+    def getCount(self):
+        return self.count - len(self.free)
+
+
+    def getPosition(self, index):
+        if self.travelling[index]:
+            pos = self.getRoutePosition(index, self.getTime())
+            return vec(pos[0], pos[1])
+        return vec(self.positions[index, 0], self.positions[index, 1])
+
+
+    def setPosition(self, index, pos):
+        self.positions[index] = (pos[0], pos[1])
+        self.dirty[index] = True
+
+
+    # Make the arrays bigger when every row is used
+    def grow(self):
+        size = self.capacity
+        self.capacity *= 2
+
+        for name in ('positions', 'targets', 'speeds', 'arriveDistances', 'moving', 'dirty', 'starts', 'directions', 'departures', 'travelling'):
+            old = getattr(self, name)
+            new = numpy.zeros((self.capacity, ) + old.shape[1:], dtype = old.dtype)
+            new[:size] = old
+            setattr(self, name, new)
+
+        self.sprites += [None] * size
+        self.motions += [None] * size
+        self.profiles += [None] * size
+        self.arrivals += [None] * size
+
+
+    # Add a row for a sprite, returning its index
+    def add(self, sprite):
+        if len(self.free) > 0:
+            index = self.free.pop()
+        else:
+            if self.count >= self.capacity:
+                self.grow()
+            index = self.count
+            self.count += 1
+
+        self.sprites[index] = sprite
+        self.motions[index] = None
+        self.moving[index] = False
+        self.travelling[index] = False
+        return index
+
+
+    # Remove the row of a sprite, only if the row still belongs to the sprite (it may have been cleared with the level)
+    def remove(self, index, sprite):
+        if index >= self.count or self.sprites[index] is not sprite:
+            return
+
+        self.stop(index)
+        self.sprites[index] = None
+        self.motions[index] = None
+        self.profiles[index] = None
+        self.free.append(index)
+
+
+    # Move the sprite towards a node a frame at a time, arriving when it is within the arrive distance
+    def setMotion(self, index, node, offset, speed, arriveDistance):
+        motion = (node, speed)
+        if self.moving[index] and self.motions[index] == motion:
+            return
+
+        self.motions[index] = motion
+        self.targets[index] = (node.pos - node.offset) + offset
+        self.speeds[index] = speed
+        self.arriveDistances[index] = arriveDistance
+        self.moving[index] = True
+        self.travelling[index] = False
+
+
+    # Send the sprite to a node along a speed profile, leaving now (or at the time of the event being run)
+    def setRoute(self, index, node, offset, speed, speedUp = False, slowDown = False):
+        motion = (node, speed, speedUp, slowDown)
+        if self.travelling[index] and self.motions[index] == motion:
+            return
+
+        time = self.getTime()
+
+        # Where its going has changed part way along the route, so carry on from where it is without speeding up again
+        if self.travelling[index]:
+            self.positions[index] = self.getRoutePosition(index, time)
+            speedUp = False
+
+        target = (node.pos - node.offset) + offset
+        self.targets[index] = target
+        self.starts[index] = self.positions[index]
+
+        dxy = self.targets[index] - self.starts[index]
+        distance = numpy.hypot(dxy[0], dxy[1])
+        self.directions[index] = dxy / distance if distance > 0 else (0, 0)
+
+        profile = SpeedProfile.get(distance, speed, speedUp, slowDown)
+        self.profiles[index] = profile
+        self.departures[index] = time
+        self.scheduler.cancel(self.arrivals[index])
+        self.arrivals[index] = self.scheduler.schedule(time + profile.getDuration(), self.arrive, index, self.sprites[index])
+
+        self.motions[index] = motion
+        self.moving[index] = False
+        self.travelling[index] = True
+
+
+    # Return where a sprite on a route is at a time
+    def getRoutePosition(self, index, time):
+        distance = self.profiles[index].getDistanceAt(time - self.departures[index])
+        return self.starts[index] + self.directions[index] * distance
+
+
+    # Return true if the sprite is on a route
+    def getTravelling(self, index):
+        return bool(self.travelling[index])
+
+
+    # Return how far a sprite on a route still has to go to reach the node it is travelling to
+    def getRemainingDistance(self, index):
+        profile = self.profiles[index]
+        return profile.getDistance() - profile.getDistanceAt(self.getTime() - self.departures[index])
+
+
+    def getTime(self):
+        return self.scheduler.getTime()
+
+
+    def stop(self, index):
+        self.moving[index] = False
+        self.travelling[index] = False
+        self.scheduler.cancel(self.arrivals[index])
+        self.arrivals[index] = None
+
+
+    # Move every sprite on by an amount of time, the sprites on a route arrive when their arrival is run by the scheduler
+    def step(self, dt):
+        self.moveSprites(dt)
+
+
+    # Tell a sprite on a route that it has arrived, if the row still belongs to it
+    def arrive(self, index, sprite):
+        if self.sprites[index] is not sprite or not self.travelling[index]:
+            return
+
+        self.arrivals[index] = None
+        self.travelling[index] = False
+        self.positions[index] = self.targets[index]
+        sprite.arrive(self.motions[index][0])
+
+
+    # Work out where the sprites which have moved are drawn and tell them they have moved, this only has to be done when they are drawn
+    def place(self):
+        travelling = numpy.flatnonzero(self.travelling[:self.count])
+        if len(travelling) > 0:
+            time = self.spriteRenderer.getTime()
+            distances = numpy.array([self.profiles[index].getDistanceAt(time - self.departures[index]) for index in travelling.tolist()])
+            self.positions[travelling] = self.starts[travelling] + self.directions[travelling] * distances[:, None]
+
+        indexes = numpy.flatnonzero(self.travelling[:self.count] | self.dirty[:self.count])
+        self.dirty[:self.count] = False
+        if len(indexes) <= 0:
+            return
+
+        camera = self.spriteRenderer.getCamera()
+        scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        drawn = self.positions[indexes] * scale + tuple(camera.getOrigin())
+
+        for index, pos in zip(indexes.tolist(), drawn.tolist()):
+            sprite = self.sprites[index]
+            if sprite is not None and hasattr(sprite, 'rect'):
+                sprite.rect.topleft = pos
+                sprite.moved()
+
+
+    # Move the sprites that move a step at a time, never past their target
+    def moveSprites(self, dt):
+        count = self.count
+        moving = self.moving[:count]
+        if not moving.any():
+            return
+
+        positions = self.positions[:count]
+        dxy = self.targets[:count] - positions
+        dis = numpy.hypot(dxy[:, 0], dxy[:, 1])
+        arrived = moving & (dis < self.arriveDistances[:count])
+        going = moving & ~arrived
+
+        step = numpy.minimum(self.speeds[:count] * dt, dis)
+        with numpy.errstate(divide = 'ignore', invalid = 'ignore'):
+            vel = dxy * (step / dis)[:, None]
+
+        positions[going] += vel[going]
+        self.dirty[:count] |= going
+
+        # Arriving can change what other sprites are doing, so only tell the sprites once everything has moved
+        for index in numpy.flatnonzero(arrived).tolist():
+            if self.sprites[index] is not None and self.moving[index]:
+                self.moving[index] = False
+                self.sprites[index].arrive(self.motions[index][0])
@@ -5,10 +5,13 @@ from config import *
 import os
 import random
 import math
+import bisect
+from collections import Counter
 
 from gridManager import *
 from connection import *
 from person import *
+from entitySet import EntitySet
 
 
 vec = pygame.math.Vector2
@@ -26,9 +29,14 @@ class Layer():
         self.grid = GridManager(self, self.groups, self.level, spacing) # each layer has its own grid manager
 
         self.components = []
-        self.lines = []
-        self.previousPeopleTypes = []
-        self.people = []
+        self.lines = {} # lines drawn for each connection, keyed by the connection
+        self.preview = None # key of the lines previewing a connection that hasn't been made yet
+        self.batching = False # when batching, redraws are saved and done together at the end of the batch
+        self.batchAreas = [] # areas to redraw at the end of the batch, areas which overlap are merged
+        self.spawnTable = None # the nodes each type of person can spawn at or go to, made when the first person is spawned
+        self.spawnDestinations = None
+        self.peopleCounts = Counter() # how many of each type of person have spawned
+        self.people = EntitySet()
 
         self.number = 1
 
@@ -53,10 +61,21 @@ class Layer():
             return self.lineSurface
 
 
+    # Give the line surface back to the surface pool when the layer is no longer being used
+    def releaseSurface(self):
+        if hasattr(self, 'lineSurface'):
+            self.game.surfacePool.release(self.lineSurface)
+            del self.lineSurface
+
+
     def getNumber(self):
         return self.number
 
 
+    def getBackgroundColor(self):
+        return self.backgroundColor
+
+
     def getPeople(self):
         return self.people
 
@@ -66,16 +85,10 @@ class Layer():
 
 
     def addPerson(self, person):
-        if person in self.people:
-            return 
-
-        self.people.append(person)
+        self.people.add(person)
 
     
     def removePerson(self, person):
-        if person not in self.people:
-            return
-
         self.people.remove(person)
 
 
@@ -101,16 +114,6 @@ class Layer():
             connection.getFrom().removeConnection(connection)
 
 
-    def addTempConnections(self, connections):
-        for connection in connections:
-            connection.getFrom().addConnection(connection)
-
-
-    def removeTempConnections(self):
-        for connection in self.grid.getTempConnections():
-            connection.getFrom().removeConnection(connection)
-
-
     # Add a person to the layer
     def createPerson(self, destinations = None):
         # No nodes in the layer to add the person to, or no entrances for person to come from
@@ -119,40 +122,106 @@ class Layer():
         if len(self.grid.getNodes()) <= 0 or len(destinations) <= 0:
             return 
 
-        peopleTypes = [Manager, Commuter]
-        peopleTypes, weights = Person.checkPeopleTypes(peopleTypes, self.previousPeopleTypes, destinations)
+        # Only work out which people can spawn again if the destinations have changed
+        if self.spawnTable is None or destinations is not self.spawnDestinations:
+            self.spawnTable = Person.createSpawnTable([Manager, Commuter], destinations)
+            self.spawnDestinations = destinations
 
         # no people can spawn, return
-        if len(peopleTypes) <= 0 or len(weights) <= 0:
+        peopleTypes = list(self.spawnTable.keys())
+        if len(peopleTypes) <= 0:
             return
 
-        picks = [v for v, w in zip(peopleTypes, weights) for x in range(w)]
+        weights = Person.getSpawnWeights(peopleTypes, self.peopleCounts)
+        if weights[-1] <= 0:
+            return
 
-        p = random.choice(picks)(self.spriteRenderer, self.groups, self.spriteRenderer.getPersonClickManager(), self.spriteRenderer.getTransportClickManager(), destinations)
-        self.previousPeopleTypes.append(type(p))
+        personType = peopleTypes[bisect.bisect_right(weights, random.random() * weights[-1])]
+        p = personType(self.spriteRenderer, self.groups, self.spriteRenderer.getPersonClickManager(), self.spriteRenderer.getTransportClickManager(), self.spawnTable[personType])
+        self.peopleCounts[personType] += 1
 
         self.spriteRenderer.setTotalPeople(self.spriteRenderer.getTotalPeople() + 1)
         return p
 
 
-    # Create the connections by drawing them to the screen
+    # Create the connections by drawing them to the screen, this rebuilds every line so should only be used when the layer is first made or resized
     def createConnections(self):
-        connections = self.grid.getTempConnections() + self.grid.getConnections()
-        self.lines = []
-        for connection in connections:
+        self.lines = {}
+        for connection in self.grid.getConnections():
             if connection.getDraw():
-                self.createLines(connection.getColor(), connection.getFrom(), connection.getTo(), 10, 10)
+                self.lines[connection] = self.createConnectionLines(connection)
 
-                if connection.getSideColor() is not None:
-                    self.createLines(connection.getSideColor(), connection.getFrom(), connection.getTo(), 3, 6)
-                    self.createLines(connection.getSideColor(), connection.getFrom(), connection.getTo(), 3, 14)
+        if self.preview is not None:
+            self.lines[self.preview] = self.createPreviewLines(self.preview[1], self.preview[2])
         self.render()
 
 
-    # Word out the x and y of each connection and append it to the list
-    def createLines(self, color, fromNode, toNode, thickness, offset):
+    # Add the lines for a single connection, only redrawing the area of the surface the connection covers
+    def addConnectionLines(self, connection):
+        if not connection.getDraw():
+            return
+
+        self.lines[connection] = self.createConnectionLines(connection)
+        self.redrawArea(self.getDrawnRect(self.getConnectionRect(connection)))
+
+
+    # Remove the lines of a single connection, only redrawing the area of the surface the connection covered
+    def removeConnectionLines(self, connection):
+        if connection not in self.lines:
+            return
+
+        rect = self.getDrawnRect(self.getConnectionRect(connection))
+        del self.lines[connection]
+        self.redrawArea(rect)
+
+
+    # Recalculate the lines of a connection (i.e when its colour changes) and redraw the area it covers
+    def updateConnectionLines(self, connection):
+        if connection not in self.lines:
+            return
+
+        self.lines[connection] = self.createConnectionLines(connection)
+        self.redrawArea(self.getDrawnRect(self.getConnectionRect(connection)))
+
+
+    # Return the lines (the main line and the side lines) that make up a connection
+    def createConnectionLines(self, connection):
+        fromNode, toNode = connection.getFrom(), connection.getTo()
+        return self.createPathLines(connection.getColor(), connection.getSideColor(), fromNode.pos - fromNode.offset, toNode.pos - toNode.offset)
+
+
+    # Return the main line and the side lines between two positions on the grid
+    def createPathLines(self, color, sideColor, start, end):
+        lines = [self.createLines(color, start, end, 10, 10)]
+
+        if sideColor is not None:
+            lines.append(self.createLines(sideColor, start, end, 3, 6))
+            lines.append(self.createLines(sideColor, start, end, 3, 14))
+        return lines
+
+
+    # Return the area of the level covered by every line, or None if there are no lines
+    def getLinesRect(self):
+        rects = [line["rect"] for lines in self.lines.values() for line in lines]
+        return rects[0].unionall(rects[1:]) if len(rects) > 0 else None
+
+
+    # Return the bounding rect of all the lines in a connection
+    def getConnectionRect(self, connection):
+        lines = self.lines[connection]
+        return lines[0]["rect"].unionall([line["rect"] for line in lines[1:]])
+
+
+    # Return where an area of the level is on the line surface, which is drawn with the camera origin added
+    def getDrawnRect(self, rect):
+        return rect.move(self.spriteRenderer.getCamera().getOrigin())
+
+
+    # Work out the x and y of each connection and return it along with the area it covers, at the current scale
+    # but without the camera origin so the lines don't have to be made again when the camera pans
+    def createLines(self, color, start, end, thickness, offset):
         scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
-        dxy = (fromNode.pos - fromNode.offset) - (toNode.pos - toNode.offset) # change in direction
+        dxy = start - end # change in direction
         angle = math.atan2(dxy.x, dxy.y)
         angle = abs(math.degrees(angle))
 
@@ -166,15 +235,20 @@ class Layer():
         else:
             angleOffset = vec(offset, offset)
 
-        posx = ((fromNode.pos - fromNode.offset) + angleOffset) * scale
-        posy = ((toNode.pos - toNode.offset) + angleOffset) * scale
-        
-        self.lines.append({
+        posx = (start + angleOffset) * scale
+        posy = (end + angleOffset) * scale
+
+        # Pad the rect by the thickness of the line so the ends of the line are included
+        padding = int(thickness * scale) * 2 + 2
+        rect = pygame.Rect(min(posx.x, posy.x), min(posx.y, posy.y), abs(posx.x - posy.x), abs(posx.y - posy.y)).inflate(padding, padding)
+
+        return {
             "posx": posx,
             "posy": posy,
             "color": color,
-            "thickness": thickness * scale
-        })
+            "thickness": thickness * scale,
+            "rect": rect
+        }
 
 
     def resize(self):
@@ -193,16 +267,27 @@ class Layer():
             self.backgroundColor = default
 
 
+    # Draw every line on the layer to the line surface, the surface is only remade when the screen size has changed
     def render(self, nodes = None):
-        self.lineSurface = pygame.Surface((int(config["graphics"]["displayWidth"] * self.game.renderer.getScale()), 
-                                            int(config["graphics"]["displayHeight"] * self.game.renderer.getScale()))).convert()
+        size = settings.graphics.scaledSize
+
+        if not hasattr(self, 'lineSurface') or self.lineSurface.get_size() != size:
+            self.releaseSurface()
+            self.lineSurface = self.game.surfacePool.acquire(self.connectionType, size)
         self.lineSurface.fill(self.backgroundColor)
 
         for component in self.components:
             component.draw(self.lineSurface)
 
-        for line in self.lines:
-            pygame.draw.line(self.lineSurface, line["color"], line["posx"], line["posy"], int(line["thickness"]))
+        # Only draw the lines which are on the surface, the rest of the level is drawn when the camera moves to it
+        origin = self.spriteRenderer.getCamera().getOrigin()
+        area = self.lineSurface.get_rect(topleft = -origin)
+        for lines in self.lines.values():
+            for line in lines:
+                if line["rect"].colliderect(area):
+                    self.drawLine(self.lineSurface, line, origin)
+
+        self.drawGrid(self.lineSurface)
 
         if nodes is not None:
             for node in nodes:
@@ -210,11 +295,131 @@ class Layer():
                 self.lineSurface.blit(node.image, (node.rect))
 
 
+    # Draw a line at its place on the surface, with the camera origin added
+    def drawLine(self, surface, line, origin):
+        pygame.draw.line(surface, line["color"], line["posx"] + origin, line["posy"] + origin, int(line["thickness"]))
+
+
+    # Move the line surface with the camera, only drawing the strips of the level that have come onto the surface
+    def pan(self, amount):
+        if not hasattr(self, 'lineSurface'):
+            return
+
+        width, height = self.lineSurface.get_size()
+        dx, dy = int(amount[0]), int(amount[1])
+        if abs(dx) >= width or abs(dy) >= height:
+            self.render()
+            return
+
+        self.lineSurface.scroll(dx, dy)
+        top = max(0, dy)
+        bottom = height + min(0, dy)
+        self.redrawAreas([rect for rect in (
+            pygame.Rect(0 if dx > 0 else width + dx, top, abs(dx), bottom - top),
+            pygame.Rect(0, 0 if dy > 0 else height + dy, width, abs(dy))) if rect.width > 0 and rect.height > 0])
+
+
+    # Save any redraws until the batch has ended so they are only drawn once
+    def beginBatch(self):
+        self.batching = True
+
+
+    def endBatch(self):
+        self.batching = False
+
+        if len(self.batchAreas) > 0:
+            rects = self.batchAreas
+            self.batchAreas = []
+            self.redrawAreas(rects)
+
+
+    # Redraw only the lines within the given area of the line surface
+    def redrawArea(self, rect):
+        if self.batching:
+            self.addBatchArea(rect)
+            return
+
+        self.redrawAreas([rect])
+
+
+    # Add an area to the batch, keeping the areas from overlapping so nothing is drawn twice. Overlapping areas are only merged
+    # when together they make a rectangle, otherwise the new area is cut around the old one so the space around them isn't redrawn
+    def addBatchArea(self, rect):
+        pending = [pygame.Rect(rect)]
+
+        while len(pending) > 0:
+            rect = pending.pop()
+            if rect.width <= 0 or rect.height <= 0:
+                continue
+
+            index = rect.collidelist(self.batchAreas)
+            if index == -1:
+                self.batchAreas.append(rect)
+                continue
+
+            area = self.batchAreas[index]
+            if area.contains(rect):
+                continue
+
+            union = rect.union(area)
+            overlap = rect.clip(area)
+            if union.width * union.height == rect.width * rect.height + area.width * area.height - overlap.width * overlap.height:
+                self.batchAreas.pop(index)
+                pending.append(union)
+            else:
+                pending += self.cutRect(rect, area)
+
+
+    # Return the parts of a rect which are outside of another rect
+    @staticmethod
+    def cutRect(rect, other):
+        top = max(rect.top, other.top)
+        bottom = min(rect.bottom, other.bottom)
+
+        return [
+            pygame.Rect(rect.left, rect.top, rect.width, top - rect.top),
+            pygame.Rect(rect.left, bottom, rect.width, rect.bottom - bottom),
+            pygame.Rect(rect.left, top, other.left - rect.left, bottom - top),
+            pygame.Rect(other.right, top, rect.right - other.right, bottom - top)]
+
+
+    # Redraw the lines within each of the areas, going through the lines once for all the areas
+    def redrawAreas(self, rects):
+        if not hasattr(self, 'lineSurface'):
+            self.render()
+            return
+
+        for rect in rects:
+            self.lineSurface.set_clip(rect)
+            self.lineSurface.fill(self.backgroundColor, rect)
+
+            for component in self.components:
+                component.draw(self.lineSurface)
+
+        origin = self.spriteRenderer.getCamera().getOrigin()
+        for lines in self.lines.values():
+            for line in lines:
+                for index in line["rect"].move(origin).collidelistall(rects):
+                    self.lineSurface.set_clip(rects[index])
+                    self.drawLine(self.lineSurface, line, origin)
+
+        for rect in rects:
+            self.lineSurface.set_clip(rect)
+            self.drawGrid(self.lineSurface, rect)
+
+        self.lineSurface.set_clip(None)
+
+
+    # Draw anything that goes above the lines, within the rect if given
+    def drawGrid(self, surface, rect = None):
+        pass
+
+
     def draw(self):
         if len(self.lines) > 0:
             self.game.renderer.gameDisplay.blit(self.lineSurface, (0, 0))
         else:
-            pygame.draw.rect(self.game.renderer.gameDisplay, self.backgroundColor, (0, 0, config["graphics"]["displayWidth"] * self.game.renderer.getScale(), config["graphics"]["displayHeight"] * self.game.renderer.getScale()))
+            pygame.draw.rect(self.game.renderer.gameDisplay, self.backgroundColor, (0, 0, settings.graphics.scaledWidth, settings.graphics.scaledHeight))
 
 
 class Layer1(Layer):
@@ -248,11 +453,11 @@ class Layer4(Layer):
     def __init__(self, spriteRenderer, groups, level):
         super().__init__(spriteRenderer, groups, "layer 4", level)
         self.number = 4
-        background = Background(self.game, "river", (600, 250), (config["graphics"]["displayWidth"] - 600, config["graphics"]["displayHeight"] - 250))
+        background = Background(self.game, "river", (600, 250), (settings.graphics.displayWidth - 600, settings.graphics.displayHeight - 250))
         # self.addComponent(background)
 
     def addLayerLines(self, layer1, layer2, layer3):
-        lines = layer1.getLines() + layer2.getLines() + layer3.getLines()
+        lines = {**layer1.getLines(), **layer2.getLines(), **layer3.getLines()}
         self.lines = lines
         self.render()
 
@@ -260,11 +465,11 @@ class Layer4(Layer):
 class MenuLayer4(Layer):
     def __init__(self, spriteRenderer, groups, level):
         super().__init__(spriteRenderer, groups, "layer 4", level)
-        background = Background(self.game, "river", (600, 250), (config["graphics"]["displayWidth"] - 600, config["graphics"]["displayHeight"] - 250))
+        background = Background(self.game, "river", (600, 250), (settings.graphics.displayWidth - 600, settings.graphics.displayHeight - 250))
         # self.addComponent(background)
 
     def addLayerLines(self, layer1, layer2, layer3):
-        lines = layer1.getLines() + layer2.getLines() + layer3.getLines()
+        lines = {**layer1.getLines(), **layer2.getLines(), **layer3.getLines()}
         nodes = layer1.getGrid().getNodes() + layer2.getGrid().getNodes() + layer3.getGrid().getNodes()
         
         self.spriteRenderer.removeDuplicates(nodes, nodes)
@@ -273,7 +478,153 @@ class MenuLayer4(Layer):
         self.render(nodes)
 
 
-class EditorLayer1(Layer):
+class EditorLayer(Layer):
+    previewColors = {"layer 1": TEMPRED, "layer 2": TEMPGREY, "layer 3": TEMPGREEN}
+
+    def __init__(self, spriteRenderer, groups, connectionType, level = None):
+        super().__init__(spriteRenderer, groups, connectionType, level)
+        self.emptyNodeImage = None
+        self.tempNodes = set() # nodes added to empty positions, which are removed again once they aren't used
+
+
+    # Return true if there is no node at the node number, so it can be drawn as an empty node
+    def isEmptyNode(self, number):
+        return self.grid.getNode(number) is None
+
+
+    def getNodeRect(self, number):
+        scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        return self.emptyNodeImage.get_rect(topleft = vec(self.grid.getNodePosition(number)) * scale + self.spriteRenderer.getCamera().getOrigin())
+
+
+    # Return the number of the node position the point is over, or None if its not over a node position
+    def getNumberAt(self, pos):
+        scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        start = self.grid.getNodePosition(0)
+        pos = vec(pos) - self.spriteRenderer.getCamera().getOrigin()
+        x, offx = divmod(pos[0] / scale - start[0], GridManager.nodeSpacing)
+        y, offy = divmod(pos[1] / scale - start[1], GridManager.nodeSpacing)
+        size = self.emptyNodeImage.get_width() / scale
+
+        if self.grid.isOnGrid(x, y) and offx < size and offy < size:
+            return self.grid.getNodeNumber(int(x), int(y))
+
+
+    # Return the first and last x and y positions on the grid which could be drawn within the area
+    def getGridArea(self, rect):
+        scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        start = self.grid.getNodePosition(0)
+        size = self.emptyNodeImage.get_width() / scale
+        origin = self.spriteRenderer.getCamera().getOrigin()
+
+        x1 = max(0, math.floor(((rect.left - origin.x) / scale - start[0] - size) / GridManager.nodeSpacing))
+        y1 = max(0, math.floor(((rect.top - origin.y) / scale - start[1] - size) / GridManager.nodeSpacing))
+        x2 = min(self.grid.width - 1, math.ceil(((rect.right - origin.x) / scale - start[0]) / GridManager.nodeSpacing))
+        y2 = min(self.grid.height - 1, math.ceil(((rect.bottom - origin.y) / scale - start[1]) / GridManager.nodeSpacing))
+        return x1, y1, x2, y2
+
+
+    # Return the node at the node number, adding a node to the grid if the position is empty
+    def getNode(self, number):
+        node = self.grid.getNode(number)
+
+        if node is None:
+            node = self.grid.addEditorNode(self.connectionType, number)
+            self.tempNodes.add(node)
+            self.redrawArea(self.getNodeRect(number))
+        return node
+
+
+    # Add a node that might not be used anymore (i.e its connections or stop have been removed), so it is checked the next time unused nodes are removed
+    def addTempNode(self, node):
+        if not isinstance(node, (Stop, Destination)):
+            self.tempNodes.add(node)
+
+
+    def removeConnections(self, connections = None):
+        if connections is None:
+            connections = self.grid.getConnections()
+
+        super().removeConnections(connections)
+
+        for connection in connections:
+            self.addTempNode(connection.getFrom())
+
+
+    # Remove the added nodes which aren't being used, these are drawn as empty nodes on the line surface instead, returns false if
+    # any unused nodes had to be kept because the mouse is still over them
+    def removeUnusedNodes(self, keepNodes = None):
+        keepNodes = set() if keepNodes is None else set(keepNodes)
+        removed = True
+
+        for node in list(self.tempNodes):
+            # The node has been replaced (i.e by a stop) or is being used, so its no longer temporary
+            if self.grid.getNode(node.getNumber()) is not node or len(node.getConnections()) > 0 or len(node.getTransports()) > 0:
+                self.tempNodes.discard(node)
+
+            elif node.getMouseOver():
+                removed = False
+
+            elif node not in keepNodes:
+                self.tempNodes.discard(node)
+                self.grid.removeNode(node)
+                self.redrawArea(self.getNodeRect(node.getNumber()))
+
+        return removed
+
+
+    # Preview the connection between two node positions, the lines are worked out from the grid positions so no nodes are added for it
+    def setPreview(self, startNumber, endNumber):
+        self.removePreview()
+        self.preview = (self.connectionType, startNumber, endNumber)
+        self.lines[self.preview] = self.createPreviewLines(startNumber, endNumber)
+        self.redrawArea(self.getDrawnRect(self.getConnectionRect(self.preview)))
+
+
+    def removePreview(self):
+        if self.preview is None:
+            return
+
+        rect = self.getDrawnRect(self.getConnectionRect(self.preview))
+        del self.lines[self.preview]
+        self.preview = None
+        self.redrawArea(rect)
+
+
+    # Return the lines of the preview, drawn the same as a temporary connection between the two positions
+    def createPreviewLines(self, startNumber, endNumber):
+        return self.createPathLines(self.previewColors[self.connectionType], BLACK, vec(self.grid.getNodePosition(startNumber)), vec(self.grid.getNodePosition(endNumber)))
+
+
+    # Draw a single pre-rendered node at every position within the area that doesnt have a node, instead of each having its own sprite
+    def drawGrid(self, surface, rect = None):
+        if self.emptyNodeImage is None or rect is None:
+            self.emptyNodeImage = self.game.imageLoader.getImage("node", (20 * self.spriteRenderer.getFixedScale(), 20 * self.spriteRenderer.getFixedScale()))
+
+        scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        x1, y1, x2, y2 = self.getGridArea(surface.get_rect() if rect is None else rect)
+        blits = []
+
+        # Work out the position of each row and column once, rather than for every position
+        origin = self.spriteRenderer.getCamera().getOrigin()
+        rows = [self.emptyNodeImage.get_rect(top = self.grid.getNodePosition(self.grid.getNodeNumber(0, y))[1] * scale + origin.y).top for y in range(y1, y2 + 1)]
+
+        for x in range(x1, x2 + 1):
+            left = self.emptyNodeImage.get_rect(left = self.grid.getNodePosition(self.grid.getNodeNumber(x, 0))[0] * scale + origin.x).left
+
+            for y, top in zip(range(y1, y2 + 1), rows):
+                if self.isEmptyNode(self.grid.getNodeNumber(x, y)):
+                    blits.append((self.emptyNodeImage, (left, top)))
+
+        surface.blits(blits, False)
+
+
+    # Always draw the line surface, since it has the empty nodes on it
+    def draw(self):
+        self.game.renderer.gameDisplay.blit(self.lineSurface, (0, 0))
+
+
+class EditorLayer1(EditorLayer):
     def __init__(self, spriteRenderer, groups, level = None):
         super().__init__(spriteRenderer, groups, "layer 1", level)
         self.grid.createFullGrid(self.connectionType)
@@ -281,7 +632,7 @@ class EditorLayer1(Layer):
         self.createConnections()
 
 
-class EditorLayer2(Layer):
+class EditorLayer2(EditorLayer):
     def __init__(self, spriteRenderer, groups, level = None):
         super().__init__(spriteRenderer, groups, "layer 2", level)
         self.grid.createFullGrid(self.connectionType)
@@ -289,7 +640,7 @@ class EditorLayer2(Layer):
         self.createConnections()
 
 
-class EditorLayer3(Layer):
+class EditorLayer3(EditorLayer):
     def __init__(self, spriteRenderer, groups, level = None):
         super().__init__(spriteRenderer, groups, "layer 3", level)
         self.grid.createFullGrid(self.connectionType)
@@ -297,12 +648,21 @@ class EditorLayer3(Layer):
         self.createConnections()
 
 
-class EditorLayer4(Layer):
+class EditorLayer4(EditorLayer):
     def __init__(self, spriteRenderer, groups, level = None):
         super().__init__(spriteRenderer, groups, "layer 4", level)
+        self.layers = []
+
+    # A position is only empty on the top layer if its empty on every other layer
+    def isEmptyNode(self, number):
+        for layer in self.layers:
+            if not layer.isEmptyNode(number):
+                return False
+        return True
 
     def addLayerLines(self, layer1, layer2, layer3):
-        lines = layer1.getLines() + layer2.getLines() + layer3.getLines()
+        self.layers = [layer1, layer2, layer3]
+        lines = {**layer1.getLines(), **layer2.getLines(), **layer3.getLines()}
         self.lines = lines
         self.render()
 
@@ -55,7 +55,7 @@ class MeterController(pygame.sprite.Sprite):
                 self.updateAmount(-self.decreaseSpeed)
             # We have reached the end of the meter
             else:
-                self.game.audioLoader.playSound("slowOut", 1)
+                self.game.audioLoader.playSound("slowOut")
                 self.empty = True
                 self.spriteRenderer.setDt(self.spriteRenderer.getStartDt())
                 if self.amount < self.totalAmount:
@@ -7,6 +7,7 @@ import math
 
 import clickManager as CLICKMANAGER
 import person as PERSON
+from entitySet import EntitySet
 
 vec = pygame.math.Vector2
 
@@ -31,10 +32,10 @@ class Node(pygame.sprite.Sprite):
         self.connections = []
 
         # all transport currently at this node
-        self.transports = []
+        self.transports = EntitySet()
 
         # all people currently at this node
-        self.people = []
+        self.people = EntitySet()
         self.personHolder = PERSON.PersonHolder(self.game, self.groups, self)
 
         self.dirty = True
@@ -61,7 +62,7 @@ class Node(pygame.sprite.Sprite):
         return self.transports
 
 
-    # Return the people, as a list, currently at the node
+    # Return the people currently at the node
     def getPeople(self):
         return self.people
 
@@ -95,7 +96,7 @@ class Node(pygame.sprite.Sprite):
 
 
     def setTransports(self, transports = []):
-        self.transports = transports
+        self.transports = EntitySet(transports)
 
     
     def setMouseOver(self, mouseOver):
@@ -105,7 +106,7 @@ class Node(pygame.sprite.Sprite):
 
     # Add a transport to the node
     def addTransport(self, transport):
-        self.transports.append(transport)
+        self.transports.add(transport)
 
 
     def remove(self):
@@ -114,24 +115,15 @@ class Node(pygame.sprite.Sprite):
     
     # Add a person to the node
     def addPerson(self, person):
-        if person in self.people:
-            return 
-            
-        self.people.append(person)
+        self.people.add(person)
 
 
     # Remove a person from the node
     def removePerson(self, person):
-        if person not in self.people:
-            return
-
         self.people.remove(person)
 
 
     def removeTransport(self, transport):
-        if transport not in self.transports:
-            return
-
         self.transports.remove(transport)
 
 
@@ -141,10 +133,11 @@ class Node(pygame.sprite.Sprite):
 
     def drawOutline(self, color = YELLOW):
         scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        pos = self.spriteRenderer.getCamera().getDrawPosition(self.pos - vec(1, 1))
 
         offx = 0.01
         for x in range(1):
-            pygame.draw.arc(self.game.renderer.gameDisplay, color, ((self.pos.x - 1) * scale, (self.pos.y - 1) * scale, (self.width + 2) * scale, (self.height + 2) * scale), math.pi / 2 + offx, math.pi / 2, int(3.5 * scale))
+            pygame.draw.arc(self.game.renderer.gameDisplay, color, (pos.x, pos.y, (self.width + 2) * scale, (self.height + 2) * scale), math.pi / 2 + offx, math.pi / 2, int(3.5 * scale))
             offx += 0.02
 
 
@@ -152,7 +145,7 @@ class Node(pygame.sprite.Sprite):
         self.dirty = False
         self.image = self.game.imageLoader.getImage(self.images[self.currentImage], (self.width * self.spriteRenderer.getFixedScale(), self.height * self.spriteRenderer.getFixedScale()))
         self.rect = self.image.get_rect()
-        self.rect.topleft = self.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        self.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(self.pos)
 
 
     def makeSurface(self):
@@ -173,10 +166,7 @@ class Node(pygame.sprite.Sprite):
 
 
     def events(self):
-        mx, my = pygame.mouse.get_pos()
-        difference = self.game.renderer.getDifference()
-        mx -= difference[0]
-        my -= difference[1]
+        mx, my = self.spriteRenderer.getMousePos()
 
         # click event; setting the node for the transport
         if self.rect.collidepoint((mx, my)) and self.game.clickManager.getRightClicked() and self.transportClickManager.getTransport() is not None:
@@ -243,8 +233,9 @@ class Node(pygame.sprite.Sprite):
             self.dirty = True
 
 
+    # Only check for mouse events on nodes that can be seen through the camera (or the mouse is still over)
     def update(self):
-        if not self.dirty and not self.spriteRenderer.getPaused():
+        if not self.dirty and not self.spriteRenderer.getPaused() and (self.mouseOver or self.spriteRenderer.getCamera().isVisible(self.rect)):
             self.events()
 
 
@@ -260,10 +251,7 @@ class EditorNode(Node):
 
     # Override the events function
     def events(self):
-        mx, my = pygame.mouse.get_pos()
-        difference = self.game.renderer.getDifference()
-        mx -= difference[0]
-        my -= difference[1]
+        mx, my = self.spriteRenderer.getMousePos()
           
 
         # Cant click on a node in the top layer
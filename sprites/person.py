@@ -5,11 +5,12 @@ from config import *
 import os
 import random
 import math
-import numpy
+import itertools
 
 from engine import ImageLoader
 from enum import Enum
 import node as NODE
+from entitySet import EntitySet
 
 vec = pygame.math.Vector2
 
@@ -51,9 +52,14 @@ class Person(pygame.sprite.Sprite):
         self.startingConnectionType = "layer 2" #  always start on the second layer 
         self.currentConnectionType = self.currentNode.connectionType
 
+        # The position is stored in the kinematics, which moves every person at once
+        self.kinematics = self.spriteRenderer.getKinematics()
+        self.index = self.kinematics.add(self)
+        self.scheduler = self.spriteRenderer.getScheduler()
+        self.dispatcher = self.spriteRenderer.getDispatcher()
+
         self.offset = vec(-10, -15) #-10, -20 # Move it back 10 pixels x, 20 pixels y
         self.pos = (self.currentNode.pos + self.offset) - self.currentNode.offset
-        self.vel = vec(0, 0)
 
         self.speed = 20
         self.budget = 20
@@ -71,8 +77,8 @@ class Person(pygame.sprite.Sprite):
 
         self.statusIndicator = StatusIndicator(self.game, self.groups, self)
 
-        self.timer = random.randint(70, 100)
-        # self.timer = 5
+        # The person gives up and a life is lost when they run out of time
+        self.timerEvent = self.scheduler.scheduleIn(random.randint(70, 100), self.runOutOfTime)
         self.rad = 5
         self.step = 15
 
@@ -85,52 +91,62 @@ class Person(pygame.sprite.Sprite):
         self.spawnAnimation()
 
 
-    # static function to check which player types can spawn on the map dependent on the desitations available
+    # static function to check which player types can spawn on the map dependent on the desitations available,
+    # returning the nodes each of them can spawn at or go to. This only needs to be done once for each level
     @staticmethod
-    def checkPeopleTypes(peopleTypes, previousPeopleTypes, spawnDestinations):
-        possiblePlayerTypes = {}
-        finalPlayerTypes = []
-        finalPlayerWeights = []
+    def createSpawnTable(peopleTypes, spawnDestinations):
+        spawnTable = {}
 
         for person in peopleTypes:
-            possiblePlayerTypes[person] = {}
+            nodes = []
+            totalSpawns, totalDestinations = 0, 0
             for node in spawnDestinations:
                 if isinstance(node, person.getPossibleSpawns()):
-                    possiblePlayerTypes[person].setdefault('spawns', []).append(node)
+                    nodes.append(node)
+                    totalSpawns += 1
 
                 elif isinstance(node, person.getPossibleDestinations()):
-                    possiblePlayerTypes[person].setdefault('destinations', []).append(node)
-  
-        for person, spawnDestinations in possiblePlayerTypes.items():
+                    nodes.append(node)
+                    totalDestinations += 1
+
             # if there is more than one spawn node, we know there are two different types (spawn and destination)
-            if 'spawns' in spawnDestinations and len(spawnDestinations['spawns']) > 1:
-                finalPlayerTypes.append(person)
-                continue 
-            elif 'spawns' in spawnDestinations and 'destinations' in spawnDestinations:
-                finalPlayerTypes.append(person)
-                continue
-
-        # no players can spawn
-        if len(finalPlayerTypes) <= 0:
-            return [], []
-
-        weights = numpy.full(shape = len(finalPlayerTypes), fill_value = 100 / len(finalPlayerTypes), dtype = numpy.int)
-        
+            if totalSpawns > 1 or totalSpawns > 0 and totalDestinations > 0:
+                spawnTable[person] = nodes
+
+        return spawnTable
+
+
+    # static function to weight the player types that can spawn, the more of a type that have already spawned the less likely it is to spawn again.
+    # Returns the running total of the weights, so a type can be picked with a bisect
+    @staticmethod
+    def getSpawnWeights(peopleTypes, peopleCounts):
+        weights = [100 // len(peopleTypes)] * len(peopleTypes)
+
         # If there is only ever one player type that can spawn it will always be 100% weight
-        if len(finalPlayerTypes) > 1:
-            for i in range(len(finalPlayerTypes)):
-                occurances = previousPeopleTypes.count(finalPlayerTypes[i])
+        if len(peopleTypes) > 1:
+            for i in range(len(peopleTypes)):
+                occurances = peopleCounts[peopleTypes[i]]
                 weights[i] -= (occurances * 10)
-                indexes = [j for j, x in enumerate(weights) if j != i]
-                for k in indexes:
-                    weights[k] += (occurances * 10) / (len(finalPlayerTypes) - 1)
+                for k in range(len(peopleTypes)):
+                    if k != i:
+                        weights[k] += (occurances * 10) // (len(peopleTypes) - 1)
 
-        return finalPlayerTypes, weights
+        return list(itertools.accumulate(max(0, weight) for weight in weights))
 
 
     def spawnAnimation(self):
         Particle(self.game, (self.spriteRenderer.allSprites, self.spriteRenderer.entities), self)
-        self.game.audioLoader.playSound("bell", 1)    
+        self.game.audioLoader.playSound("bell")    
+
+
+    @property
+    def pos(self):
+        return self.kinematics.getPosition(self.index)
+
+
+    @pos.setter
+    def pos(self, pos):
+        self.kinematics.setPosition(self.index, pos)
 
 
     # Return the current status (Status) of the person
@@ -192,8 +208,21 @@ class Person(pygame.sprite.Sprite):
 
     # Set the persons status
     def setStatus(self, status):
+        # Flagging a taxi down adds the person to the hail queue, they stay in it until they get in a taxi or stop waiting for one
+        waiting = (Person.Status.FLAG, Person.Status.BOARDINGTAXI)
+        if status == Person.Status.FLAG and self.status not in waiting:
+            self.dispatcher.hail(self)
+        elif status not in waiting and self.status in waiting:
+            self.dispatcher.cancel(self)
+
         self.status = status
 
+        # Transports waiting at the stop (or the one the person is on) let them on or off straight away
+        if status in (Person.Status.WAITING, Person.Status.FLAG, Person.Status.DEPARTING):
+            transports = [self.travellingOn] if self.travellingOn is not None else list(self.currentNode.getTransports())
+            for transport in transports:
+                transport.updateStop()
+
 
     # Set the current node that the person is at
     def setCurrentNode(self, node):
@@ -251,6 +280,24 @@ class Person(pygame.sprite.Sprite):
         self.spriteRenderer.setTotalPeople(self.spriteRenderer.getTotalPeople() - 1)
 
 
+    def kill(self):
+        self.kinematics.remove(self.index, self)
+        self.scheduler.cancel(self.timerEvent)
+        self.dispatcher.cancel(self)
+        super().kill()
+
+
+    # Return how long the person has left before they run out of time
+    def getTimer(self):
+        return max(0, self.timerEvent.getTime() - self.scheduler.getTime())
+
+
+    # Called by the scheduler when the person has run out of time
+    def runOutOfTime(self):
+        self.spriteRenderer.removeLife()
+        self.remove()
+
+
     def addEntity(self, entity):
         self.entities.append(entity)
 
@@ -294,6 +341,15 @@ class Person(pygame.sprite.Sprite):
         self.remove()
 
 
+    # Complete the person as soon as they reach their destination, so running out of time later in the same frame (i.e when
+    # fast forwarding) can't lose a life for them. Returns true if they have completed
+    def checkCompleted(self):
+        if self.currentNode.getNumber() == self.destination.getNumber():
+            self.complete()
+            return True
+        return False
+
+
     # Switch the person and their status indicator from one layer to a new layer
     def switchLayer(self, oldLayer, newLayer):
         self.removeFromLayer(oldLayer)
@@ -334,7 +390,7 @@ class Person(pygame.sprite.Sprite):
             return
 
         self.statusIndicator.pos = self.pos + self.statusIndicator.offset
-        self.statusIndicator.rect.topleft = self.statusIndicator.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        self.statusIndicator.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(self.statusIndicator.pos)
 
 
     # Visualize the players path by drawing the connection between each node in the path
@@ -344,35 +400,37 @@ class Person(pygame.sprite.Sprite):
 
         start = self.path[0]
         scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        camera = self.spriteRenderer.getCamera()
         thickness = 3
 
         for previous, current in zip(self.path, self.path[1:]):
-            posx = ((previous.pos - previous.offset) + vec(10, 10)) * scale
-            posy = ((current.pos - current.offset) + vec(10, 10)) * scale
+            posx = camera.getDrawPosition((previous.pos - previous.offset) + vec(10, 10))
+            posy = camera.getDrawPosition((current.pos - current.offset) + vec(10, 10))
 
             pygame.draw.line(surface, YELLOW, posx, posy, int(thickness * scale))
             
         # Connection from player to the first node in the path
-        startx = ((self.pos - self.offset) + vec(10, 10)) * scale
-        starty = ((start.pos - start.offset) + vec(10, 10)) * scale
+        startx = camera.getDrawPosition((self.pos - self.offset) + vec(10, 10))
+        starty = camera.getDrawPosition((start.pos - start.offset) + vec(10, 10))
         pygame.draw.line(surface, YELLOW, startx, starty, int(thickness * scale))
 
 
     def drawTimerOutline(self, surface):
         scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        camera = self.spriteRenderer.getCamera()
         thickness = 4
 
         start = (self.pos - self.offset) + vec(7, -10)
         middle = (self.pos + vec(30, -40)) 
         end = middle + vec(30, 0)
 
-        pygame.draw.lines(surface, YELLOW, False, [start * scale, middle * scale, end * scale], int(thickness * scale))
+        pygame.draw.lines(surface, YELLOW, False, [camera.getDrawPosition(start), camera.getDrawPosition(middle), camera.getDrawPosition(end)], int(thickness * scale))
 
 
     def drawTimerTime(self, surface = None):
         textColor = Color("white") if self.spriteRenderer.getDarkMode() else BLACK
-        self.fontImage = self.timerFont.render(str(round(self.timer, 1)), True, textColor)
-        rect = (self.pos + vec(32, -35)) * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        self.fontImage = self.timerFont.render(str(round(self.getTimer(), 1)), True, textColor)
+        rect = self.spriteRenderer.getCamera().getDrawPosition(self.pos + vec(32, -35))
 
         if surface is None:
             self.game.renderer.addSurface(self.fontImage, (rect))
@@ -383,13 +441,14 @@ class Person(pygame.sprite.Sprite):
     # Draw how long is left at each stop 
     def drawTimer(self, surface):
         scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        pos = self.spriteRenderer.getCamera().getDrawPosition(self.pos - vec(4, 4))
         length = 20
 
         # Arc Indicator 
         offx = 0.01
-        step = self.timer / (length / 2) + 0.02
+        step = self.getTimer() / (length / 2) + 0.02
         for x in range(6):
-            pygame.draw.arc(surface, YELLOW, ((self.pos.x - 4) * scale, (self.pos.y - 4) * scale, (self.width + 8) * scale, (self.height + 8) * scale), math.pi / 2 + offx, math.pi / 2 + math.pi * step, int(4 * scale))
+            pygame.draw.arc(surface, YELLOW, (pos.x, pos.y, (self.width + 8) * scale, (self.height + 8) * scale), math.pi / 2 + offx, math.pi / 2 + math.pi * step, int(4 * scale))
             offx += 0.01
 
 
@@ -400,7 +459,7 @@ class Person(pygame.sprite.Sprite):
         scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
         thickness = 4
 
-        pos = (self.destination.pos - vec(self.rad, self.rad)) * scale 
+        pos = self.spriteRenderer.getCamera().getDrawPosition(self.destination.pos - vec(self.rad, self.rad))
         size = vec(self.destination.width + (self.rad * 2), self.destination.height + (self.rad * 2)) * scale
         rect = pygame.Rect(pos, size)
 
@@ -414,10 +473,11 @@ class Person(pygame.sprite.Sprite):
 
     def drawOutline(self, surface):
         scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        pos = self.spriteRenderer.getCamera().getDrawPosition(self.pos)
 
         offx = 0.01
         for x in range(6):
-            pygame.draw.arc(surface, YELLOW, ((self.pos.x) * scale, (self.pos.y) * scale, (self.width) * scale, (self.height) * scale), math.pi / 2 + offx, math.pi / 2, int(3.5 * scale))
+            pygame.draw.arc(surface, YELLOW, (pos.x, pos.y, (self.width) * scale, (self.height) * scale), math.pi / 2 + offx, math.pi / 2, int(3.5 * scale))
             offx += 0.02
 
 
@@ -425,7 +485,7 @@ class Person(pygame.sprite.Sprite):
         self.dirty = False
         self.image = self.game.imageLoader.getImage(self.imageName, (self.width * self.spriteRenderer.getFixedScale(), self.height * self.spriteRenderer.getFixedScale()))
         self.rect = self.image.get_rect()
-        self.rect.topleft = self.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        self.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(self.pos)
 
         self.timerFont = pygame.font.Font(pygame.font.get_default_font(), int(15 * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale())) # do I need the fixed scale to change here?
 
@@ -447,7 +507,7 @@ class Person(pygame.sprite.Sprite):
             self.drawPath(surface)
             self.drawOutline(surface)
 
-        if self.timer <= 20:
+        if self.getTimer() <= 20:
             self.drawTimer(surface)
 
 
@@ -465,17 +525,12 @@ class Person(pygame.sprite.Sprite):
             self.drawPath(self.game.renderer.gameDisplay)
             self.game.renderer.addSurface(None, None, self.drawOutline)
 
-        if self.timer <= 20:
+        if self.getTimer() <= 20:
             self.game.renderer.addSurface(None, None, self.drawTimer)
         
 
     def events(self):
-        self.vel = vec(0, 0)
-
-        mx, my = pygame.mouse.get_pos()
-        difference = self.game.renderer.getDifference()
-        mx -= difference[0]
-        my -= difference[1]
+        mx, my = self.spriteRenderer.getMousePos()
         
 
         # If the mouse is clicked, but not on a person, unset the person from the clickmanager (no one clicked)
@@ -500,28 +555,28 @@ class Person(pygame.sprite.Sprite):
 
             if self.status == Person.Status.UNASSIGNED:
                 if isinstance(self.currentNode, NODE.Stop) or isinstance(self.currentNode, NODE.Destination):
-                    self.status = Person.Status.WAITING
+                    self.setStatus(Person.Status.WAITING)
                 elif isinstance(self.currentNode, NODE.Node):
-                    self.status = Person.Status.FLAG
+                    self.setStatus(Person.Status.FLAG)
 
             elif self.status == Person.Status.WAITING:
                 # or if its a desintation on layer 2
                 if isinstance(self.currentNode, NODE.BusStop) or (isinstance(self.currentNode, NODE.Destination) and self.currentNode.getConnectionType() == "layer 2"): # toggle between waiting for a bus and flagging a taxi
-                    self.status = Person.Status.FLAG
+                    self.setStatus(Person.Status.FLAG)
                 else:
-                    self.status = Person.Status.UNASSIGNED
+                    self.setStatus(Person.Status.UNASSIGNED)
                     
             elif self.status == Person.Status.FLAG:
-                self.status = Person.Status.UNASSIGNED
+                self.setStatus(Person.Status.UNASSIGNED)
             
             elif self.status == Person.Status.BOARDING:
-                self.status = Person.Status.UNASSIGNED
+                self.setStatus(Person.Status.UNASSIGNED)
             
             elif self.status == Person.Status.MOVING:
-                self.status = Person.Status.DEPARTING
+                self.setStatus(Person.Status.DEPARTING)
 
             elif self.status == Person.Status.DEPARTING:
-                self.status = Person.Status.MOVING
+                self.setStatus(Person.Status.MOVING)
             
         # Hover over event
         if self.rect.collidepoint((mx, my)) and not self.mouseOver:
@@ -564,44 +619,49 @@ class Person(pygame.sprite.Sprite):
         # Everything beyond here will NOT be called if the spriteRenderer is paused
         if self.spriteRenderer.getPaused():
             return 
-            
-        self.timer -= self.game.dt * self.spriteRenderer.getDt()
-            
-        if self.timer <= 0:
-            self.spriteRenderer.removeLife()
-            self.remove()
-
-        if self.currentNode.getNumber() == self.destination.getNumber():
-            self.complete()
 
+        # The person has been removed from the level
+        if not self.alive():
+            return
 
+        # Walk towards the next node in the path, the kinematics moves the person and calls arrive when they reach it
         if len(self.path) > 0:
-            path = self.path[0]
+            self.setStatus(Person.Status.WALKING)
+            self.kinematics.setMotion(self.index, self.path[0], self.offset, self.speed, 1)
+        else:
+            self.kinematics.stop(self.index)
 
-            dxy = (path.pos - path.offset) - self.pos + self.offset
-            dis = dxy.length()
 
-            if dis > 1:
-                self.status = Person.Status.WALKING
-                self.vel = dxy / dis * float(self.speed) * self.game.dt * self.spriteRenderer.getDt()
-                self.moveStatusIndicator()
+    # Called by the kinematics after the person has been moved
+    def moved(self):
+        self.moveStatusIndicator()
 
-            else:
-                self.currentNode.removePerson(self)
-                self.currentNode = path
-                self.currentNode.addPerson(self)
-                self.path.remove(path)
-                    
-                # No more nodes in the path, the person is no longer walking and is unassigned
-                if len(self.path) <= 0:
-                    self.status = Person.Status.UNASSIGNED
-                    self.currentNode.getPersonHolder().addPerson(self)
 
-                if self.currentConnectionType != self.currentNode.connectionType:
-                    self.switchLayer(self.currentConnectionType, self.currentNode.connectionType)
-            
-            self.pos += self.vel
-            self.rect.topleft = self.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+    # Called by the kinematics when the person reaches the node they were walking to
+    def arrive(self, node):
+        # The path has changed since the person started walking to the node
+        if len(self.path) <= 0 or self.path[0] is not node:
+            return
+
+        self.currentNode.removePerson(self)
+        self.currentNode = node
+        self.currentNode.addPerson(self)
+        self.path.remove(node)
+
+        # No more nodes in the path, the person is no longer walking and is unassigned
+        if len(self.path) <= 0:
+            self.setStatus(Person.Status.UNASSIGNED)
+            self.currentNode.getPersonHolder().addPerson(self)
+
+        if self.currentConnectionType != self.currentNode.connectionType:
+            self.switchLayer(self.currentConnectionType, self.currentNode.connectionType)
+
+        if self.checkCompleted():
+            return
+
+        # Carry on to the next node straight away, so the rest of a long step (i.e when fast forwarding) isn't spent standing still
+        if len(self.path) > 0:
+            self.kinematics.setMotion(self.index, self.path[0], self.offset, self.speed, 1)
 
 
 class Manager(Person):
@@ -668,7 +728,7 @@ class StatusIndicator(pygame.sprite.Sprite):
         self.dirty = False
         self.image = self.game.imageLoader.getImage(self.images[self.currentState], (self.width * self.spriteRenderer.getFixedScale(), self.height * self.spriteRenderer.getFixedScale()))
         self.rect = self.image.get_rect()
-        self.rect.topleft = self.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        self.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(self.pos)
 
 
     def makeSurface(self):
@@ -709,7 +769,7 @@ class PersonHolder(pygame.sprite.Sprite):
         self.drawerSpacing = 2.5 # Need these to be attributes so they can be used when moving the player on the transports
         self.drawerCols = 2
 
-        self.people = []
+        self.people = EntitySet()
         self.open = False
         self.canClick = False # Used to stop people events for people in the holder (so player can click on the holder instead)
 
@@ -741,10 +801,12 @@ class PersonHolder(pygame.sprite.Sprite):
         if person in self.people:
             return 
 
-        self.people.append(person)
+        self.people.add(person)
 
         if len(self.people) > 1:
+            # The holder isn't moved with the level while it isn't in any groups, so its placed again when it is next drawn
             self.add(self.groups)
+            self.dirty = True
 
             # If the holder is already open we don't want to remove people then add them back
             if self.open:
@@ -759,9 +821,8 @@ class PersonHolder(pygame.sprite.Sprite):
 
         self.people.remove(person)
 
-        # Position the player back against the target        
+        # Position the player back against the target, the kinematics moves their rect when they are next drawn
         person.pos = (self.target.pos - self.target.offset) + person.offset
-        person.rect.topleft = person.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
         person.moveStatusIndicator()
 
         person.addToLayer()
@@ -784,7 +845,6 @@ class PersonHolder(pygame.sprite.Sprite):
             person.setCanClick(True)
 
             person.pos = (self.target.pos - self.target.offset) + person.offset
-            person.rect.topleft = person.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
             person.moveStatusIndicator()
 
 
@@ -799,7 +859,7 @@ class PersonHolder(pygame.sprite.Sprite):
 
             person.pos = self.drawerPos + offset
             person.makeSurface() # If a player spawns in the holder they won't have an image (since they're not added to any groups that draw them) so we need to make their image
-            person.rect.topleft = person.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+            person.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(person.pos)
             person.moveStatusIndicator()
             offset.x += person.width + self.drawerSpacing
 
@@ -842,7 +902,7 @@ class PersonHolder(pygame.sprite.Sprite):
             # Reset the players positions
             person.pos = (self.target.pos - self.target.offset) + person.offset
             person.makeSurface()
-            person.rect.topleft = person.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+            person.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(person.pos)
             person.moveStatusIndicator()
         
         self.open = False
@@ -856,7 +916,7 @@ class PersonHolder(pygame.sprite.Sprite):
         if not self.open:
             self.image = pygame.Surface((self.width * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale(),  self.height * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()), pygame.SRCALPHA).convert_alpha()
             self.rect = self.image.get_rect()
-            self.rect.topleft = self.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+            self.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(self.pos)
             self.counterFont = pygame.font.Font(pygame.font.get_default_font(), int(12 * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale())) # do I need the fixed scale to change here?
 
             pygame.draw.ellipse(self.image, self.color, (0, 0, self.rect.width, self.rect.height))
@@ -868,7 +928,7 @@ class PersonHolder(pygame.sprite.Sprite):
         else:
             self.image = pygame.Surface((self.drawerWidth * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale(), self.drawerHeight * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()), pygame.SRCALPHA).convert_alpha()
             self.rect = self.image.get_rect()
-            self.rect.topleft = self.drawerPos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+            self.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(self.drawerPos)
 
             pygame.draw.rect(self.image, self.color, (0, 0, self.rect.width, self.rect.height), border_radius = int(10 * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()))
 
@@ -888,10 +948,7 @@ class PersonHolder(pygame.sprite.Sprite):
 
 
     def events(self):
-        mx, my = pygame.mouse.get_pos()
-        difference = self.game.renderer.getDifference()
-        mx -= difference[0]
-        my -= difference[1]
+        mx, my = self.spriteRenderer.getMousePos()
 
         if not self.rect.collidepoint((mx, my)) and self.game.clickManager.getClicked() and self.open:
             self.game.audioLoader.playSound("collapse")
@@ -938,7 +995,7 @@ class Particle(pygame.sprite.Sprite):
 
     def __render(self):
         self.dirty = False
-        self.pos = (self.currentPerson.pos - vec(self.rad, self.rad)) * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        self.pos = self.spriteRenderer.getCamera().getDrawPosition(self.currentPerson.pos - vec(self.rad, self.rad))
         self.size = vec(self.currentPerson.width + (self.rad * 2), self.currentPerson.height + (self.rad * 2)) * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
         self.image = pygame.Surface((self.size)).convert()
         self.rect = self.image.get_rect()
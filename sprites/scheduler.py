@@ -0,0 +1,89 @@
+import heapq
+
+
+# Runs things at a time in the level, instead of counting down to them every frame.
+#
+# Events are kept in a heap ordered by when they are due, so each step only has
+# to look at the events which are due and anything waiting costs nothing.
+# Cancelled events are left in the heap and skipped when they come up. Whilst
+# an event is being run the time is the time it was due rather than the time
+# of the step, so anything it starts (i.e a transport leaving a stop) starts
+# from exactly that time.
+class Scheduler:
+    maxEvents = 1000 # most events run in one step, any others are run in the next step
+
+    class Event:
+        def __init__(self, time, callback, args):
+            self.time = time
+            self.callback = callback
+            self.args = args
+            self.cancelled = False
+
+
+        def getTime(self):
+            return self.time
+
+
+        def getCancelled(self):
+            return self.cancelled
+
+
+        def cancel(self):
+            self.cancelled = True
+
+
+    def __init__(self, spriteRenderer):
+        self.spriteRenderer = spriteRenderer
+        self.clear()
+
+
+    # Remove every event, i.e when a new level is loaded
+    def clear(self):
+        self.events = []
+        self.count = 0 # events scheduled so far, so events due at the same time run in the order they were scheduled
+        self.eventTime = None # time of the event being run
+
+
+    # Return the time of the event being run, or the current time
+    def getTime(self):
+        return self.eventTime if self.eventTime is not None else self.spriteRenderer.getTime()
+
+
+    def getPending(self):
+        return len(self.events)
+
+
+    # Run a function at a time, returning the event so it can be cancelled
+    def schedule(self, time, callback, *args):
+        event = Scheduler.Event(time, callback, args)
+        heapq.heappush(self.events, (time, self.count, event))
+        self.count += 1
+        return event
+
+
+    # Run a function after an amount of time
+    def scheduleIn(self, delay, callback, *args):
+        return self.schedule(self.getTime() + delay, callback, *args)
+
+
+    def cancel(self, event):
+        if event is not None:
+            event.cancel()
+
+
+    # Run every event which is due by now, in the order they are due
+    def run(self):
+        time = self.spriteRenderer.getTime()
+
+        for i in range(Scheduler.maxEvents):
+            if len(self.events) <= 0 or self.events[0][0] > time:
+                break
+
+            eventTime, count, event = heapq.heappop(self.events)
+            if event.getCancelled():
+                continue
+
+            self.eventTime = eventTime
+            event.callback(*event.args)
+
+        self.eventTime = None
@@ -0,0 +1,116 @@
+import math
+from bisect import bisect_right
+from collections import OrderedDict
+from enum import Enum
+
+
+# How far a transport has travelled along a connection at any time after leaving.
+#
+# A connection is split into phases: cruising at the transports speed, speeding
+# up when leaving a stop (the further along, the faster) and slowing down when
+# reaching a stop (the closer, the slower). Each phase has an exact formula for
+# the distance travelled, so the position can be found for any time without
+# moving the transport a frame at a time. The transport arrives when it is
+# within the arrive distance of the end of the connection.
+class SpeedProfile:
+    class Phase(Enum):
+        CRUISE = 0
+        SPEEDUP = 1
+        SLOWDOWN = 2
+
+    arriveDistance = 0.5
+    speedUpDistance = 15 # how far from the start the transport speeds up for
+    slowDownDistance = 15 # how far from the end the transport slows down for
+
+    # Profiles are shared between every transport with the same connection length and speed. Routes changed part way along a
+    # connection can be any length, so only the most recently used profiles are kept
+    profiles = OrderedDict()
+    maxProfiles = 512
+
+
+    def __init__(self, distance, speed, speedUp = False, slowDown = False):
+        self.distance = distance
+        self.speed = speed
+        self.speedUpRate = speed / 12
+        self.slowDownRate = speed / 10
+
+        self.phases = [] # (start time, start distance, end distance, phase)
+        self.times = []
+        self.duration = 0
+
+        end = max(0, distance - SpeedProfile.arriveDistance)
+        start = 0
+
+        # Start cruising, since speeding up from standing still would never get anywhere
+        if speedUp and end > SpeedProfile.arriveDistance:
+            self.addPhase(0, SpeedProfile.arriveDistance, SpeedProfile.Phase.CRUISE)
+            start = min(SpeedProfile.speedUpDistance, end)
+            self.addPhase(SpeedProfile.arriveDistance, start, SpeedProfile.Phase.SPEEDUP)
+
+        if slowDown:
+            slowDownStart = max(start, distance - SpeedProfile.slowDownDistance)
+            self.addPhase(start, slowDownStart, SpeedProfile.Phase.CRUISE)
+            self.addPhase(slowDownStart, end, SpeedProfile.Phase.SLOWDOWN)
+        else:
+            self.addPhase(start, end, SpeedProfile.Phase.CRUISE)
+
+
+    # Return the profile for a connection, only making it if there isn't one already
+    @staticmethod
+    def get(distance, speed, speedUp = False, slowDown = False):
+        key = (round(distance, 3), speed, speedUp, slowDown)
+        if key in SpeedProfile.profiles:
+            SpeedProfile.profiles.move_to_end(key)
+            return SpeedProfile.profiles[key]
+
+        profile = SpeedProfile(key[0], speed, speedUp, slowDown)
+        SpeedProfile.profiles[key] = profile
+        if len(SpeedProfile.profiles) > SpeedProfile.maxProfiles:
+            SpeedProfile.profiles.popitem(last = False)
+        return profile
+
+
+    # Remove every shared profile, i.e when a new level is loaded
+    @staticmethod
+    def clear():
+        SpeedProfile.profiles.clear()
+
+
+    def getDistance(self):
+        return self.distance
+
+
+    # Return how long it takes to arrive
+    def getDuration(self):
+        return self.duration
+
+
+    def addPhase(self, start, end, phase):
+        if end <= start:
+            return
+
+        if phase == SpeedProfile.Phase.SPEEDUP:
+            duration = math.log(end / start) / self.speedUpRate
+        elif phase == SpeedProfile.Phase.SLOWDOWN:
+            duration = math.log((self.distance - start) / (self.distance - end)) / self.slowDownRate
+        else:
+            duration = (end - start) / self.speed
+
+        self.phases.append((self.duration, start, end, phase))
+        self.times.append(self.duration)
+        self.duration += duration
+
+
+    # Return how far along the connection the transport is at a time after leaving
+    def getDistanceAt(self, time):
+        if time >= self.duration or len(self.phases) <= 0:
+            return self.distance
+
+        start, startDistance, endDistance, phase = self.phases[max(0, bisect_right(self.times, time) - 1)]
+        time = max(0, time - start)
+
+        if phase == SpeedProfile.Phase.SPEEDUP:
+            return min(endDistance, startDistance * math.exp(self.speedUpRate * time))
+        elif phase == SpeedProfile.Phase.SLOWDOWN:
+            return min(endDistance, self.distance - (self.distance - startDistance) * math.exp(-self.slowDownRate * time))
+        return min(endDistance, startDistance + self.speed * time)
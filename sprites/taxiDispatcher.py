@@ -0,0 +1,185 @@
+import heapq
+
+
+# Sends taxis to the people flagging them down.
+#
+# When a person flags a taxi down they are added to the end of the hail queue,
+# and whenever a hail is added or a taxi becomes free the queue is gone
+# through in order, sending the nearest free taxi to each person still waiting
+# for one. The nearest taxis are found with one shortest path search over the
+# road layer starting from every free taxi at once, which carries on until it
+# has reached every waiting person, so the first taxi to reach each person is
+# the closest to them. Taxis part way along a road start from the end of it,
+# with the distance they have left as their starting cost. A person whose
+# closest taxi was sent to someone earlier in the queue is searched for again
+# with the taxis that are left. Taxis follow the path found the same way as a
+# path set by the player.
+class TaxiDispatcher:
+    def __init__(self, spriteRenderer):
+        self.spriteRenderer = spriteRenderer
+        self.clear()
+
+
+    # Remove every taxi and hail, i.e when a new level is loaded
+    def clear(self):
+        self.taxis = {} # each taxi and the person it has been sent to
+        self.hails = {} # each person flagging a taxi down and the taxi sent to them, in the order they flagged
+
+
+    def getHails(self):
+        return self.hails
+
+
+    # Return the taxi that has been sent to a person, or None if one hasn't been sent
+    def getTaxi(self, person):
+        return self.hails.get(person)
+
+
+    def addTaxi(self, taxi):
+        self.taxis[taxi] = None
+        self.dispatch()
+
+
+    def removeTaxi(self, taxi):
+        if taxi not in self.taxis:
+            return
+
+        person = self.taxis.pop(taxi)
+        if person is not None:
+            self.hails[person] = None
+            self.dispatch()
+
+
+    # Add a person flagging a taxi down to the hail queue
+    def hail(self, person):
+        if person in self.hails:
+            return
+
+        self.hails[person] = None
+        self.dispatch()
+
+
+    # Remove a person from the hail queue, freeing the taxi sent to them
+    def cancel(self, person):
+        if person not in self.hails:
+            return
+
+        taxi = self.hails.pop(person)
+        if taxi is not None:
+            self.taxis[taxi] = None
+            taxi.setHail(None)
+            self.dispatch()
+
+
+    # Return true if a taxi hasn't been sent to anyone and has no one in it
+    def isFree(self, taxi):
+        return self.taxis[taxi] is None and taxi.running and len(taxi.getPeople()) <= 0
+
+
+    # Send the nearest free taxi to each person in the hail queue who hasn't got one yet
+    def dispatch(self):
+        stopped = []
+
+        # Taxis can only pick up people on the road layer
+        waiting = [person for person, taxi in self.hails.items() if taxi is None and person.getCurrentNode().getConnectionType() == "layer 2"]
+
+        while len(waiting) > 0:
+            taxis = [taxi for taxi in self.taxis if self.isFree(taxi)]
+            if len(taxis) <= 0:
+                break
+
+            nearest = self.findNearestTaxis(taxis, [person.getCurrentNode() for person in waiting])
+            unassigned = []
+
+            for person in waiting:
+                taxi, path = nearest.get(person.getCurrentNode().getNumber(), (None, []))
+                if taxi is None:
+                    continue
+
+                # The closest taxi has been sent to someone earlier in the queue, so search again with the taxis left
+                if not self.isFree(taxi):
+                    unassigned.append(person)
+                    continue
+
+                # The taxi is already stopped at the person, so it doesn't need a path
+                if len(path) == 1 and not taxi.getMoving():
+                    path = []
+
+                self.hails[person] = taxi
+                self.taxis[taxi] = person
+                taxi.setHail(person)
+                taxi.setPath(path)
+
+                if not taxi.getMoving():
+                    stopped.append(taxi)
+
+            waiting = unassigned
+
+        # Taxis already stopped at the person pick them up now, once the queue has been gone through
+        for taxi in stopped:
+            taxi.updateStop()
+
+
+    # Search from every taxi at once until each of the nodes has been reached, returning the taxi which reached each node
+    # first and its path there, keyed by the node number. Paths start from the node the taxi is at or last left
+    def findNearestTaxis(self, taxis, nodes):
+        openList = []
+        count = 0
+
+        # The lowest distance found to each node number, the node it was reached from and the taxi it was reached by
+        costs, parents, owners = {}, {}, {}
+        closedList = set()
+        targets = set(node.getNumber() for node in nodes)
+        nearest = {}
+
+        for taxi in taxis:
+            start, cost = taxi.getNextNode()
+            if start.getNumber() in costs and cost >= costs[start.getNumber()]:
+                continue
+
+            costs[start.getNumber()] = cost
+            parents[start.getNumber()] = None
+            owners[start.getNumber()] = taxi
+            heapq.heappush(openList, (cost, count, start))
+            count += 1
+
+        while len(openList) > 0 and len(nearest) < len(targets):
+            cost, c, currentNode = heapq.heappop(openList)
+            number = currentNode.getNumber()
+
+            if number in closedList or cost > costs[number]:
+                continue
+            closedList.add(number)
+
+            if number in targets:
+                nearest[number] = (owners[number], self.getPath(owners[number], currentNode, parents))
+
+            for connection in currentNode.getConnections():
+                child = connection.getTo()
+                childNumber = child.getNumber()
+                g = cost + connection.getDistance()
+
+                if childNumber in closedList or childNumber in costs and g >= costs[childNumber]:
+                    continue
+
+                costs[childNumber] = g
+                parents[childNumber] = currentNode
+                owners[childNumber] = owners[number]
+                heapq.heappush(openList, (g, count, child))
+                count += 1
+
+        return nearest
+
+
+    # Return the path a taxi takes to a node, from the node it is at or, if it is part way along a road, the node it left
+    def getPath(self, taxi, node, parents):
+        path = []
+        current = node
+
+        while current is not None:
+            path.append(current)
+            current = parents[current.getNumber()]
+
+        if path[-1] is not taxi.getCurrentNode():
+            path.append(taxi.getCurrentNode())
+        return path[::-1]
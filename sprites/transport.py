@@ -6,10 +6,12 @@ import os
 import random
 import decimal
 import math
+import itertools
 
 import node as NODE
 import person as PERSON
 import connection as CONNECTION    
+from entitySet import EntitySet
 
 vec = pygame.math.Vector2
 
@@ -27,8 +29,12 @@ class Transport(pygame.sprite.Sprite):
         self.width = 30
         self.height = 30
 
+        # The position is stored in the kinematics, which moves every transport at once
+        self.kinematics = self.spriteRenderer.getKinematics()
+        self.index = self.kinematics.add(self)
+        self.scheduler = self.spriteRenderer.getScheduler()
+
         self.offset = vec(-5, -5) # -5 is half the offset of the connector
-        self.vel = vec(0, 0)
         self.pos = (self.currentConnection.getFrom().pos - self.currentConnection.getFrom().offset) + self.offset
 
         self.speed = float(decimal.Decimal(random.randrange(50, 60)))
@@ -39,14 +45,14 @@ class Transport(pygame.sprite.Sprite):
 
         self.running = running
         self.moving = self.running
-        self.timer = 0
-        self.timerLength = 300
+        self.timerEvent = None # when the transport leaves the stop it is waiting at
+        self.timerLength = 3 # how long to wait at each stop
 
         self.clickManager = clickManager
         self.personClickManager = personClickManager
 
         #people travelling in the transport
-        self.people = []
+        self.people = EntitySet()
         self.personHolder = PERSON.PersonHolder(self.game, self.groups, self)
 
         self.imageName = "train"
@@ -57,6 +63,16 @@ class Transport(pygame.sprite.Sprite):
         self.firstPathNode = None # store the first node in the path, before it might be removed
 
 
+    @property
+    def pos(self):
+        return self.kinematics.getPosition(self.index)
+
+
+    @pos.setter
+    def pos(self, pos):
+        self.kinematics.setPosition(self.index, pos)
+
+
     def getPeople(self):
         return self.people
 
@@ -69,6 +85,16 @@ class Transport(pygame.sprite.Sprite):
         return self.currentNode
 
 
+    # Return the node the transport will next be at and how far it has left to go to get there, which is the node it is at
+    # if it isn't travelling
+    def getNextNode(self):
+        if not self.kinematics.getTravelling(self.index):
+            return self.currentNode, 0
+
+        nextNode = self.path[0] if len(self.path) > 0 else self.currentConnection.getTo()
+        return nextNode, self.kinematics.getRemainingDistance(self.index)
+
+
     def getMouseOver(self):
         return self.mouseOver
 
@@ -154,16 +180,40 @@ class Transport(pygame.sprite.Sprite):
             # Set people waiting for the transportation to departing 
             self.setPeopleBoarding()
 
-            self.moving = False
-            self.timer += 100 * self.game.dt * self.spriteRenderer.getDt()
+            self.wait()
+
+
+    # Stop at the current node, the scheduler calls leave once the transport has waited long enough
+    def wait(self):
+        self.moving = False
+        self.kinematics.stop(self.index)
+
+        if self.timerEvent is None:
+            self.timerEvent = self.scheduler.scheduleIn(self.timerLength, self.leave)
 
-            # Leaving the station
-            if self.timer > self.timerLength:
-                self.moving = True
-                self.timer = 0
 
-                # Add the people boarding to the transportation
-                self.addPeople()
+    # Called by the scheduler when the transport has finished waiting at a stop
+    def leave(self):
+        self.timerEvent = None
+        self.moving = True
+
+        # Add the people boarding to the transportation
+        self.addPeople()
+        self.setRoute()
+
+
+    # Let people on and off whilst waiting at a stop, called when someone at the stop or on the transport asks to get on or off
+    # instead of checking every frame
+    def updateStop(self):
+        if self.running and not self.moving:
+            self.setNextConnection()
+
+
+    # Return how long the transport has been waiting at the current stop
+    def getTimer(self):
+        if self.timerEvent is None:
+            return 0
+        return self.timerLength - (self.timerEvent.getTime() - self.scheduler.getTime())
 
 
     # Set people waiting at the stop to boarding the transportation 
@@ -181,6 +231,15 @@ class Transport(pygame.sprite.Sprite):
         self.path.append(node)
 
 
+    # Follow a path of nodes from the node the transport is at
+    def setPath(self, path):
+        self.setFirstPathNode(path)
+        self.clearPath(path)
+
+        for node in path:
+            self.addToPath(node)
+
+
     def clearPath(self, newPath):
         if len(newPath) == 1:
             connections = self.currentConnection.getTo().getConnections()
@@ -208,22 +267,22 @@ class Transport(pygame.sprite.Sprite):
 
     # Add a person to the transport
     def addPerson(self, person):
-        if person in self.people:
-            return 
-
-        self.people.append(person)
+        self.people.add(person)
 
 
     # Remove a person from the transport
     def removePerson(self, person):
-        if person not in self.people:
-            return 
-
         self.people.remove(person)
 
 
     def remove(self):
         self.kill()
+
+
+    def kill(self):
+        self.kinematics.remove(self.index, self)
+        self.scheduler.cancel(self.timerEvent)
+        super().kill()
     
 
     # Add multiple people who are departing on the transportation
@@ -256,7 +315,7 @@ class Transport(pygame.sprite.Sprite):
         for person in list(self.people):
             if person.getStatus() == PERSON.Person.Status.DEPARTING:
                 person.pos = (self.currentNode.pos - self.currentNode.offset) + person.offset
-                person.rect.topleft = person.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+                person.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(person.pos)
                 person.moveStatusIndicator()
 
                 self.removePerson(person)
@@ -270,6 +329,7 @@ class Transport(pygame.sprite.Sprite):
                 playerNode.getPersonHolder().addPerson(person)
                 person.switchLayer(self.currentNode.getConnectionType(), playerNode.getConnectionType())
                 person.setTravellingOn(None)
+                person.checkCompleted()
 
 
     #move all the people within the transport relative to its location
@@ -281,7 +341,7 @@ class Transport(pygame.sprite.Sprite):
             offset = vec(0, 0)
             for person in list(self.people):
                 person.pos = self.pos + person.offset
-                person.rect.topleft = person.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+                person.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(person.pos)
                 person.moveStatusIndicator()
 
                 # # Check if the person has reached their destination and if they have remove
@@ -302,20 +362,21 @@ class Transport(pygame.sprite.Sprite):
         self.personHolder.drawerPos = self.pos + self.personHolder.drawerOffset
 
         if self.personHolder.getOpen():
-            self.personHolder.rect.topleft = self.personHolder.drawerPos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+            self.personHolder.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(self.personHolder.drawerPos)
         else:
-            self.personHolder.rect.topleft = self.personHolder.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+            self.personHolder.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(self.personHolder.pos)
 
 
     # Draw how long is left at each stop 
     def drawTimer(self, surface):
         scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        pos = self.spriteRenderer.getCamera().getDrawPosition(self.pos - vec(4, 4))
 
         # Arc Indicator 
         offx = 0.01
-        step = self.timer / (self.timerLength / 2) + 0.02
+        step = self.getTimer() / (self.timerLength / 2) + 0.02
         for x in range(6):
-            pygame.draw.arc(surface, YELLOW, ((self.pos.x - 4) * scale, (self.pos.y - 4) * scale, (self.width + 8) * scale, (self.height + 8) * scale), math.pi / 2 + offx, math.pi / 2 + math.pi * step, int(8 * scale))
+            pygame.draw.arc(surface, YELLOW, (pos.x, pos.y, (self.width + 8) * scale, (self.height + 8) * scale), math.pi / 2 + offx, math.pi / 2 + math.pi * step, int(8 * scale))
             offx += 0.01
 
 
@@ -326,26 +387,28 @@ class Transport(pygame.sprite.Sprite):
 
         start = self.path[0]
         scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        camera = self.spriteRenderer.getCamera()
         thickness = 3
 
         for previous, current in zip(self.path, self.path[1:]):
-            posx = ((previous.pos - previous.offset) + vec(10, 10)) * scale
-            posy = ((current.pos - current.offset) + vec(10, 10)) * scale
+            posx = camera.getDrawPosition((previous.pos - previous.offset) + vec(10, 10))
+            posy = camera.getDrawPosition((current.pos - current.offset) + vec(10, 10))
 
             pygame.draw.line(surface, YELLOW, posx, posy, int(thickness * scale))
             
         # Connection from player to the first node in the path
-        startx = ((self.pos - self.offset) + vec(10, 10)) * scale
-        starty = ((start.pos - start.offset) + vec(10, 10)) * scale
+        startx = camera.getDrawPosition((self.pos - self.offset) + vec(10, 10))
+        starty = camera.getDrawPosition((start.pos - start.offset) + vec(10, 10))
         pygame.draw.line(surface, YELLOW, startx, starty, int(thickness * scale))
 
 
     def drawOutline(self, surface):
         scale = self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        pos = self.spriteRenderer.getCamera().getDrawPosition(self.pos - vec(2, 2))
 
         offx = 0.01
         for x in range(6):
-            pygame.draw.arc(surface, YELLOW, ((self.pos.x - 2) * scale, (self.pos.y - 2) * scale, (self.width + 4) * scale, (self.height + 4) * scale), math.pi / 2 + offx, math.pi / 2, int(4 * scale))
+            pygame.draw.arc(surface, YELLOW, (pos.x, pos.y, (self.width + 4) * scale, (self.height + 4) * scale), math.pi / 2 + offx, math.pi / 2, int(4 * scale))
             
             offx += 0.02
 
@@ -354,7 +417,7 @@ class Transport(pygame.sprite.Sprite):
         self.dirty = False
         self.image = self.game.imageLoader.getImage(self.imageName, (self.width * self.spriteRenderer.getFixedScale(), self.height * self.spriteRenderer.getFixedScale()))
         self.rect = self.image.get_rect()
-        self.rect.topleft = self.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+        self.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(self.pos)
 
 
     def makeSurface(self):
@@ -365,7 +428,7 @@ class Transport(pygame.sprite.Sprite):
         self.makeSurface()
         surface.blit(self.image, (self.rect))
 
-        if self.timer > 0:
+        if self.getTimer() > 0:
             self.drawTimer(surface)
 
         if self.clickManager.getTransport() == self:
@@ -377,7 +440,7 @@ class Transport(pygame.sprite.Sprite):
         self.makeSurface()
         self.game.renderer.addSurface(self.image, (self.rect))
 
-        if self.timer > 0:
+        if self.getTimer() > 0:
             #draw the time indicator
             self.drawTimer(self.game.renderer.gameDisplay)
         
@@ -387,10 +450,7 @@ class Transport(pygame.sprite.Sprite):
 
 
     def events(self):
-        mx, my = pygame.mouse.get_pos()
-        difference = self.game.renderer.getDifference()
-        mx -= difference[0]
-        my -= difference[1]
+        mx, my = self.spriteRenderer.getMousePos()
 
 
         if not self.rect.collidepoint((mx, my)) and self.game.clickManager.getClicked():
@@ -415,7 +475,7 @@ class Transport(pygame.sprite.Sprite):
             if self.currentNode.getMouseOver():
                 self.currentNode.setMouseOver(False)
 
-            for person in self.currentNode.getPeople() + self.people:
+            for person in itertools.chain(self.currentNode.getPeople(), self.people):
                 if person.getMouseOver():
                     return
             
@@ -429,6 +489,43 @@ class Transport(pygame.sprite.Sprite):
             self.dirty = True
 
 
+    # Return true if the transport should speed up when leaving the node
+    def canSpeedUp(self, node):
+        return isinstance(node, self.stopType)
+
+
+    # Return true if the transport should slow down when reaching the node
+    def canSlowDown(self, node):
+        return isinstance(node, self.stopType)
+
+
+    # Called by the kinematics after the transport has been moved
+    def moved(self):
+        self.movePeople()
+        self.movePersonHolder()
+
+
+    # Called by the kinematics when the transport reaches the node it was travelling to
+    def arrive(self, node):
+        if len(self.path) <= 0:
+            self.arriveAtNode()
+
+        # set the current connection to be one of the paths connections (just pick a random one)
+        elif self.path[0] is node:
+            self.setNextPathConnection(node)
+
+        # Leave straight away (at the time it arrived) if it hasn't stopped
+        if self.moving:
+            self.setRoute()
+
+
+    # Move onto the next connection, or wait at the stop the transport is at
+    def arriveAtNode(self):
+        self.setNextConnection()
+        self.pos = (self.currentConnection.getFrom().pos - self.currentConnection.getFrom().offset) + self.offset
+        self.rect.topleft = self.spriteRenderer.getCamera().getDrawPosition(self.pos)
+
+
     def update(self):
         if not hasattr(self, 'rect') or not self.running:
             return
@@ -439,59 +536,21 @@ class Transport(pygame.sprite.Sprite):
         if self.spriteRenderer.getPaused():
             return 
 
-        # Reset velocity to prevent infinate movement
-        self.vel = vec(0, 0)
-
-        # if the path is set follow it, only if the transport is not stopped at a stop
-        if len(self.path) > 0 and self.moving:
-            path = self.path[0]
-
-            dxy = (path.pos - path.offset) - self.pos + self.offset
-            dis = dxy.length()
-
-            if dis >= 0.5 and self.moving:
-                # Speed up when leaving a stop, only if it is the first node in the players path
-                if dis >= self.currentConnection.getDistance() - 15 and dis <= self.currentConnection.getLength().length() - 0.5 and isinstance(self.currentNode, self.stopType) and self.currentNode == self.firstPathNode:
-                    self.vel = (-(self.currentConnection.getLength() + dxy) * (self.speed / 12)) * self.game.dt * self.spriteRenderer.getDt()
-                
-                # Slow down when reaching a stop, only if it is the last node in the players path
-                elif dis <= 15 and isinstance(self.currentConnection.getTo(), self.stopType) and len(self.path) <= 1:
-                    self.vel = (dxy * (self.speed / 10)) * self.game.dt * self.spriteRenderer.getDt()
-                else:
-                    self.vel = dxy / dis * float(self.speed) * self.game.dt * self.spriteRenderer.getDt()
+        # Whilst stopped at a stop nothing is done until someone gets on or off or the scheduler makes the transport leave
+        if self.moving:
+            self.setRoute()
 
-                self.movePeople()
-                self.movePersonHolder()
-            else:
-                # set the current connection to be one of the paths connections (just pick a random one)
-                self.setNextPathConnection(path)
 
-            self.pos += self.vel
-            self.rect.topleft = self.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+    # Send the transport to the next node, the kinematics works out where it is along the way and calls arrive when it gets there
+    def setRoute(self):
+        # if the path is set follow it, speeding up and slowing down only at the start and end of the path
+        if len(self.path) > 0:
+            speedUp = self.currentNode == self.firstPathNode and self.canSpeedUp(self.currentNode)
+            slowDown = len(self.path) <= 1 and self.canSlowDown(self.currentConnection.getTo())
+            self.kinematics.setRoute(self.index, self.path[0], self.offset, self.speed, speedUp, slowDown)
 
         else:
-            dxy = (self.currentConnection.getTo().pos - self.currentConnection.getTo().offset) - self.pos + self.offset
-            dis = dxy.length()
-            
-            if dis >= 0.5 and self.moving: #move towards the node
-                # Speed up when leaving a stop
-                if dis >= self.currentConnection.getDistance() - 15 and dis <= self.currentConnection.getLength().length() - 0.5 and isinstance(self.currentNode, self.stopType):
-                    self.vel = (-(self.currentConnection.getLength() + dxy) * (self.speed / 12)) * self.game.dt * self.spriteRenderer.getDt()
-
-                # Slow down when reaching a stop
-                elif dis <= 15 and isinstance(self.currentConnection.getTo(), self.stopType):
-                    self.vel = (dxy * (self.speed / 10)) * self.game.dt * self.spriteRenderer.getDt()
-                else:
-                    self.vel = dxy / dis * float(self.speed) * self.game.dt * self.spriteRenderer.getDt()
-
-                self.movePeople()
-                self.movePersonHolder()
-            else: 
-                self.setNextConnection()
-                self.pos = (self.currentConnection.getFrom().pos - self.currentConnection.getFrom().offset) + self.offset
-
-            self.pos += self.vel
-            self.rect.topleft = self.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+            self.kinematics.setRoute(self.index, self.currentConnection.getTo(), self.offset, self.speed, self.canSpeedUp(self.currentNode), self.canSlowDown(self.currentConnection.getTo()))
 
 
 class Taxi(Transport):
@@ -501,10 +560,29 @@ class Taxi(Transport):
         self.stopType = NODE.Node
         self.boardingType = PERSON.Person.Status.BOARDINGTAXI
 
-        #self.timerLength = 200 # To Do: choose a value length
+        #self.timerLength = 2 # To Do: choose a value length
 
         self.hasStopped = False
 
+        # The person the taxi has been sent to by the dispatcher
+        self.hail = None
+        self.dispatcher = self.spriteRenderer.getDispatcher()
+        self.dispatcher.addTaxi(self)
+
+
+    def getHail(self):
+        return self.hail
+
+
+    def setHail(self, hail):
+        self.hail = hail
+
+
+    # override
+    def kill(self):
+        self.dispatcher.removeTaxi(self)
+        super().kill()
+
     # override
     def setPeopleBoarding(self):
         # If theres no one at the station, dont bother trying to add anyone
@@ -520,16 +598,7 @@ class Taxi(Transport):
         # Set people waiting for the transportation to departing 
         self.setPeopleBoarding()
 
-        self.moving = False
-        self.timer += 100 * self.game.dt * self.spriteRenderer.getDt()
-
-        # Leaving the station
-        if self.timer > self.timerLength:
-            self.moving = True
-            self.timer = 0
-
-            # Add the people boarding to the transportation
-            self.addPeople()
+        self.wait()
 
 
     # override 
@@ -553,107 +622,57 @@ class Taxi(Transport):
                 self.checkPeopleBoarding()
 
 
-    # Check if there is a person on the node flagging the taxi down
-    def checkTaxiStop(self, node):
-        # only stop if there is someone flagging the taxi down, dont stop if the taxi is already carrying someone 
-        if len(node.getPeople()) <= 0 or len(self.people) >= 1:
+    # Return true if the person the taxi has been sent to is on the node flagging the taxi down
+    def isFlagged(self, node):
+        # dont stop if the taxi is already carrying someone 
+        if self.hail is None or len(self.people) >= 1:
             return False
 
-        for person in node.getPeople():
-            if person.getStatus() == PERSON.Person.Status.FLAG or person.getStatus() == self.boardingType:
-                self.hasStopped = True
-                return True
-        return False
+        if self.hail.getCurrentNode().getNumber() != node.getNumber():
+            return False
+        return self.hail.getStatus() == PERSON.Person.Status.FLAG or self.hail.getStatus() == self.boardingType
 
 
-    # Check if the person travelling on the taxi wants to leave the taxi
-    def checkPersonStop(self, node):
+    # override, the taxi can be sent to someone else once everyone has got out
+    def removePeople(self):
+        super().removePeople()
+
         if len(self.people) <= 0:
-            return False
+            self.dispatcher.dispatch()
 
+
+    # Return true if the person travelling on the taxi wants to leave the taxi
+    def isDropping(self):
         for person in self.people:
             if person.getStatus() == PERSON.Person.Status.DEPARTING:
-                self.hasStopped = True
                 return True
         return False
 
 
-    # override
-    def update(self):
-        if not hasattr(self, 'rect') or not self.running:
-            return
-
-        self.events()
-
-        # Everything beyond here will NOT be called if the spriteRenderer is paused
-        if self.spriteRenderer.getPaused():
-            return 
-
-        self.vel = vec(0, 0)
-
-        if len(self.path) > 0 and self.moving:
-            path = self.path[0]
-
-            dxy = (path.pos - path.offset) - self.pos + self.offset
-            dis = dxy.length()
+    # Check if there is a person on the node flagging the taxi down, stopping the taxi if there is
+    def checkTaxiStop(self, node):
+        if self.isFlagged(node):
+            self.hasStopped = True
+            return True
+        return False
 
-            if dis >= 0.5 and self.moving:
-                # speed up when leaving a stop
-                if dis >= self.currentConnection.getDistance() - 15 and dis <= self.currentConnection.getLength().length() - 0.5 and isinstance(self.currentNode, self.stopType) and self.currentNode == self.firstPathNode:
-                    if self.checkTaxiStop(self.currentNode) or self.checkPersonStop(self.currentNode) or self.hasStopped:
-                        self.vel = (-(self.currentConnection.getLength() + dxy) * (self.speed / 12)) * self.game.dt * self.spriteRenderer.getDt()
-                    else:
-                        self.vel = dxy / dis * float(self.speed) * self.game.dt * self.spriteRenderer.getDt()
 
-                # slow down when reaching a node
-                elif dis <= 15 and isinstance(self.currentConnection.getTo(), self.stopType) and len(self.path) <= 1:
-                    if self.checkTaxiStop(self.currentConnection.getTo()) or self.checkPersonStop(self.currentConnection.getTo()):
-                        self.vel = (dxy * (self.speed / 10)) * self.game.dt * self.spriteRenderer.getDt()
-                    else:
-                        self.vel = dxy / dis * float(self.speed) * self.game.dt * self.spriteRenderer.getDt()
-                else:
-                    self.vel = dxy / dis * float(self.speed) * self.game.dt * self.spriteRenderer.getDt()
+    # Check if the person travelling on the taxi wants to leave the taxi, stopping the taxi if they do
+    def checkPersonStop(self, node):
+        if self.isDropping():
+            self.hasStopped = True
+            return True
+        return False
 
-                self.movePeople()
-                self.movePersonHolder()
 
-            else:
-                self.setNextPathConnection(path)
+    # override
+    def canSpeedUp(self, node):
+        return super().canSpeedUp(node) and (self.isFlagged(node) or self.isDropping() or self.hasStopped)
 
-            self.pos += self.vel
-            self.rect.topleft = self.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
 
-        else:
-            dxy = (self.currentConnection.getTo().pos - self.currentConnection.getTo().offset) - self.pos + self.offset
-            dis = dxy.length()
-
-            if dis >= 0.5 and self.moving: #move towards the node
-                # speed up when leaving
-                if dis >= self.currentConnection.getDistance() - 15 and dis <= self.currentConnection.getLength().length() - 0.5 and isinstance(self.currentNode, self.stopType):
-                    if self.checkTaxiStop(self.currentNode) or self.checkPersonStop(self.currentNode) or self.hasStopped:
-                        self.vel = (-(self.currentConnection.getLength() + dxy) * (self.speed / 12)) * self.game.dt * self.spriteRenderer.getDt()
-                    else:
-                        self.vel = dxy / dis * float(self.speed) * self.game.dt * self.spriteRenderer.getDt()
-
-                # slow down when stopping
-                elif dis <= 15 and isinstance(self.currentConnection.getTo(), self.stopType):
-                    if self.checkTaxiStop(self.currentConnection.getTo()) or self.checkPersonStop(self.currentConnection.getTo()):
-                        self.vel = (dxy * (self.speed / 10)) * self.game.dt * self.spriteRenderer.getDt()
-                    else:
-                        self.vel = dxy / dis * float(self.speed) * self.game.dt * self.spriteRenderer.getDt()
-                        
-                else:
-                    self.vel = dxy / dis * float(self.speed) * self.game.dt * self.spriteRenderer.getDt()
-
-                self.movePeople()
-                self.movePersonHolder()
-
-            else: # At the node
-                self.setNextConnection()
-                self.pos = (self.currentConnection.getFrom().pos - self.currentConnection.getFrom().offset) + self.offset
-            
-            self.pos += self.vel
-            self.rect.topleft = self.pos * self.game.renderer.getScale() * self.spriteRenderer.getFixedScale()
+    # override
+    def canSlowDown(self, node):
+        return super().canSlowDown(node) and (self.isFlagged(node) or self.isDropping())
 
 
 